@@ -2,10 +2,20 @@
 
 import json
 import logging
+import os
+from collections.abc import Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from time import perf_counter
 
-from flask import Flask, jsonify, request, Response
+from flask import Flask, g, jsonify, request, Response, stream_with_context
 from flask_cors import CORS
+from github import GithubException
 
+import instrumentation
+import job_queue
+import metrics
+import org_scan
+import validation_budget
 import validation_interface
 import verbalization_interface
 
@@ -14,6 +24,39 @@ CORS(app)
 
 logging.basicConfig(level=logging.INFO)
 
+# Maximum number of repositories of a batch that are validated concurrently
+batch_pool_size = int(os.environ.get("QUARE_BATCH_POOL_SIZE", 8))
+# Number of seconds after which a comment is sent on an idle event stream, so that proxies do not close it
+stream_keep_alive_interval = 15
+
+
+@app.before_request
+def start_request_timer() -> None:
+    g.time_start = perf_counter()
+
+
+@app.after_request
+def record_request_metrics(response: Response) -> Response:
+    # The project type is only known for requests to POST /validate.
+    endpoint = request.endpoint or "unknown"
+    metrics.increment("quare_http_requests_total", {"endpoint": endpoint, "status": str(response.status_code)})
+    metrics.observe("quare_http_request_duration_seconds", perf_counter() - g.time_start,
+                    {"endpoint": endpoint, "repo_type": get_repo_type_label(g.get("repo_type", ""))})
+    return response
+
+
+def get_repo_type_label(repo_type: str) -> str:
+    # The project type is given by the client, so only those of the shapes graph are used as label values. Otherwise,
+    # every request could add a time series.
+    if not repo_type or repo_type in validation_interface.shacl_validator.project_type_fetch_plans:
+        return repo_type
+    return "unknown"
+
+
+@app.route("/metrics", methods=['GET'])
+def prometheus_metrics() -> Response:
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
 
 @app.route("/", methods=['GET'])
 def hello_world() -> Response:
@@ -25,21 +68,193 @@ def repo_types() -> Response:
     return jsonify(validation_interface.get_project_type_specifications())
 
 
+@app.route("/rate-limits", methods=['GET'])
+def rate_limits() -> Response:
+    # Remaining requests and reset times of the access tokens seen so far (identified by a prefix of their hash)
+    return jsonify(validation_interface.get_rate_limits())
+
+
 @app.route("/validate", methods=['POST'])
 def validate() -> Response:
     request_data = json.loads(request.data)
     github_access_token = request_data["accessToken"]
     repo_name = request_data["repoName"]
     repo_type = request_data["repoType"]
+    include_report = request_data.get("includeReport", False)
+    g.repo_type = repo_type
+    include_timings = request_data.get("includeTimings", False)
+    # Number of seconds after which the fetchers that are still running are cancelled (see validation_budget.py)
+    time_budget = request_data.get("timeBudget")
+
+    with instrumentation.trace() as request_trace, validation_budget.budget(time_budget) as request_budget:
+        with instrumentation.span("request"):
+            result = get_validation_result(github_access_token, repo_name, repo_type, include_report)
+
+    # Durations (in seconds) of the stages of the validation, e.g., of each fetcher and of the SHACL validation
+    if include_timings:
+        result["timings"] = request_trace.get_durations()
+    # The criteria that depend on fetchers that did not finish in time are neither fulfilled nor violated.
+    if request_budget.timed_out_fetchers:
+        result["timedOutFetchers"] = request_budget.timed_out_fetchers
+        result["undeterminedCriteria"] = request_budget.undetermined_criteria.get(repo_type, [])
+    return jsonify(result)
+
+
+@app.route("/validate/batch", methods=['POST'])
+def validate_batch() -> Response:
+    request_data = json.loads(request.data)
+    github_access_token = request_data["accessToken"]
+    repositories = [(item["repoName"], item["repoType"]) for item in request_data["repositories"]]
+    include_report = request_data.get("includeReport", False)
+
+    # Each repository is validated only once against each project type, even if it is requested multiple times.
+    unique_repositories = list(dict.fromkeys(repositories))
+    with ThreadPoolExecutor(max_workers=max(1, min(batch_pool_size, len(unique_repositories)))) as executor:
+        results = executor.map(
+            lambda repository: get_batch_item_result(github_access_token, *repository, include_report),
+            unique_repositories)
+        results_per_repository = dict(zip(unique_repositories, results))
+
+    return jsonify({"results": [results_per_repository[repository] for repository in repositories]})
+
+
+@app.route("/validate/stream", methods=['GET'])
+def validate_stream() -> Response:
+    # Validates a batch like POST /validate/batch, but sends the result of each repository as a server-sent event as
+    # soon as it is available. Since EventSource cannot send a request body, the repositories are given as
+    # "repoName" and "repoType" query parameters (in pairs) and the access token as "Authorization: token <token>"
+    # header, which unlike the URL does not end up in access logs.
+    github_access_token = request.headers.get("Authorization", "").removeprefix("token ").removeprefix("Bearer ")
+    repositories = list(zip(request.args.getlist("repoName"), request.args.getlist("repoType")))
+    include_report = request.args.get("includeReport", "false").lower() == "true"
+
+    return Response(stream_with_context(get_validation_events(github_access_token, repositories, include_report)),
+                    mimetype="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+def get_validation_events(github_access_token: str, repositories: list[tuple[str, str]],
+                          include_report: bool = False) -> Iterator[str]:
+    # Each result event contains the positions of the repository in the batch, since it may be requested multiple
+    # times but is validated only once.
+    positions: dict[tuple[str, str], list[int]] = {}
+    for position, repository in enumerate(repositories):
+        positions.setdefault(repository, []).append(position)
+
+    executor = ThreadPoolExecutor(max_workers=max(1, min(batch_pool_size, len(positions))))
+    try:
+        pending: dict[Future, tuple[str, str]] = {
+            executor.submit(get_batch_item_result, github_access_token, *repository, include_report): repository
+            for repository in positions}
+        while pending:
+            done, _ = wait(pending, timeout=stream_keep_alive_interval, return_when=FIRST_COMPLETED)
+            if not done:
+                yield ": keep-alive\n\n"
+            for future in done:
+                repo_name, repo_type = pending.pop(future)
+                result = {"positions": positions[(repo_name, repo_type)], "repoType": repo_type, **future.result()}
+                yield f"event: result\ndata: {json.dumps(result)}\n\n"
+
+        yield f"event: done\ndata: {json.dumps({'numberOfRepositories': len(repositories)})}\n\n"
+    finally:
+        # Validations that have not started yet are cancelled if the client closed the connection.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+@app.route("/validate/multi", methods=['POST'])
+def validate_multi() -> Response:
+    request_data = json.loads(request.data)
+    github_access_token = request_data["accessToken"]
+    repo_name = request_data["repoName"]
+    repo_types = list(dict.fromkeys(request_data["repoTypes"]))
+    include_report = request_data.get("includeReport", False)
+
+    # The repository is fetched only once for all project types.
+    cache_statuses: dict[str, dict] = {}
+    results = validation_interface.run_validator_against_types(github_access_token, repo_name, repo_types,
+                                                               include_report, cache_statuses)
+
+    results_per_type = []
+    for repo_type in repo_types:
+        return_code, number_of_violations, violations, report = results[repo_type]
+        results_per_type.append({"repoType": repo_type,
+                                 **create_validation_result(repo_name, return_code, number_of_violations, violations,
+                                                            report, cache_statuses[repo_type])})
+
+    return jsonify({"repoName": repo_name, "results": results_per_type})
+
+
+@app.route("/scan", methods=['POST'])
+def scan() -> Response:
+    # Validates all repositories of an organization or user and returns the result of each criterion per repository
+    request_data = json.loads(request.data)
+    g.repo_type = request_data["repoType"]
+    return jsonify(org_scan.scan_owner(request_data["accessToken"], request_data["owner"], request_data["repoType"],
+                                       request_data.get("includeForks", True),
+                                       request_data.get("includeArchived", True)))
+
+
+@app.route("/jobs", methods=['POST'])
+def submit_job() -> tuple[Response, int]:
+    # Validates the repository in the background, so that the request does not have to wait for the result.
+    request_data = json.loads(request.data)
+    priority = request_data.get("priority", "interactive")
+    if priority not in job_queue.priorities:
+        return jsonify({"error": f"Unknown priority {priority}. Use one of {', '.join(job_queue.priorities)}."}), 400
+
+    job_id = get_job_queue().submit(request_data["accessToken"], request_data["repoName"], request_data["repoType"],
+                                    request_data.get("includeReport", False), priority)
+    return jsonify({"jobId": job_id, "status": "queued"}), 202
+
+
+@app.route("/jobs/<job_id>", methods=['GET'])
+def get_job(job_id: str) -> Response | tuple[Response, int]:
+    # Status ("queued", "running", "succeeded" or "failed") and, once finished, the result (as returned by
+    # POST /validate) or the error of a job
+    job = get_job_queue().get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job {job_id}."}), 404
+    return jsonify(job)
+
+
+def get_job_queue() -> job_queue.JobQueue:
+    return job_queue.get_job_queue(get_validation_result)
+
+
+def get_validation_result(github_access_token: str, repo_name: str, repo_type: str,
+                          include_report: bool = False) -> dict:
+    cache_status: dict = {}
+    return_code, number_of_violations, violations, report = validation_interface.run_validator(
+        github_access_token, repo_name, repo_type, include_report, cache_status)
+
+    return create_validation_result(repo_name, return_code, number_of_violations, violations, report, cache_status)
+
+
+def create_validation_result(repo_name: str, return_code: int, number_of_violations: int | None,
+                             violations: list[dict], report: str | None = None,
+                             cache_status: dict | None = None) -> dict:
+    with instrumentation.span("verbalization"):
+        verbalized = verbalization_interface.run_verbalizer(violations)
 
-    return_code, number_of_violations, report = validation_interface.run_validator(github_access_token, repo_name,
-                                                                                   repo_type)
-    verbalized = verbalization_interface.run_verbalizer(report)
+    result = {"repoName": repo_name, "returnCode": return_code, "numberOfViolations": number_of_violations,
+              "violations": violations, "verbalized": verbalized}
+    # Whether the result was taken from the result cache ("hit") and how many seconds ago it was computed
+    if cache_status:
+        result["cache"] = cache_status
+    # The text report of pyshacl is only serialized on request.
+    if report is not None:
+        result["report"] = report
+    return result
 
-    results = {"repoName": repo_name, "returnCode": return_code, "numberOfViolations": number_of_violations,
-               "report": report, "verbalized": verbalized}
 
-    return jsonify(results)
+def get_batch_item_result(github_access_token: str, repo_name: str, repo_type: str,
+                          include_report: bool = False) -> dict:
+    # A single repository that cannot be validated must not fail the whole batch.
+    try:
+        return get_validation_result(github_access_token, repo_name, repo_type, include_report)
+    except (GithubException, KeyError, ValueError) as e:
+        logging.exception(f"Could not validate {repo_name} against the {repo_type} project type.")
+        return {"repoName": repo_name, "returnCode": None, "numberOfViolations": None, "violations": [],
+                "verbalized": [], "error": str(e)}
 
 
 if __name__ == '__main__':
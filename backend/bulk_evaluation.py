@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+
+import json
+import logging
+import os
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import TextIO
+
+import shacl_validator
+import validation_interface
+
+logger = logging.getLogger(__name__)
+
+
+def run_bulk_evaluation(repo_list_path: str, checkpoint_path: str, github_access_token: str = "",
+                        repo_type: str = "FAIRSoftware", pool_size: int = 8, use_processes: bool = False) -> int:
+    # Validates the repositories of a file (one "owner/name" per line) and appends the result per criterion of each
+    # of them to a JSONL checkpoint. Repositories that are already in the checkpoint are skipped, so that an
+    # interrupted run can be resumed by running it again.
+    return evaluate_repos(read_repo_list(repo_list_path), checkpoint_path, github_access_token, repo_type, pool_size,
+                          use_processes)
+
+
+def evaluate_repos(repo_names: Iterable[str], checkpoint_path: str, github_access_token: str = "",
+                   repo_type: str = "FAIRSoftware", pool_size: int = 8, use_processes: bool = False) -> int:
+    completed_repos = read_completed_repos(checkpoint_path, repo_type)
+    number_of_evaluated_repos = 0
+
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    with executor_class(max_workers=pool_size) as executor, open_checkpoint(checkpoint_path) as checkpoint:
+        # Only a bounded number of repositories is submitted at once, so that neither the list of repositories nor
+        # their results have to be held in memory.
+        pending: dict[Future, str] = {}
+        for repo_name in repo_names:
+            if repo_name in completed_repos:
+                continue
+            completed_repos.add(repo_name)
+
+            if len(pending) >= 2 * pool_size:
+                number_of_evaluated_repos += write_completed_results(pending, checkpoint, wait_for_all=False)
+            pending[executor.submit(evaluate_repo, github_access_token, repo_name, repo_type)] = repo_name
+
+        number_of_evaluated_repos += write_completed_results(pending, checkpoint, wait_for_all=True)
+
+    logger.info("Evaluated %d repositories against the %s project type.", number_of_evaluated_repos, repo_type)
+    return number_of_evaluated_repos
+
+
+def write_completed_results(pending: dict[Future, str], checkpoint: TextIO, wait_for_all: bool) -> int:
+    done, _ = wait(pending, return_when=ALL_COMPLETED if wait_for_all else FIRST_COMPLETED)
+    number_of_written_results = 0
+    for future in done:
+        repo_name = pending.pop(future)
+        try:
+            result = future.result()
+        except Exception as e:
+            # Transient errors (e.g., network errors) are not written to the checkpoint, so that the repository is
+            # validated again on the next run.
+            logger.exception(f"Could not validate {repo_name}: {e}")
+            continue
+
+        checkpoint.write(json.dumps(result) + "\n")
+        checkpoint.flush()
+        number_of_written_results += 1
+    return number_of_written_results
+
+
+def evaluate_repo(github_access_token: str, repo_name: str, repo_type: str) -> dict:
+    from github import UnknownObjectException
+
+    try:
+        return_code, number_of_violations, violations, _ = validation_interface.run_validator(github_access_token,
+                                                                                             repo_name, repo_type)
+    except UnknownObjectException as e:
+        # Repositories that do not exist (anymore) are recorded as well, since a new run would not change that.
+        logger.warning(f"Could not validate {repo_name} against the {repo_type} project type. {e}")
+        return {"repoName": repo_name, "repoType": repo_type, "error": str(e)}
+
+    return {"repoName": repo_name, "repoType": repo_type, "returnCode": return_code,
+            "numberOfViolations": number_of_violations, "results": get_results_per_criterion(repo_type, violations)}
+
+
+def get_results_per_criterion(repo_type: str, violations: list[dict]) -> dict[str, bool]:
+    violated_shapes = {violation["sourceShape"].split("/")[-1] for violation in violations}
+    return {criterion: criterion not in violated_shapes for criterion in get_criteria(repo_type)}
+
+
+def get_criteria(repo_type: str) -> list[str]:
+    # The criteria of a project type are named after the shapes it references.
+    return sorted(shape.split("/")[-1]
+                  for predicate in (shacl_validator.sh["property"], shacl_validator.sh["node"])
+                  for shape in shacl_validator.shapes_graph.objects(subject=shacl_validator.types[repo_type],
+                                                                     predicate=predicate))
+
+
+def read_repo_list(repo_list_path: str) -> Iterator[str]:
+    with open(repo_list_path) as file:
+        for line in file:
+            repo_name = line.strip()
+            if repo_name and not repo_name.startswith("#"):
+                yield repo_name
+
+
+def read_checkpoint(checkpoint_path: str) -> Iterator[dict]:
+    if not os.path.exists(checkpoint_path):
+        return
+
+    with open(checkpoint_path) as file:
+        for line in file:
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # The last line is incomplete if the process was killed while writing it.
+                logger.warning(f"Skipping an incomplete line of the checkpoint {checkpoint_path}.")
+
+
+def read_completed_repos(checkpoint_path: str, repo_type: str) -> set[str]:
+    return {result["repoName"] for result in read_checkpoint(checkpoint_path) if result["repoType"] == repo_type}
+
+
+def open_checkpoint(checkpoint_path: str) -> TextIO:
+    os.makedirs(os.path.dirname(checkpoint_path) or ".", exist_ok=True)
+
+    # An incomplete last line is terminated, so that it does not corrupt the first result of this run.
+    is_terminated = True
+    if os.path.exists(checkpoint_path) and os.path.getsize(checkpoint_path) > 0:
+        with open(checkpoint_path, "rb") as file:
+            file.seek(-1, os.SEEK_END)
+            is_terminated = file.read(1) == b"\n"
+
+    checkpoint = open(checkpoint_path, "a")
+    if not is_terminated:
+        checkpoint.write("\n")
+    return checkpoint
+
+
+if __name__ == "__main__":
+    import fire
+
+    logging.basicConfig(level=logging.INFO)
+    fire.Fire(run_bulk_evaluation)
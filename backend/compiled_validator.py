@@ -0,0 +1,379 @@
+import re
+from collections import defaultdict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from textwrap import indent
+
+from rdflib import BNode, Graph, Literal, Namespace, URIRef
+from rdflib.collection import Collection
+from rdflib.namespace import RDF, RDFS
+from rdflib.term import Node
+
+sh = Namespace("http://www.w3.org/ns/shacl#")
+
+# Predicates of shapes that do not affect the validation result
+descriptive_predicates = {RDF.type, RDFS.label, RDFS.comment, sh["message"], sh["description"], sh["name"],
+                          sh["order"], sh["group"], sh["severity"]}
+supported_predicates = descriptive_predicates | {
+    sh["path"], sh["property"], sh["node"], sh["or"], sh["and"], sh["xone"], sh["in"], sh["minCount"],
+    sh["maxCount"], sh["pattern"], sh["flags"], sh["qualifiedValueShape"], sh["qualifiedMinCount"],
+    sh["qualifiedMaxCount"], sh["qualifiedValueShapesDisjoint"]
+}
+target_predicates = (sh["targetClass"], sh["targetNode"], sh["targetSubjectsOf"], sh["targetObjectsOf"])
+regex_flags = {"i": re.IGNORECASE, "m": re.MULTILINE, "s": re.DOTALL, "x": re.VERBOSE}
+constraint_names = {"QualifiedMinCountConstraintComponent": "QualifiedValueShapeConstraintComponent",
+                    "QualifiedMaxCountConstraintComponent": "QualifiedValueShapeConstraintComponent"}
+
+# Index of the data graph that maps (subject, predicate) to the set of objects
+DataIndex = dict[tuple[Node, Node], set[Node]]
+
+
+class UnsupportedShapeError(Exception):
+    pass
+
+
+@dataclass
+class ValidationResult:
+    constraint_component: str
+    source_shape: Node
+    focus_node: Node
+    severity: URIRef
+    messages: list[str]
+    value_node: Node | None = None
+    result_path: Node | None = None
+    details: list["ValidationResult"] = field(default_factory=list)
+
+
+CompiledShape = Callable[[DataIndex, Node], list[ValidationResult]]
+
+
+class CompiledShapes:
+    # Compiles the sh:NodeShape of each project type on first use into plain Python predicates. Project types whose
+    # shapes use features that cannot be compiled are remembered, so that pyshacl is used for them.
+    def __init__(self, shapes_graph: Graph) -> None:
+        self.shapes_graph = shapes_graph
+        self.compiled_project_types: dict[Node, CompiledShape | None] = {}
+
+    def get_compiled_project_type(self, project_type: Node) -> CompiledShape | None:
+        if project_type not in self.compiled_project_types:
+            try:
+                self.compiled_project_types[project_type] = ShapeCompiler(self.shapes_graph).compile(project_type)
+            except UnsupportedShapeError:
+                self.compiled_project_types[project_type] = None
+        return self.compiled_project_types[project_type]
+
+    def validate(self, data_graph: Graph, include_report_text: bool = True) -> tuple[bool, Graph, str | None] | None:
+        # Returns None if the data graph cannot be validated without pyshacl.
+        if any((None, predicate, None) in self.shapes_graph for predicate in target_predicates):
+            return None
+
+        index: DataIndex = defaultdict(set)
+        for subject, predicate, obj in data_graph:
+            index[(subject, predicate)].add(obj)
+
+        results: list[ValidationResult] = []
+        for focus_node, project_type in data_graph.subject_objects(RDF.type):
+            if not is_implicit_class_target(self.shapes_graph, project_type):
+                continue
+            if (None, RDFS.subClassOf, project_type) in self.shapes_graph or \
+                    (None, RDFS.subClassOf, project_type) in data_graph:
+                return None
+            compiled_project_type = self.get_compiled_project_type(project_type)
+            if compiled_project_type is None:
+                return None
+            results.extend(compiled_project_type(index, focus_node))
+
+        return create_validation_report(self.shapes_graph, data_graph, results, include_report_text)
+
+
+class ShapeCompiler:
+    def __init__(self, shapes_graph: Graph) -> None:
+        self.graph = shapes_graph
+        self.compiled_shapes: dict[Node, CompiledShape] = {}
+        self.shapes_in_progress: set[Node] = set()
+
+    def compile(self, shape: Node) -> CompiledShape:
+        if shape in self.compiled_shapes:
+            return self.compiled_shapes[shape]
+        if shape in self.shapes_in_progress:
+            raise UnsupportedShapeError(f"The shape {shape} is recursive.")
+
+        self.shapes_in_progress.add(shape)
+        for predicate in self.graph.predicates(shape):
+            if predicate not in supported_predicates and str(predicate).startswith(str(sh)):
+                raise UnsupportedShapeError(f"The shape {shape} uses the unsupported predicate {predicate}.")
+        if self.graph.value(shape, sh["deactivated"]) is not None:
+            raise UnsupportedShapeError(f"The shape {shape} is deactivated.")
+
+        path = self.graph.value(shape, sh["path"])
+        value_nodes = self.compile_path(path) if path is not None else None
+        constraints = self.compile_constraints(shape, is_property_shape=path is not None)
+        property_shapes = [self.compile(property_shape) for property_shape in self.graph.objects(shape, sh["property"])]
+        messages = [str(message) for message in self.graph.objects(shape, sh["message"])]
+        severity = self.graph.value(shape, sh["severity"]) or sh["Violation"]
+
+        def compiled_shape(index: DataIndex, focus_node: Node) -> list[ValidationResult]:
+            results: list[ValidationResult] = []
+            values = value_nodes(index, focus_node) if value_nodes else {focus_node}
+            for constraint in constraints:
+                for component, value_node, details, generic_message in constraint(index, focus_node, values):
+                    results.append(ValidationResult(component, shape, focus_node, severity,
+                                                    messages or [generic_message], value_node, path, details))
+            # Results of property shapes are reported as they are, with the value nodes as their focus nodes.
+            for property_shape in property_shapes:
+                for value in values:
+                    results.extend(property_shape(index, value))
+            return results
+
+        self.shapes_in_progress.remove(shape)
+        self.compiled_shapes[shape] = compiled_shape
+        return compiled_shape
+
+    def compile_path(self, path: Node) -> Callable[[DataIndex, Node], set[Node]]:
+        if isinstance(path, URIRef):
+            return lambda index, focus_node: index.get((focus_node, path), set())
+
+        if (path, RDF.first, None) not in self.graph:
+            raise UnsupportedShapeError(f"Only predicate paths and sequence paths are supported, not {path}.")
+        predicates = list(Collection(self.graph, path))
+        if not all(isinstance(predicate, URIRef) for predicate in predicates):
+            raise UnsupportedShapeError(f"Only sequence paths of predicates are supported, not {path}.")
+
+        def sequence_path(index: DataIndex, focus_node: Node) -> set[Node]:
+            nodes = {focus_node}
+            for predicate in predicates:
+                nodes = {obj for node in nodes for obj in index.get((node, predicate), ())}
+            return nodes
+
+        return sequence_path
+
+    def compile_constraints(self, shape: Node, is_property_shape: bool) -> list[Callable]:
+        graph = self.graph
+        constraints: list[Callable] = []
+
+        min_count = graph.value(shape, sh["minCount"])
+        max_count = graph.value(shape, sh["maxCount"])
+        if (min_count is not None or max_count is not None) and not is_property_shape:
+            raise UnsupportedShapeError(f"The node shape {shape} uses a cardinality constraint.")
+        if min_count is not None:
+            constraints.append(min_count_constraint(int(min_count), graph, shape))
+        if max_count is not None:
+            constraints.append(max_count_constraint(int(max_count), graph, shape))
+
+        for pattern in graph.objects(shape, sh["pattern"]):
+            constraints.append(pattern_constraint(str(pattern), graph.value(shape, sh["flags"])))
+
+        value_set = graph.value(shape, sh["in"])
+        if value_set is not None:
+            constraints.append(in_constraint(list(Collection(graph, value_set))))
+
+        qualified_value_shape = graph.value(shape, sh["qualifiedValueShape"])
+        if qualified_value_shape is not None:
+            disjoint = graph.value(shape, sh["qualifiedValueShapesDisjoint"])
+            if disjoint is not None and disjoint.toPython() is True:
+                raise UnsupportedShapeError(f"The shape {shape} uses disjoint qualified value shapes.")
+            constraints.append(qualified_value_shape_constraint(
+                self.compile(qualified_value_shape), graph.value(shape, sh["qualifiedMinCount"]),
+                graph.value(shape, sh["qualifiedMaxCount"])))
+
+        for logical_predicate in ("or", "and", "xone"):
+            for shape_list in graph.objects(shape, sh[logical_predicate]):
+                members = [self.compile(member) for member in Collection(graph, shape_list)]
+                constraints.append(logical_constraint(logical_predicate, members, graph, shape_list))
+
+        node_shapes = list(graph.objects(shape, sh["node"]))
+        if node_shapes:
+            constraints.append(node_constraint([(node_shape, self.compile(node_shape)) for node_shape in node_shapes],
+                                               graph))
+
+        return constraints
+
+
+# Each constraint yields tuples of (constraint component, value node, details, generic message) for its violations.
+def min_count_constraint(min_count: int, graph: Graph, shape: Node) -> Callable:
+    def constraint(index: DataIndex, focus_node: Node, values: set[Node]):
+        if len(values) < min_count:
+            yield ("MinCountConstraintComponent", None, [],
+                   f"Less than {min_count} values on {stringify_focus_node(focus_node)}->"
+                   f"{stringify_node(graph, graph.value(shape, sh['path']))}")
+    return constraint
+
+
+def max_count_constraint(max_count: int, graph: Graph, shape: Node) -> Callable:
+    def constraint(index: DataIndex, focus_node: Node, values: set[Node]):
+        if len(values) > max_count:
+            yield ("MaxCountConstraintComponent", None, [],
+                   f"More than {max_count} values on {stringify_focus_node(focus_node)}->"
+                   f"{stringify_node(graph, graph.value(shape, sh['path']))}")
+    return constraint
+
+
+def pattern_constraint(pattern: str, flags: Node | None) -> Callable:
+    compiled_pattern = re.compile(pattern, sum(regex_flags.get(flag, 0) for flag in str(flags or "")))
+
+    def constraint(index: DataIndex, focus_node: Node, values: set[Node]):
+        for value in values:
+            if isinstance(value, BNode) or not compiled_pattern.search(str(value)):
+                yield "PatternConstraintComponent", value, [], f"Value does not match pattern '{pattern}'"
+    return constraint
+
+
+def in_constraint(allowed_values: list[Node]) -> Callable:
+    def constraint(index: DataIndex, focus_node: Node, values: set[Node]):
+        for value in values:
+            if value not in allowed_values:
+                yield "InConstraintComponent", value, [], f"Value {value} not in list {allowed_values}"
+    return constraint
+
+
+def qualified_value_shape_constraint(qualified_value_shape: CompiledShape, min_count: Node | None,
+                                     max_count: Node | None) -> Callable:
+    def constraint(index: DataIndex, focus_node: Node, values: set[Node]):
+        conforming_values = sum(1 for value in values if not qualified_value_shape(index, value))
+        if min_count is not None and conforming_values < int(min_count):
+            yield ("QualifiedMinCountConstraintComponent", None, [],
+                   f"Focus node does not conform to shape; less than {min_count} values conform")
+        if max_count is not None and conforming_values > int(max_count):
+            yield ("QualifiedMaxCountConstraintComponent", None, [],
+                   f"Focus node does not conform to shape; more than {max_count} values conform")
+    return constraint
+
+
+def logical_constraint(logical_predicate: str, members: list[CompiledShape], graph: Graph,
+                       shape_list: Node) -> Callable:
+    member_string = ", ".join(stringify_node(graph, member) for member in graph.items(shape_list))
+
+    def constraint(index: DataIndex, focus_node: Node, values: set[Node]):
+        for value in values:
+            conforming_members = sum(1 for member in members if not member(index, value))
+            if logical_predicate == "or" and conforming_members == 0:
+                yield ("OrConstraintComponent", value, [],
+                       f"Node {stringify_focus_node(value)} must conform to one or more shapes in {member_string}")
+            elif logical_predicate == "and" and conforming_members < len(members):
+                yield ("AndConstraintComponent", value, [],
+                       f"Node {stringify_focus_node(value)} must conform to all shapes in {member_string}")
+            elif logical_predicate == "xone" and conforming_members != 1:
+                yield ("XoneConstraintComponent", value, [],
+                       f"Node {stringify_focus_node(value)} must conform to exactly one shape in {member_string}")
+    return constraint
+
+
+def node_constraint(node_shapes: list[tuple[Node, CompiledShape]], graph: Graph) -> Callable:
+    if len(node_shapes) < 2:
+        generic_message = f"Value does not conform to Shape {stringify_node(graph, node_shapes[0][0])}."
+    else:
+        rules = "', '".join(stringify_node(graph, node_shape) for node_shape, _ in node_shapes)
+        generic_message = f"Value must conform to every Shape in ('{rules}')."
+    generic_message += " See details for more information."
+
+    def constraint(index: DataIndex, focus_node: Node, values: set[Node]):
+        for _, node_shape in node_shapes:
+            for value in values:
+                details = node_shape(index, value)
+                if details:
+                    yield "NodeConstraintComponent", value, details, generic_message
+    return constraint
+
+
+def is_implicit_class_target(shapes_graph: Graph, node: Node) -> bool:
+    return (node, RDF.type, RDFS.Class) in shapes_graph and \
+        ((node, RDF.type, sh["NodeShape"]) in shapes_graph or (node, RDF.type, sh["PropertyShape"]) in shapes_graph)
+
+
+def create_validation_report(shapes_graph: Graph, data_graph: Graph, results: list[ValidationResult],
+                             include_report_text: bool = True) -> tuple[bool, Graph, str | None]:
+    # Creates the same kind of report (conformance, results graph and text) as pyshacl does. Unlike with pyshacl, the
+    # text is only serialized if it is needed.
+    conforms = not results
+    report_graph = Graph(bind_namespaces="core")
+    for prefix, namespace in shapes_graph.namespace_manager.namespaces():
+        report_graph.bind(prefix, namespace)
+
+    report = BNode()
+    report_graph.add((report, RDF.type, sh["ValidationReport"]))
+    report_graph.add((report, sh["conforms"], Literal(conforms)))
+    for result in results:
+        report_graph.add((report, sh["result"], add_result_to_graph(report_graph, shapes_graph, result)))
+
+    if not include_report_text:
+        return conforms, report_graph, None
+
+    result_texts = sorted(stringify_result(shapes_graph, data_graph, result) for result in results)
+    report_text = f"Validation Report\nConforms: {conforms}\n"
+    if results:
+        report_text += f"Results ({len(results)}):\n" + "".join(result_texts)
+
+    return conforms, report_graph, report_text
+
+
+def add_result_to_graph(report_graph: Graph, shapes_graph: Graph, result: ValidationResult) -> BNode:
+    result_node = BNode()
+    report_graph.add((result_node, RDF.type, sh["ValidationResult"]))
+    report_graph.add((result_node, sh["sourceConstraintComponent"], sh[result.constraint_component]))
+    report_graph.add((result_node, sh["sourceShape"], result.source_shape))
+    report_graph.add((result_node, sh["resultSeverity"], result.severity))
+    report_graph.add((result_node, sh["focusNode"], result.focus_node))
+    if result.value_node is not None:
+        report_graph.add((result_node, sh["value"], result.value_node))
+    if result.result_path is not None:
+        report_graph.add((result_node, sh["resultPath"], copy_path(report_graph, shapes_graph, result.result_path)))
+    for message in result.messages:
+        report_graph.add((result_node, sh["resultMessage"], Literal(message)))
+    for detail in result.details:
+        report_graph.add((result_node, sh["detail"], add_result_to_graph(report_graph, shapes_graph, detail)))
+    return result_node
+
+
+def copy_path(report_graph: Graph, shapes_graph: Graph, path: Node) -> Node:
+    if isinstance(path, URIRef):
+        return path
+    path_copy = BNode()
+    Collection(report_graph, path_copy, list(shapes_graph.items(path)))
+    return path_copy
+
+
+def stringify_result(shapes_graph: Graph, data_graph: Graph, result: ValidationResult) -> str:
+    severity_description = "Constraint Violation" if result.severity == sh["Violation"] else "Validation Result"
+    # pyshacl names the constraint that produced the result, which covers both qualified count components.
+    constraint_name = constraint_names.get(result.constraint_component, result.constraint_component)
+    text = (f"{severity_description} in {constraint_name} ({sh[result.constraint_component]}):\n"
+            f"\tSeverity: {stringify_node(shapes_graph, result.severity)}\n"
+            f"\tSource Shape: {stringify_node(shapes_graph, result.source_shape)}\n"
+            f"\tFocus Node: {stringify_node(data_graph, result.focus_node)}\n")
+    if result.value_node is not None:
+        text += f"\tValue Node: {stringify_node(data_graph, result.value_node)}\n"
+    if result.result_path is not None:
+        text += f"\tResult Path: {stringify_node(shapes_graph, result.result_path)}\n"
+    for message in result.messages:
+        text += f"\tMessage: {message}\n"
+    if result.details:
+        text += "\tDetails:\n"
+        for detail in result.details:
+            text += indent(stringify_result(shapes_graph, data_graph, detail), "\t\t")
+    return text
+
+
+def stringify_node(graph: Graph, node: Node) -> str:
+    if isinstance(node, Literal):
+        lexical_form = str(node)
+        value = None if node.value is None else str(node.value)
+        text = f'"{lexical_form}" = {value}' if value is not None and value != lexical_form else f'"{lexical_form}"'
+        if node.language:
+            text += f", lang={node.language}"
+        if node.datatype:
+            text += f", datatype={stringify_node(graph, node.datatype)}"
+        return f"Literal({text})"
+    if isinstance(node, BNode):
+        if (node, RDF.first, None) in graph:
+            return f"( {' '.join(stringify_node(graph, item) for item in graph.items(node))} )"
+        properties = sorted(f"{stringify_node(graph, p)} {stringify_node(graph, o)}"
+                            for p, o in graph.predicate_objects(node))
+        return f"[ {' ; '.join(properties)} ]"
+    try:
+        return node.n3(namespace_manager=graph.namespace_manager)
+    except Exception:
+        return str(node)
+
+
+def stringify_focus_node(node: Node) -> str:
+    return node.n3() if isinstance(node, URIRef) else str(node)
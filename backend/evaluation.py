@@ -2,20 +2,43 @@
 
 import json
 import logging
-import pstats
-from subprocess import run
+import os
+import sys
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from subprocess import Popen, run
+from time import perf_counter, sleep
 
 import pandas as pd
 import numpy as np
-from github import UnknownObjectException, Github, Auth
+import requests
+from github import Github, Auth
 from matplotlib import pyplot as plt
 
-import validation_interface, verbalization_interface
+import bulk_evaluation
+import github_http_cache
+import instrumentation
+import result_cache
+import shacl_validator
 
 logging.basicConfig(level=logging.INFO)
 
 colors = {"primary": "#042940", "secondary": "#9FC131"}
 
+# Measures the import of the validator and the first validation in a fresh process, i.e., what a CLI call or a newly
+# started worker pays before the first result. The access token is read from stdin so that it is not part of the
+# process list.
+cold_start_script = """
+import json, sys, time
+time_start = time.perf_counter()
+import shacl_validator
+time_imported = time.perf_counter()
+shacl_validator.validate_repo(sys.stdin.readline().strip(), sys.argv[1], sys.argv[2])
+time_validated = time.perf_counter()
+print(json.dumps({"import": time_imported - time_start, "firstRequest": time_validated - time_imported}))
+"""
+
 
 def perform_evaluation() -> None:
     with open(".github_access_token") as file:
@@ -24,11 +47,14 @@ def perform_evaluation() -> None:
     repos_expected_to_be_fair = get_repos_expected_to_be_fair()
     trending_repos = get_trending_repo_set()
 
-    results_per_criterion_fair = get_validation_result_per_criterion(repos_expected_to_be_fair, github_access_token)
+    # The results are checkpointed per repository, so that an interrupted evaluation continues where it stopped.
+    results_per_criterion_fair = get_validation_result_per_criterion(
+        repos_expected_to_be_fair, github_access_token, "./data/evaluation/repos_expected_to_be_fair.jsonl")
     with open("./data/evaluation/repos_expected_to_be_fair.json", "w") as file:
         json.dump(results_per_criterion_fair, file)
 
-    results_per_criterion_trending = get_validation_result_per_criterion(trending_repos, github_access_token)
+    results_per_criterion_trending = get_validation_result_per_criterion(
+        trending_repos, github_access_token, "./data/evaluation/trending_repos.jsonl")
     with open("./data/evaluation/trending_repos.json", "w") as file:
         json.dump(results_per_criterion_trending, file)
 
@@ -37,6 +63,18 @@ def perform_evaluation() -> None:
     with open("./data/evaluation/runtime_benchmark_results.json", "w") as file:
         json.dump(runtime_benchmark_results, file)
 
+    engine_benchmark_results = execute_engine_benchmark(repos_expected_to_be_fair[0], github_access_token)
+    with open("./data/evaluation/engine_benchmark_results.json", "w") as file:
+        json.dump(engine_benchmark_results, file)
+
+    cold_start_benchmark_results = execute_cold_start_benchmark(repos_expected_to_be_fair[0], github_access_token)
+    with open("./data/evaluation/cold_start_benchmark_results.json", "w") as file:
+        json.dump(cold_start_benchmark_results, file)
+
+    load_benchmark_results = execute_load_benchmark(repos_expected_to_be_fair, github_access_token)
+    with open("./data/evaluation/load_benchmark_results.json", "w") as file:
+        json.dump(load_benchmark_results, file)
+
 
 def get_repos_expected_to_be_fair() -> list[str]:
     return ["oeg-upm/oeg-software-graph", "zenodraft/zenodraft",
@@ -309,44 +347,23 @@ def get_trending_repo_set() -> list[str]:
     return list(set(repo_list))
 
 
-def get_validation_result_per_criterion(repos: list, github_access_token: str) -> dict[str, dict[str, bool]]:
-    results_per_criterion: dict[str, dict[str, bool]] = {}
+def get_validation_result_per_criterion(repos: list, github_access_token: str, checkpoint_path: str,
+                                        pool_size: int = 8) -> dict[str, dict[str, bool]]:
+    bulk_evaluation.evaluate_repos(repos, checkpoint_path, github_access_token, "FAIRSoftware", pool_size)
 
-    for repo_name in repos:
-        try:
-            _, _, report = validation_interface.run_validator(github_access_token, repo_name, "FAIRSoftware")
-        except UnknownObjectException as e:
-            logging.exception(f"Could not validate {repo_name} against the FAIRSoftware project type. {e}")
-            continue
-        verbalized_explanation = verbalization_interface.run_verbalizer(report)
-        result_per_criterion = process_verbalized_explanation(verbalized_explanation)
-        results_per_criterion[repo_name] = result_per_criterion
+    # Repositories that could not be validated (e.g., because they were deleted) are skipped.
+    results_per_criterion: dict[str, dict[str, bool]] = {}
+    repo_set = set(repos)
+    for result in bulk_evaluation.read_checkpoint(checkpoint_path):
+        if result["repoName"] in repo_set and result["repoType"] == "FAIRSoftware" and "results" in result:
+            results_per_criterion[result["repoName"]] = process_results(result["results"])
 
     return results_per_criterion
 
 
-def process_verbalized_explanation(verbalized_explanation: list[str]) -> dict[str, bool]:
-    possible_messages_with_mapping: dict[str, str] = {
-        "The repository has no description and no README file.": "DescriptionOrReadme",
-        "No persistent ID was found.": "PersistentId",
-        "The repository is private.": "PublicRepository",
-        "There are no releases or Semantic Versioning is violated.": "SemanticVersioning",
-        "There is no README file or it does not contain usage instructions for the software.": "UsageNotesInReadme",
-        "No license information was found.": "ExactlyOneLicense",
-        "No citation information was found.": "ExplicitCitation",
-        "The repository has no description and no topics assigned.": "DescriptionOrAtLeastOneTopic",
-        "There is no README file or it does not contain installation instructions.": "InstallationInstructionsInReadme",
-        "No information on the requirements of the software was found.": "SoftwareRequirements"
-    }
-
-    result_per_criterion: dict[str, bool] = {}
-    for possible_message, mapping in possible_messages_with_mapping.items():
-        if any(actual_message.startswith(possible_message) for actual_message in verbalized_explanation):
-            result_per_criterion[mapping] = False
-        else:
-            result_per_criterion[mapping] = True
-
-    return result_per_criterion
+def process_results(results: dict[str, bool], repo_type: str = "FAIRSoftware") -> dict[str, bool]:
+    # The criteria are derived from the shapes, like those of the bulk evaluation.
+    return {criterion: results[criterion] for criterion in bulk_evaluation.get_criteria(repo_type)}
 
 
 def execute_runtime_benchmark(repos_expected_to_be_fair: list, trending_repos: list, github_access_token: str) -> dict[
@@ -357,7 +374,8 @@ def execute_runtime_benchmark(repos_expected_to_be_fair: list, trending_repos: l
     runtime_benchmark_results = dict()
 
     runtime_per_repo = []
-    step_durations = [0, 0, 0]
+    # The repository representation comprises the fetch plan, the requests to GitHub and building the data graph.
+    step_durations = [0, 0]
 
     for repo_name in trending_repos + repos_expected_to_be_fair:
         # skip repo for evaluation if relevant data cannot be fetched
@@ -368,33 +386,22 @@ def execute_runtime_benchmark(repos_expected_to_be_fair: list, trending_repos: l
         except:
             continue
 
-        # perform fairness assessment with profiler
         file_name = f"{repo_name.split('/')[1]}"
 
         logging.info(f"{repo_name} has in total {repo_size} releases and branches.")
 
-        cmd = ["./shacl_validator.py", "--github_access_token", github_access_token, "--repo_name", repo_name,
-               "--expected_type", "FAIRSoftware"]
+        # The repository is fetched again instead of being taken from the snapshot or the HTTP cache of the FAIRness
+        # assessment, so that the runtimes are those of a cold validation.
+        shacl_validator.repository_snapshot.clear_snapshots()
+        with without_caches(), instrumentation.trace() as benchmark_trace:
+            with instrumentation.span("request"):
+                shacl_validator.validate_repo_against_specs(github_access_token, repo_name, "FAIRSoftware")
 
-        run(["python3", "-m", "cProfile", "-o", f"data/benchmarks/{file_name}", "-s", "cumulative"] + cmd)
-
-        # process stats of fairness assessment runtime
-        stats = pstats.Stats(f"data/benchmarks/{file_name}")
-
-        for k, v in stats.stats.items():
-            _, _, function = k
-
-            if function == "validate_repo_against_specs":
-                runtime = v[3]
-
-            elif function == "create_project_type_representation":
-                step_durations[0] += v[3]
-
-            elif function == "create_repository_representation":
-                step_durations[1] += v[3]
-
-            elif function == "run_validation":
-                step_durations[2] += v[3]
+        durations = benchmark_trace.get_durations()
+        runtime = durations["request"]
+        step_durations[0] += sum(duration for name, duration in durations.items()
+                                 if name in ("fetch_plan", "fetch.Repository", "fetch", "graph_build"))
+        step_durations[1] += durations.get("validation", 0)
 
         runtime_per_repo.append(runtime)
         origin = "trending" if repo_name in trending_repos else "expected"
@@ -404,11 +411,128 @@ def execute_runtime_benchmark(repos_expected_to_be_fair: list, trending_repos: l
     step_durations = ["{:.2f}%".format(duration / total_runtime * 100) for duration in step_durations]
 
     logging.info(
-        f"Shapes graph composition/repository representation generation/validation account for {'/'.join(step_durations)} of the total runtime.")
+        f"Repository representation generation/validation account for {'/'.join(step_durations)} of the total runtime.")
+    # The shapes graph is composed once per process instead of once per validation.
+    logging.info(f"Composing the shapes graph took {instrumentation.get_histograms()['shapes_load']['sum']:.3f}s.")
 
     return runtime_benchmark_results
 
 
+@contextmanager
+def without_caches() -> Iterator[None]:
+    # Disables the HTTP cache (which may already be installed) and the result cache.
+    http_cache_enabled, http_cache = github_http_cache.cache_enabled, github_http_cache.CachingHTTPSConnection.cache
+    result_cache_enabled = result_cache.cache_enabled
+    github_http_cache.cache_enabled, github_http_cache.CachingHTTPSConnection.cache = False, None
+    result_cache.cache_enabled = False
+    try:
+        yield
+    finally:
+        github_http_cache.cache_enabled, github_http_cache.CachingHTTPSConnection.cache = http_cache_enabled, http_cache
+        result_cache.cache_enabled = result_cache_enabled
+
+
+def execute_engine_benchmark(repo_name: str, github_access_token: str,
+                             runs: int = 20) -> dict[str, dict[str, float]]:
+    # Validates the same data graph of each project type with pyshacl and with the compiled shapes and compares the
+    # median runtimes. Both engines must produce the same report.
+    repo_types = list(shacl_validator.get_project_type_specifications())
+    snapshot = shacl_validator.get_repository_snapshot(github_access_token, repo_name, repo_types)
+    validation_engine = shacl_validator.validation_engine
+    engine_benchmark_results = {}
+
+    try:
+        for repo_type in repo_types:
+            data_graph = snapshot.create_data_graph(shacl_validator.types[repo_type])
+            runtimes, reports = {}, {}
+            for engine in ("pyshacl", "compiled"):
+                shacl_validator.validation_engine = engine
+                durations = []
+                for _ in range(runs):
+                    time_start = perf_counter()
+                    reports[engine] = shacl_validator.run_validation(data_graph, repo_type)[2]
+                    durations.append(perf_counter() - time_start)
+                runtimes[engine] = float(np.median(durations))
+
+            if reports["pyshacl"] != reports["compiled"]:
+                logging.warning(f"The reports of both engines differ for the {repo_type} project type.")
+            engine_benchmark_results[repo_type] = runtimes
+            logging.info(f"Validating {repo_name} against {repo_type} took {runtimes['pyshacl']:.4f}s with pyshacl and "
+                         f"{runtimes['compiled']:.4f}s with the compiled shapes "
+                         f"({runtimes['pyshacl'] / runtimes['compiled']:.1f}x faster, median of {runs} runs).")
+    finally:
+        shacl_validator.validation_engine = validation_engine
+
+    return engine_benchmark_results
+
+
+def execute_cold_start_benchmark(repo_name: str, github_access_token: str, expected_type: str = "FAIRSoftware",
+                                 runs: int = 5) -> dict[str, list[float]]:
+    cold_start_benchmark_results: dict[str, list[float]] = {"import": [], "firstRequest": []}
+
+    for _ in range(runs):
+        process = run([sys.executable, "-c", cold_start_script, repo_name, expected_type], input=github_access_token,
+                      capture_output=True, text=True, check=True)
+        durations = json.loads(process.stdout.strip().splitlines()[-1])
+        for measure, duration in durations.items():
+            cold_start_benchmark_results[measure].append(duration)
+
+    logging.info(f"Import of the validator took {np.median(cold_start_benchmark_results['import']):.3f}s and the first "
+                 f"validation {np.median(cold_start_benchmark_results['firstRequest']):.3f}s (median of {runs} runs).")
+
+    return cold_start_benchmark_results
+
+
+def execute_load_benchmark(repo_names: list[str], github_access_token: str, expected_type: str = "FAIRSoftware",
+                           worker_counts: tuple[int, ...] = (1, 2, 4), number_of_requests: int = 48,
+                           concurrency: int = 16, port: int = 5050) -> dict[int, dict[str, float]]:
+    # Sends concurrent validation requests to the production server (see gunicorn.conf.py) with an increasing number
+    # of workers. Results and snapshots are not reused, so that each request fetches and validates the repository.
+    url = f"http://127.0.0.1:{port}"
+    payloads = [{"accessToken": github_access_token, "repoName": repo_names[index % len(repo_names)],
+                 "repoType": expected_type} for index in range(number_of_requests)]
+    load_benchmark_results = {}
+
+    for number_of_workers in worker_counts:
+        environment = {**os.environ, "HOST": "127.0.0.1", "PORT": str(port), "QUARE_WORKERS": str(number_of_workers),
+                       "QUARE_RESULT_CACHE": "false", "QUARE_SNAPSHOT_TTL": "0"}
+        server = Popen([sys.executable, "-m", "gunicorn", "--config", "gunicorn.conf.py", "api:app"], env=environment)
+        try:
+            wait_for_server(url)
+            time_start = perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                latencies = list(executor.map(lambda payload: send_validation_request(url, payload), payloads))
+            duration = perf_counter() - time_start
+        finally:
+            server.terminate()
+            server.wait()
+
+        load_benchmark_results[number_of_workers] = {"throughput": number_of_requests / duration,
+                                                     "medianLatency": float(np.median(latencies))}
+        logging.info(f"{number_of_workers} workers validated {number_of_requests / duration:.2f} repositories per "
+                     f"second (median latency {np.median(latencies):.3f}s).")
+
+    return load_benchmark_results
+
+
+def wait_for_server(url: str, timeout: float = 60) -> None:
+    deadline = perf_counter() + timeout
+    while True:
+        try:
+            requests.get(url, timeout=1).raise_for_status()
+            return
+        except requests.RequestException:
+            if perf_counter() > deadline:
+                raise
+            sleep(0.2)
+
+
+def send_validation_request(url: str, payload: dict) -> float:
+    time_start = perf_counter()
+    requests.post(f"{url}/validate", json=payload, timeout=600).raise_for_status()
+    return perf_counter() - time_start
+
+
 def visualize_results() -> None:
     def get_results_in_percent(results_per_criterion: dict[str, dict[str, bool]]) -> dict[str, float]:
         first_inner_dict = list(results_per_criterion.values())[0]
@@ -0,0 +1,213 @@
+from dataclasses import dataclass, field
+
+from rdflib import Graph, Namespace
+from rdflib.namespace import RDF, RDFS
+from rdflib.term import BNode, Node
+
+sh = Namespace("http://www.w3.org/ns/shacl#")
+props = Namespace("https://example.org/repo/props/")
+sd = Namespace("https://w3id.org/okn/o/sd#")
+
+# GitHub resource (and optional processing of it) from which each predicate of the repository representation is
+# produced. Predicates that are produced together with another one (e.g., sd:name of branches and licenses) are omitted.
+resources_by_predicate: dict[Node, tuple[str, str | None]] = {
+    props["isPrivate"]: ("Visibility", None),
+    sd["keywords"]: ("Topics", None),
+    sd["description"]: ("Description", None),
+    sd["website"]: ("Homepage", None),
+    sd["programmingLanguage"]: ("MainLanguage", None),
+    sd["license"]: ("License", None),
+    props["hasIssue"]: ("Issues", None),
+    props["hasState"]: ("Issues", None),
+    sd["hasVersion"]: ("Releases", None),
+    sd["hasVersionId"]: ("Releases", None),
+    props["versionsHaveValidIncrement"]: ("Releases", "IncrementCheck"),
+    props["hasBranch"]: ("Branches", None),
+    props["isDefaultBranch"]: ("Branches", None),
+    props["hasFileInRootDirectory"]: ("Branches", "RootDirFilesOfDefaultBranch"),
+    sd["readme"]: ("Readme", None),
+    props["containsDoi"]: ("Readme", "CheckForDoi"),
+    sd["hasInstallationInstructions"]: ("Readme", "Sections"),
+    sd["hasUsageNotes"]: ("Readme", "Sections"),
+    sd["hasPurpose"]: ("Readme", "Sections"),
+    sd["softwareRequirements"]: ("Readme", "Sections"),
+    sd["citation"]: ("Readme", "Sections")
+}
+
+# Order in which the resources are fetched and in which the options of a resource are combined in the name of the
+# requirement (e.g., "ReadmeIncludingSectionsAndCheckForDoi")
+resource_order = ["Visibility", "Topics", "Description", "Homepage", "MainLanguage", "License", "Issues", "Releases",
+                  "Branches", "Readme"]
+option_order = ["Sections", "CheckForDoi", "IncrementCheck", "RootDirFilesOfDefaultBranch"]
+
+# Predicates of the repository representation whose values are taken from paginated lists of the GitHub API
+paginated_predicates: dict[Node, str] = {
+    props["hasBranch"]: "branches",
+    props["hasIssue"]: "issues",
+    sd["hasVersion"]: "releases"
+}
+
+# Predicates whose value is computed from the complete list, so that the list must not be truncated
+aggregate_predicates: dict[Node, str] = {
+    props["versionsHaveValidIncrement"]: "releases"
+}
+
+# Paginated list from which the items of each resource are taken
+collections_by_resource: dict[str, str] = {
+    "Branches": "branches",
+    "Issues": "issues",
+    "Releases": "releases"
+}
+
+# Predicates that have the same value for all items of a list (e.g., only open issues are fetched)
+constant_predicates = {props["hasState"]}
+
+# Predicates of shapes that do not affect the validation result
+descriptive_predicates = {RDF.type, RDFS.label, RDFS.comment, sh["path"], sh["message"], sh["description"],
+                          sh["name"], sh["order"], sh["group"], sh["severity"]}
+
+
+@dataclass
+class FetchPlan:
+    # Resources of the repository representation with the options they are fetched with, and the number of items of
+    # each paginated list that are needed (lists without a limit are fetched completely)
+    options_by_resource: dict[str, set[str]]
+    limits: dict[str, int] = field(default_factory=dict)
+    # Sections of the README file that are needed (by the local name of their predicate), or None if the README file
+    # has to be read completely
+    readme_sections: set[str] | None = field(default_factory=set)
+
+    @property
+    def requirements(self) -> list[str]:
+        # Names of the requirements, i.e., of the functions that fetch a resource with its options
+        requirements = []
+        for resource in resource_order:
+            if resource in self.options_by_resource:
+                options = [option for option in option_order if option in self.options_by_resource[resource]]
+                requirements.append(f"{resource}Including{'And'.join(options)}" if options else resource)
+        return requirements
+
+    def covers(self, other: "FetchPlan") -> bool:
+        # Whether a repository representation fetched with this plan contains everything the other plan needs
+        for resource, options in other.options_by_resource.items():
+            if resource not in self.options_by_resource or not options <= self.options_by_resource[resource]:
+                return False
+            collection = collections_by_resource.get(resource)
+            if collection in self.limits and self.limits[collection] < other.limits.get(collection, float("inf")):
+                return False
+        if self.readme_sections is not None and (other.readme_sections is None
+                                                 or not other.readme_sections <= self.readme_sections):
+            return False
+        return True
+
+
+def get_resource(requirement: str) -> str:
+    # E.g., "Releases" for "ReleasesIncludingIncrementCheck"
+    return next(resource for resource in resource_order
+                if requirement == resource or requirement.startswith(f"{resource}Including"))
+
+
+def create_fetch_plan(shapes_graph: Graph) -> FetchPlan:
+    return FetchPlan(get_options_by_resource(shapes_graph), get_fetch_limits(shapes_graph),
+                     get_readme_sections(shapes_graph))
+
+
+def merge_fetch_plans(fetch_plans: list[FetchPlan]) -> FetchPlan:
+    # The merged plan fetches each resource once with the options of all plans. A list is only limited if all plans
+    # that need it are limited.
+    options_by_resource: dict[str, set[str]] = {}
+    limits: dict[str, int | None] = {}
+    readme_sections: set[str] | None = set()
+    for fetch_plan in fetch_plans:
+        if fetch_plan.readme_sections is None or readme_sections is None:
+            readme_sections = None
+        else:
+            readme_sections |= fetch_plan.readme_sections
+        for resource, options in fetch_plan.options_by_resource.items():
+            options_by_resource.setdefault(resource, set()).update(options)
+            collection = collections_by_resource.get(resource)
+            if collection:
+                limit = fetch_plan.limits.get(collection)
+                if limit is None or limits.get(collection, 0) is None:
+                    limits[collection] = None
+                else:
+                    limits[collection] = max(limits.get(collection, 0), limit)
+
+    return FetchPlan(options_by_resource,
+                     {collection: limit for collection, limit in limits.items() if limit is not None}, readme_sections)
+
+
+def get_options_by_resource(shapes_graph: Graph) -> dict[str, set[str]]:
+    # Each resource is fetched once with all the options needed by any shape, so that, for example, a single README
+    # download serves the check for its existence, its sections and DOIs.
+    options_by_resource: dict[str, set[str]] = {}
+    for path in shapes_graph.objects(predicate=sh["path"]):
+        for predicate in get_path_predicates(shapes_graph, path):
+            if predicate in resources_by_predicate:
+                resource, option = resources_by_predicate[predicate]
+                options_by_resource.setdefault(resource, set())
+                if option:
+                    options_by_resource[resource].add(option)
+    return options_by_resource
+
+
+def get_path_predicates(shapes_graph: Graph, path: Node) -> list[Node]:
+    # Sequence paths are RDF lists of predicates.
+    return list(shapes_graph.items(path)) if isinstance(path, BNode) else [path]
+
+
+def get_fetch_limits(shapes_graph: Graph) -> dict[str, int]:
+    # Derives from the shapes how many items of each paginated list are needed to get the same validation result as
+    # with the complete list. Lists that are restricted by other than cardinality constraints are not included.
+    limits: dict[str, int | None] = {}
+
+    for shape, path in shapes_graph.subject_objects(predicate=sh["path"]):
+        first_predicate = path if not isinstance(path, BNode) else shapes_graph.value(subject=path, predicate=RDF.first)
+        if first_predicate in paginated_predicates:
+            collection = paginated_predicates[first_predicate]
+            limit = get_limit_for_shape(shapes_graph, shape, path)
+            if limit is None or limits.get(collection, 0) is None:
+                limits[collection] = None
+            else:
+                limits[collection] = max(limits.get(collection, 0), limit)
+        elif first_predicate in aggregate_predicates:
+            limits[aggregate_predicates[first_predicate]] = None
+
+    return {collection: limit for collection, limit in limits.items() if limit is not None}
+
+
+def get_readme_sections(shapes_graph: Graph) -> set[str] | None:
+    # The README file is only read until each section the shapes check for has been found, which is sufficient if
+    # they only require at least one section (or at most none). Otherwise, all sections are needed.
+    sections = set()
+    for shape, path in shapes_graph.subject_objects(predicate=sh["path"]):
+        for predicate in get_path_predicates(shapes_graph, path):
+            if resources_by_predicate.get(predicate) != ("Readme", "Sections"):
+                continue
+            limit = get_limit_for_shape(shapes_graph, shape, path)
+            if limit is None or limit > 1:
+                return None
+            sections.add(predicate.removeprefix(str(sd)))
+    return sections
+
+
+def get_limit_for_shape(shapes_graph: Graph, shape: Node, path: Node) -> int | None:
+    if isinstance(path, BNode):
+        # The value nodes of a path to a constant predicate contain at most one value, regardless of the number of
+        # items, so one item is sufficient.
+        path_predicates = list(shapes_graph.items(path))
+        if len(path_predicates) == 2 and path_predicates[1] in constant_predicates:
+            return 1
+        return None
+
+    # Only the number of items matters if there are no other constraints than sh:minCount and sh:maxCount. To detect
+    # a violation of sh:maxCount, one more item than allowed is needed.
+    limit = 0
+    for predicate, value in shapes_graph.predicate_objects(subject=shape):
+        if predicate == sh["minCount"]:
+            limit = max(limit, int(value))
+        elif predicate == sh["maxCount"]:
+            limit = max(limit, int(value) + 1)
+        elif predicate not in descriptive_predicates:
+            return None
+    return limit
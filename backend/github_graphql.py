@@ -0,0 +1,203 @@
+import re
+from types import SimpleNamespace
+
+from github import Auth, Github, GithubException, UnknownObjectException
+
+page_size = 100
+
+# Parts of the GraphQL query that are needed to fulfill a requirement of the repository representation
+parts_by_requirement: dict[str, set[str]] = {
+    "Branches": {"branches"},
+    "BranchesIncludingRootDirFilesOfDefaultBranch": {"branches", "rootEntries"},
+    "Description": {"description"},
+    "Homepage": {"homepage"},
+    "Issues": {"issues", "pullRequests"},
+    "License": {"license", "rootEntries"},
+    "MainLanguage": {"language"},
+    "Readme": {"rootEntries"},
+    "ReadmeIncludingSections": {"rootEntries", "readmeText"},
+    "ReadmeIncludingCheckForDoi": {"rootEntries", "readmeText"},
+    "ReadmeIncludingSectionsAndCheckForDoi": {"rootEntries", "readmeText"},
+    "Releases": {"releases"},
+    "ReleasesIncludingIncrementCheck": {"releases"},
+    "Topics": {"topics"},
+    "Visibility": {"visibility"}
+}
+
+scalar_fields: dict[str, str] = {
+    "description": "description",
+    "homepage": "homepageUrl",
+    "language": "primaryLanguage { name }",
+    "license": "licenseInfo { name url }",
+    "rootEntries": 'rootTree: object(expression: "HEAD:") { ... on Tree { entries { name type } } }',
+    "visibility": "isPrivate"
+}
+
+# Paginated connections as (field, arguments, fields of each node, list of the repository representation)
+connections: dict[str, tuple[str, str, str, str]] = {
+    "branches": ("refs", 'refPrefix: "refs/heads/", ', "name", "branches"),
+    "issues": ("issues", "states: OPEN, ", "url", "issues"),
+    "pullRequests": ("pullRequests", "states: OPEN, ", "url", "issues"),
+    "releases": ("releases", "", "url tagName", "releases"),
+    "topics": ("repositoryTopics", "", "topic { name }", "topics")
+}
+
+# Common README file names that are requested together with the first query to save a second round trip
+readme_candidates = ("README.md", "readme.md", "Readme.md", "README.rst", "README", "README.txt", "README.markdown")
+readme_pattern = re.compile(r"^readme(\..+)?$", re.IGNORECASE)
+license_pattern = re.compile(r"^(licen[cs]e|copying)([.-].+)?$", re.IGNORECASE)
+
+
+class TotalCountList(list):
+    # Mimics the totalCount attribute of github.PaginatedList.PaginatedList
+    @property
+    def totalCount(self) -> int:
+        return len(self)
+
+
+class GraphQLRepository:
+    # Mimics the subset of github.Repository.Repository that is used by the include_* functions of the
+    # shacl_validator, so that the same triples are created regardless of the API that was used.
+    def __init__(self, data: dict, readme_text: str | None = None) -> None:
+        self.data = data
+        self.html_url: str = data["url"]
+        self.private: bool | None = data.get("isPrivate")
+        self.description: str | None = data.get("description")
+        self.homepage: str | None = data.get("homepageUrl")
+        self.language: str | None = (data.get("primaryLanguage") or {}).get("name")
+        self.default_branch: str | None = (data.get("defaultBranchRef") or {}).get("name")
+        self.readme_text = readme_text
+
+    def get_topics(self) -> list[str]:
+        return [node["topic"]["name"] for node in self.data.get("topics", [])]
+
+    def get_releases(self) -> TotalCountList:
+        return TotalCountList(SimpleNamespace(html_url=node["url"], tag_name=node["tagName"])
+                              for node in self.data.get("releases", []))
+
+    def get_branches(self) -> TotalCountList:
+        return TotalCountList(SimpleNamespace(name=node["name"]) for node in self.data.get("branches", []))
+
+    def get_git_tree(self, sha: str) -> SimpleNamespace:
+        if sha != self.default_branch or not self.data.get("rootTree"):
+            raise GithubException(404, message=f"The tree of {sha} was not part of the GraphQL query.")
+        return SimpleNamespace(tree=[SimpleNamespace(path=entry["name"], type=entry["type"])
+                                     for entry in self.data["rootTree"]["entries"]])
+
+    def get_issues(self, state: str = "open") -> TotalCountList:
+        # As with the REST API, pull requests are considered issues here.
+        nodes = self.data.get("issues", []) + self.data.get("pullRequests", [])
+        return TotalCountList(SimpleNamespace(html_url=node["url"], state=state) for node in nodes)
+
+    def get_license(self) -> SimpleNamespace:
+        license_info = self.data.get("licenseInfo")
+        if not license_info:
+            raise UnknownObjectException(404, message="The repository has no license.")
+
+        license_file_name = find_root_file(self.data, license_pattern)
+        html_url = self.get_blob_url(license_file_name) if license_file_name else license_info["url"]
+        return SimpleNamespace(html_url=html_url, license=SimpleNamespace(name=license_info["name"]))
+
+    def get_readme(self) -> SimpleNamespace:
+        readme_file_name = find_root_file(self.data, readme_pattern)
+        if not readme_file_name:
+            raise UnknownObjectException(404, message="The repository has no README file in its root directory.")
+
+        decoded_content = (self.readme_text or "").encode()
+        return SimpleNamespace(html_url=self.get_blob_url(readme_file_name), decoded_content=decoded_content)
+
+    def get_blob_url(self, path: str) -> str:
+        return f"{self.html_url}/blob/{self.default_branch}/{path}"
+
+
+def get_repository(access_token: str, repo_name: str, requirements_list: list[str],
+                   fetch_limits: dict[str, int] | None = None) -> GraphQLRepository:
+    requester = Github(auth=Auth.Token(access_token)).requester
+    owner, _, name = repo_name.partition("/")
+    fetch_limits = fetch_limits or {}
+
+    parts: set[str] = set()
+    for requirement in requirements_list:
+        parts |= parts_by_requirement.get(requirement, set())
+
+    data = query_repository(requester, owner, name, build_query(parts, fetch_limits))
+    repository_data = {key: value for key, value in data.items() if not key.startswith("readme_")}
+
+    # Follow the cursors of all connections that did not fit on the first page, unless enough nodes were fetched.
+    for part in parts & connections.keys():
+        connection = repository_data[part]
+        nodes = connection["nodes"]
+        limit = fetch_limits.get(connections[part][3])
+        while connection["pageInfo"]["hasNextPage"] and (limit is None or len(nodes) < limit):
+            follow_up_query = build_connection_query(part, fetch_limits, after_variable=True)
+            connection = query_repository(requester, owner, name, follow_up_query,
+                                          cursor=connection["pageInfo"]["endCursor"])[part]
+            nodes.extend(connection["nodes"])
+        repository_data[part] = nodes[:limit]
+
+    readme_text = None
+    if "readmeText" in parts:
+        readme_text = get_readme_text(requester, owner, name, data)
+
+    return GraphQLRepository(repository_data, readme_text)
+
+
+def build_query(parts: set[str], fetch_limits: dict[str, int] | None = None) -> str:
+    selections = ["url", "defaultBranchRef { name }"]
+    selections += [scalar_fields[part] for part in sorted(parts & scalar_fields.keys())]
+    selections += [build_connection_query(part, fetch_limits) for part in sorted(parts & connections.keys())]
+
+    if "readmeText" in parts:
+        for index, file_name in enumerate(readme_candidates):
+            selections.append(f'readme_{index}: object(expression: "HEAD:{file_name}") {{ ... on Blob {{ text }} }}')
+
+    return "\n".join(selections)
+
+
+def build_connection_query(part: str, fetch_limits: dict[str, int] | None = None, after_variable: bool = False) -> str:
+    field, arguments, node_fields, collection = connections[part]
+    first = min(page_size, (fetch_limits or {}).get(collection, page_size))
+    after = ", after: $cursor" if after_variable else ""
+    return (f"{part}: {field}({arguments}first: {first}{after}) "
+            f"{{ nodes {{ {node_fields} }} pageInfo {{ hasNextPage endCursor }} }}")
+
+
+def query_repository(requester, owner: str, name: str, selection: str, cursor: str | None = None) -> dict:
+    variable_definitions = "$owner: String!, $name: String!" + (", $cursor: String!" if cursor else "")
+    query = f"query({variable_definitions}) {{ repository(owner: $owner, name: $name) {{ {selection} }} }}"
+    variables = {"owner": owner, "name": name}
+    if cursor:
+        variables["cursor"] = cursor
+
+    _, response = requester.graphql_query(query, variables)
+    repository_data = response["data"]["repository"]
+    if repository_data is None:
+        raise UnknownObjectException(404, message=f"Repository {owner}/{name} not found.")
+    return repository_data
+
+
+def get_readme_text(requester, owner: str, name: str, data: dict) -> str | None:
+    readme_file_name = find_root_file(data, readme_pattern)
+    if not readme_file_name:
+        return None
+
+    if readme_file_name in readme_candidates:
+        blob = data.get(f"readme_{readme_candidates.index(readme_file_name)}")
+        if blob:
+            return blob["text"]
+
+    # The README file has an uncommon name, so it is requested separately.
+    selection = f'readme: object(expression: "HEAD:{readme_file_name}") {{ ... on Blob {{ text }} }}'
+    blob = query_repository(requester, owner, name, selection)["readme"]
+    return blob["text"] if blob else None
+
+
+def find_root_file(data: dict, pattern: re.Pattern) -> str | None:
+    root_tree = data.get("rootTree")
+    if not root_tree:
+        return None
+
+    for entry in root_tree["entries"]:
+        if entry["type"] == "blob" and pattern.match(entry["name"]):
+            return entry["name"]
+    return None
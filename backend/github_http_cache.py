@@ -0,0 +1,256 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from collections.abc import ItemsView, Iterator
+from typing import Any
+
+import requests
+import requests.adapters
+from github.Requester import HTTPRequestsConnectionClass, HTTPSRequestsConnectionClass, Requester, RequestsResponse
+from urllib3 import Retry
+
+import metrics
+import token_scheduler
+import validation_budget
+
+logger = logging.getLogger(__name__)
+
+cache_enabled = os.environ.get("QUARE_HTTP_CACHE", "true").lower() in ("1", "true", "yes")
+cache_path = os.environ.get("QUARE_HTTP_CACHE_PATH", "./data/cache/http_cache.sqlite")
+cache_max_bytes = int(os.environ.get("QUARE_HTTP_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+# Whether responses are served without a request as long as their max-age has not expired. By default, every cached
+# response is revalidated, so that changes to a repository are seen right away.
+trust_max_age = os.environ.get("QUARE_HTTP_CACHE_TRUST_MAX_AGE", "false").lower() in ("1", "true", "yes")
+
+# Number of responses served from the cache without a request ("hit", only with trust_max_age), after a 304 response
+# ("revalidated") and after a full download ("miss")
+cache_metrics: Counter = Counter()
+metrics_lock = threading.Lock()
+install_lock = threading.Lock()
+
+max_age_pattern = re.compile(r"max-age=(\d+)")
+
+
+class CachedResponse:
+    # Mimics github.Requester.RequestsResponse for responses that are (partly) taken from the cache.
+    def __init__(self, status: int, headers: dict[str, str], body: str) -> None:
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def getheaders(self) -> ItemsView[str, str]:
+        return self.headers.items()
+
+    def read(self) -> str:
+        return self.body
+
+    def iter_content(self, chunk_size: int | None = 1) -> Iterator:
+        yield self.body.encode()
+
+    def raise_for_status(self) -> None:
+        pass
+
+
+class ResponseCache:
+    # Persistent, size-bounded LRU cache of GET responses including their ETag and Last-Modified validators
+    def __init__(self, path: str, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY, etag TEXT, last_modified TEXT, headers TEXT, body TEXT, size INTEGER,
+            expires_at REAL, last_access REAL)""")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS responses_last_access ON responses (last_access)")
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT etag, last_modified, headers, body, expires_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            self.connection.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+
+        etag, last_modified, headers, body, expires_at = row
+        return {"etag": etag, "last_modified": last_modified, "headers": json.loads(headers), "body": body,
+                "expires_at": expires_at}
+
+    def put(self, key: str, headers: dict[str, str], body: str) -> None:
+        size = len(body.encode()) + len(key)
+        if size > self.max_bytes:
+            return
+
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, headers.get("etag"), headers.get("last-modified"), json.dumps(headers), body, size,
+                 time.time() + get_max_age(headers), time.time()))
+            self.evict()
+
+    def refresh(self, key: str, headers: dict[str, str]) -> None:
+        with self.lock:
+            self.connection.execute("UPDATE responses SET headers = ?, expires_at = ? WHERE key = ?",
+                                    (json.dumps(headers), time.time() + get_max_age(headers), key))
+
+    def evict(self) -> None:
+        # Removes the least recently used responses until the cache fits into its size limit again.
+        total_size = self.connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total_size <= self.max_bytes:
+            return
+
+        freed = 0
+        evicted_keys = []
+        for key, size in self.connection.execute("SELECT key, size FROM responses ORDER BY last_access"):
+            evicted_keys.append((key,))
+            freed += size
+            if total_size - freed <= self.max_bytes:
+                break
+        self.connection.executemany("DELETE FROM responses WHERE key = ?", evicted_keys)
+
+
+class CachingHTTPSConnection(HTTPSRequestsConnectionClass):
+    # Sends conditional requests for GET requests with a cached response, so that unchanged resources are answered
+    # with "304 Not Modified", which does not count against the rate limit. Since PyGithub does not persist injected
+    # connection classes, the underlying session (and its connection pool) is shared between all instances.
+    cache: ResponseCache | None = None
+    shared_session: requests.Session | None = None
+    session_lock = threading.Lock()
+
+    def __init__(self, host: str, port: int | None = None, strict: bool = False, timeout: int | None = None,
+                 retry: Any = None, pool_size: int | None = None, **kwargs: Any) -> None:
+        self.port = port if port else 443
+        self.host = host
+        self.protocol = "https"
+        self.timeout = timeout
+        self.verify = kwargs.get("verify", True)
+        self.session = self.get_shared_session(retry, pool_size)
+
+    @classmethod
+    def get_shared_session(cls, retry: Any, pool_size: int | None) -> requests.Session:
+        with cls.session_lock:
+            if cls.shared_session is None:
+                session = requests.Session()
+                session.auth = Requester.noopAuth
+                pool_size = pool_size or requests.adapters.DEFAULT_POOLSIZE
+                session.mount("https://", requests.adapters.HTTPAdapter(
+                    max_retries=get_server_error_retry(retry), pool_connections=pool_size, pool_maxsize=pool_size))
+                cls.shared_session = session
+        return cls.shared_session
+
+    def close(self) -> None:
+        # PyGithub closes the previous connection whenever it creates a new one, which must not close the shared
+        # session that other threads might be using.
+        pass
+
+    def getresponse(self) -> RequestsResponse | CachedResponse:
+        if self.verb != "GET" or self.stream or self.cache is None:
+            return self.send()
+
+        key = get_cache_key(f"{self.protocol}://{self.host}:{self.port}{self.url}", self.headers)
+        cached = self.cache.get(key)
+
+        if cached and trust_max_age and cached["expires_at"] > time.time():
+            record_cache_event("hit")
+            return CachedResponse(200, cached["headers"], cached["body"])
+
+        if cached:
+            self.headers = dict(self.headers)
+            if cached["etag"]:
+                self.headers["If-None-Match"] = cached["etag"]
+            if cached["last_modified"]:
+                self.headers["If-Modified-Since"] = cached["last_modified"]
+
+        response = self.send()
+        response_headers = {name.lower(): value for name, value in response.getheaders()}
+
+        if cached and response.status == 304:
+            record_cache_event("revalidated")
+            # The 304 response carries the current rate limit headers, the cached one the content headers.
+            headers = {**cached["headers"], **response_headers}
+            self.cache.refresh(key, headers)
+            return CachedResponse(200, headers, cached["body"])
+
+        record_cache_event("miss")
+        if response.status == 200 and ("etag" in response_headers or "last-modified" in response_headers):
+            self.cache.put(key, response_headers, response.read())
+        return response
+
+    def send(self) -> RequestsResponse:
+        # Sends the request with the access token the scheduler selects and sends it again if it was rejected because
+        # of a rate limit (with another token of the pool or after the reset).
+        authorization = self.headers.get("Authorization", "")
+        resource = token_scheduler.get_resource(self.url)
+        for attempt in range(1, token_scheduler.max_attempts + 1):
+            # A fetcher that has exceeded its time slice stops before its next request (e.g., for the next page).
+            validation_budget.check_deadline()
+            scheduled_authorization = token_scheduler.scheduler.acquire(authorization, resource)
+            if scheduled_authorization != authorization:
+                self.headers = {**self.headers, "Authorization": scheduled_authorization}
+
+            response = super().getresponse()
+            response_headers = {name.lower(): value for name, value in response.getheaders()}
+            rate_limited = token_scheduler.scheduler.record(scheduled_authorization, resource, response.status,
+                                                            response_headers)
+            metrics.increment("quare_github_requests_total", {"caller": metrics.github_caller.get(),
+                                                              "resource": resource, "status": str(response.status)})
+            if not rate_limited or attempt == token_scheduler.max_attempts:
+                return response
+
+
+def get_server_error_retry(retry: Any) -> Any:
+    # Requests rejected because of a rate limit (403 and 429) are sent again by the connection, which can switch to
+    # another token, instead of by urllib3, which would wait for the reset of the same token.
+    if not isinstance(retry, Retry):
+        return retry if retry is not None else requests.adapters.DEFAULT_RETRIES
+    return Retry(total=retry.total, backoff_factor=retry.backoff_factor, allowed_methods=retry.allowed_methods,
+                 status_forcelist=[status for status in retry.status_forcelist or [] if status not in (403, 429)],
+                 raise_on_status=False)
+
+
+def get_cache_key(url: str, headers: dict[str, str]) -> str:
+    # Responses are only shared between requests with the same token (scope) and the same requested media type. The
+    # key is computed before the token scheduler picks a token of the pool, so all tokens of the pool are one scope:
+    # requests of pooled clients may be sent with any of them anyway, and a conditional request is only answered
+    # with "304 Not Modified" if the cached response is still what the token that is sent would get.
+    authorization = headers.get("Authorization", "")
+    token_scope = hashlib.sha256(authorization.encode()).hexdigest() if authorization else "anonymous"
+    return hashlib.sha256(f"{token_scope}\n{headers.get('Accept', '')}\n{url}".encode()).hexdigest()
+
+
+def get_max_age(headers: dict[str, str]) -> int:
+    match = max_age_pattern.search(headers.get("cache-control", ""))
+    return int(match.group(1)) if match else 0
+
+
+def record_cache_event(event: str) -> None:
+    with metrics_lock:
+        cache_metrics[event] += 1
+
+
+def get_cache_metrics() -> dict[str, int]:
+    with metrics_lock:
+        return {event: cache_metrics[event] for event in ("hit", "revalidated", "miss")}
+
+
+def install_connection_class() -> None:
+    # By default, PyGithub reuses a single connection object per Github instance, which is not thread-safe. The
+    # injected class creates a connection object per request that shares the session (and its connection pool).
+    with install_lock:
+        Requester.injectConnectionClasses(HTTPRequestsConnectionClass, CachingHTTPSConnection)
+
+
+def install_cache(path: str = cache_path, max_bytes: int = cache_max_bytes) -> None:
+    with install_lock:
+        if CachingHTTPSConnection.cache is None:
+            CachingHTTPSConnection.cache = ResponseCache(path, max_bytes)
+            Requester.injectConnectionClasses(HTTPRequestsConnectionClass, CachingHTTPSConnection)
+            logger.info("Caching GitHub API responses in %s (at most %d bytes).", path, max_bytes)
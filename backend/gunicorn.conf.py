@@ -0,0 +1,52 @@
+import gc
+import os
+
+# Production server, started with `gunicorn --config gunicorn.conf.py api:app`
+
+bind = f"{os.environ.get('HOST', '0.0.0.0')}:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get("QUARE_WORKERS", os.cpu_count() or 1))
+# Threads per worker, which mostly wait for GitHub
+threads = int(os.environ.get("QUARE_THREADS", 4))
+# Validations of large repositories take longer than the default timeout of 30 seconds.
+timeout = int(os.environ.get("QUARE_WORKER_TIMEOUT", 300))
+# Number of seconds that running requests are given to complete after SIGTERM before the workers are killed
+graceful_timeout = int(os.environ.get("QUARE_GRACEFUL_TIMEOUT", 60))
+
+# The app is loaded in the master before the workers are forked, so that the shapes are parsed only once and shared
+# copy-on-write with all workers.
+preload_app = True
+accesslog = "-"
+
+# Workers whose peak RSS exceeds this number of bytes (e.g., after validating repositories with very large README
+# files) are replaced once their running requests are complete. 0 disables the limit.
+max_worker_rss = int(os.environ.get("QUARE_WORKER_MAX_RSS", 1024 ** 3))
+
+
+def when_ready(server) -> None:
+    import shacl_validator
+
+    shacl_validator.preload()
+    # Objects that exist before forking are excluded from garbage collection, since the collector of each worker
+    # would otherwise write to (and thereby copy) the pages of the shared shapes.
+    gc.freeze()
+    server.log.info("Preloaded the shapes of %d project types for %d workers.",
+                    len(shacl_validator.project_type_compiled_shapes), workers)
+
+
+def post_fork(server, worker) -> None:
+    import api
+    import metrics
+
+    # The threads of the job queue are started in each worker, since they would not survive the fork.
+    api.get_job_queue()
+    # Each worker keeps its own metrics, so their samples are labelled with the worker that answered the scrape.
+    metrics.set_worker(worker.pid)
+
+
+def post_request(worker, req, environ, resp) -> None:
+    import metrics
+
+    peak_rss = metrics.get_peak_rss_bytes()
+    if max_worker_rss and peak_rss > max_worker_rss and worker.alive:
+        worker.log.info("Restarting the worker after a peak RSS of %d bytes.", peak_rss)
+        worker.alive = False
@@ -0,0 +1,96 @@
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from time import perf_counter
+
+# Upper bounds (in seconds) of the histogram buckets, which range from shapes lookups to paginating large repositories
+buckets = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+@dataclass
+class Trace:
+    # Durations of the spans of a request (or of a part of it) in the order they ended
+    parent: "Trace | None" = None
+    spans: list[tuple[str, float]] = field(default_factory=list)
+
+    def get_durations(self) -> dict[str, float]:
+        # Spans with the same name (e.g., of several project types) are summed up.
+        durations: dict[str, float] = {}
+        for name, duration in self.spans:
+            durations[name] = durations.get(name, 0) + duration
+        return durations
+
+
+@dataclass
+class Histogram:
+    counts: list[int] = field(default_factory=lambda: [0] * len(buckets))
+    total: float = 0
+    count: int = 0
+
+    def observe(self, duration: float) -> None:
+        for index, bucket in enumerate(buckets):
+            if duration <= bucket:
+                self.counts[index] += 1
+                break
+        self.total += duration
+        self.count += 1
+
+
+current_trace: ContextVar[Trace | None] = ContextVar("current_trace", default=None)
+
+# Durations of all spans since the start of the process, by span name
+histograms: dict[str, Histogram] = {}
+histograms_lock = threading.Lock()
+
+
+@contextmanager
+def trace() -> Iterator[Trace]:
+    # Collects the spans that end in the current context until the end of the block. Spans are also added to the
+    # enclosing traces, so that a request can be traced as a whole and in parts.
+    request_trace = Trace(parent=current_trace.get())
+    token = current_trace.set(request_trace)
+    try:
+        yield request_trace
+    finally:
+        current_trace.reset(token)
+
+
+@contextmanager
+def span(name: str) -> Iterator[None]:
+    time_start = perf_counter()
+    try:
+        yield
+    finally:
+        record(name, perf_counter() - time_start)
+
+
+def record(name: str, duration: float) -> None:
+    # Spans measured in other threads (e.g., by the fetchers) are recorded by the thread that waits for them, since
+    # the trace of a request is bound to its context.
+    with histograms_lock:
+        histograms.setdefault(name, Histogram()).observe(duration)
+
+    request_trace = current_trace.get()
+    while request_trace is not None:
+        request_trace.spans.append((name, duration))
+        request_trace = request_trace.parent
+
+
+def get_histograms() -> dict[str, dict]:
+    # Cumulative bucket counts, as used by Prometheus
+    with histograms_lock:
+        snapshot = {name: (list(histogram.counts), histogram.total, histogram.count)
+                    for name, histogram in histograms.items()}
+
+    results = {}
+    for name, (counts, total, count) in snapshot.items():
+        cumulative_counts = [sum(counts[:index + 1]) for index in range(len(buckets))]
+        results[name] = {"buckets": dict(zip(buckets, cumulative_counts)), "sum": total, "count": count}
+    return results
+
+
+def clear_histograms() -> None:
+    with histograms_lock:
+        histograms.clear()
@@ -0,0 +1,199 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections.abc import Callable
+
+logger = logging.getLogger(__name__)
+
+queue_path = os.environ.get("QUARE_JOB_QUEUE_PATH", "./data/cache/job_queue.sqlite")
+# Number of threads per process that run jobs, one of which only runs interactive jobs (if there is more than one)
+queue_pool_size = max(1, int(os.environ.get("QUARE_JOB_POOL_SIZE", 4)))
+# Number of seconds for which finished jobs (and their results) can be retrieved
+job_ttl = float(os.environ.get("QUARE_JOB_TTL", 24 * 60 * 60))
+
+# Jobs with a lower level are run first. Interactive jobs (e.g., of the frontend) are never queued behind bulk jobs,
+# since one thread of each process is reserved for them.
+priorities = {"interactive": 0, "bulk": 1}
+
+# Processes renew their heartbeat regularly. Jobs of processes without a recent heartbeat (e.g., after a restart) are
+# queued again, or failed if they need the access token that was only kept in the memory of that process.
+heartbeat_interval = 5
+heartbeat_timeout = 30
+# Number of seconds after which a thread checks for jobs submitted to other processes
+poll_interval = 1
+
+# Runs a job (access token, repository name, project type and whether to include the report) and returns its result
+JobRunner = Callable[[str, str, str, bool], dict]
+
+job_queue: "JobQueue | None" = None
+install_lock = threading.Lock()
+
+
+class JobQueue:
+    # Validation jobs in a SQLite database that is shared by all processes of a deployment and survives restarts.
+    # Access tokens are never written to the database but kept in the memory of the process the job was submitted to,
+    # which is therefore the only one that runs the job.
+    def __init__(self, path: str, pool_size: int, run_job: JobRunner, start: bool = True) -> None:
+        self.run_job = run_job
+        self.process_id = uuid.uuid4().hex
+        self.access_tokens: dict[str, str] = {}
+        self.lock = threading.Lock()
+        self.condition = threading.Condition()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS jobs (
+            sequence INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT UNIQUE, priority INTEGER, status TEXT,
+            repo_name TEXT, repo_type TEXT, include_report INTEGER, has_access_token INTEGER, owner TEXT,
+            created_at REAL, started_at REAL, finished_at REAL, result TEXT, error TEXT)""")
+        self.connection.execute("CREATE INDEX IF NOT EXISTS jobs_by_status ON jobs (status, priority, sequence)")
+        self.connection.execute("CREATE TABLE IF NOT EXISTS processes (id TEXT PRIMARY KEY, heartbeat_at REAL)")
+        self.renew_heartbeat()
+
+        if start:
+            threading.Thread(target=self.maintain, daemon=True, name="job-queue-heartbeat").start()
+            for index in range(pool_size):
+                # The first thread only runs interactive jobs.
+                max_priority = priorities["interactive"] if index == 0 and pool_size > 1 \
+                    else max(priorities.values())
+                threading.Thread(target=self.work, args=(max_priority,), daemon=True,
+                                 name=f"job-queue-worker-{index}").start()
+
+    def submit(self, access_token: str, repo_name: str, repo_type: str, include_report: bool = False,
+               priority: str = "interactive") -> str:
+        job_id = uuid.uuid4().hex
+        with self.lock:
+            if access_token:
+                self.access_tokens[job_id] = access_token
+            self.connection.execute(
+                "INSERT INTO jobs (id, priority, status, repo_name, repo_type, include_report, has_access_token, "
+                "owner, created_at) VALUES (?, ?, 'queued', ?, ?, ?, ?, ?, ?)",
+                (job_id, priorities[priority], repo_name, repo_type, include_report, bool(access_token),
+                 self.process_id if access_token else None, time.time()))
+
+        with self.condition:
+            self.condition.notify_all()
+        return job_id
+
+    def get(self, job_id: str) -> dict | None:
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT id, priority, status, repo_name, repo_type, created_at, started_at, finished_at, result, "
+                "error FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+
+        job_id, priority, status, repo_name, repo_type, created_at, started_at, finished_at, result, error = row
+        job = {"jobId": job_id, "status": status, "priority": next(name for name, level in priorities.items()
+                                                                    if level == priority),
+               "repoName": repo_name, "repoType": repo_type, "createdAt": created_at, "startedAt": started_at,
+               "finishedAt": finished_at}
+        if result is not None:
+            job["result"] = json.loads(result)
+        if error is not None:
+            job["error"] = error
+        return job
+
+    def claim(self, max_priority: int) -> tuple[str, str, str, str, bool] | None:
+        # Marks the next job this process can run as running. The transaction is exclusive across processes, so that
+        # each job is only claimed once.
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.connection.execute(
+                    "SELECT id, repo_name, repo_type, include_report FROM jobs WHERE status = 'queued' AND "
+                    "priority <= ? AND (has_access_token = 0 OR owner = ?) ORDER BY priority, sequence LIMIT 1",
+                    (max_priority, self.process_id)).fetchone()
+                if row is not None:
+                    self.connection.execute(
+                        "UPDATE jobs SET status = 'running', owner = ?, started_at = ? WHERE id = ?",
+                        (self.process_id, time.time(), row[0]))
+                self.connection.execute("COMMIT")
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+
+        if row is None:
+            return None
+        job_id, repo_name, repo_type, include_report = row
+        return job_id, self.access_tokens.get(job_id, ""), repo_name, repo_type, bool(include_report)
+
+    def finish(self, job_id: str, result: dict | None, error: str | None) -> None:
+        with self.lock:
+            self.connection.execute(
+                "UPDATE jobs SET status = ?, finished_at = ?, result = ?, error = ? WHERE id = ?",
+                ("failed" if error is not None else "succeeded", time.time(),
+                 json.dumps(result) if result is not None else None, error, job_id))
+            self.access_tokens.pop(job_id, None)
+
+    def run_next(self, max_priority: int) -> bool:
+        # Returns whether a job was run.
+        job = self.claim(max_priority)
+        if job is None:
+            return False
+
+        job_id, access_token, repo_name, repo_type, include_report = job
+        try:
+            result, error = self.run_job(access_token, repo_name, repo_type, include_report), None
+        except Exception as e:
+            logger.exception(f"Job {job_id} could not validate {repo_name} against the {repo_type} project type.")
+            result, error = None, str(e)
+        self.finish(job_id, result, error)
+        return True
+
+    def work(self, max_priority: int) -> None:
+        while True:
+            if not self.run_next(max_priority):
+                with self.condition:
+                    self.condition.wait(timeout=poll_interval)
+
+    def maintain(self) -> None:
+        while True:
+            time.sleep(heartbeat_interval)
+            try:
+                self.renew_heartbeat()
+                self.recover_jobs()
+            except sqlite3.Error:
+                logger.exception("Could not maintain the job queue.")
+
+    def renew_heartbeat(self) -> None:
+        with self.lock:
+            self.connection.execute("INSERT OR REPLACE INTO processes VALUES (?, ?)", (self.process_id, time.time()))
+
+    def recover_jobs(self) -> None:
+        now = time.time()
+        with self.lock:
+            self.connection.execute("BEGIN IMMEDIATE")
+            try:
+                self.connection.execute("DELETE FROM processes WHERE heartbeat_at < ?", (now - heartbeat_timeout,))
+                orphaned = "owner IS NOT NULL AND owner NOT IN (SELECT id FROM processes)"
+                self.connection.execute(
+                    f"UPDATE jobs SET status = 'failed', finished_at = ?, error = 'The access token of the job was "
+                    f"lost when the server restarted. Please submit the job again.' WHERE status IN ('queued', "
+                    f"'running') AND has_access_token = 1 AND {orphaned}", (now,))
+                self.connection.execute(f"UPDATE jobs SET status = 'queued', owner = NULL, started_at = NULL "
+                                        f"WHERE status = 'running' AND has_access_token = 0 AND {orphaned}")
+                self.connection.execute("DELETE FROM jobs WHERE finished_at < ?", (now - job_ttl,))
+                self.connection.execute("COMMIT")
+            except Exception:
+                self.connection.execute("ROLLBACK")
+                raise
+
+        with self.condition:
+            self.condition.notify_all()
+
+
+def get_job_queue(run_job: JobRunner) -> JobQueue:
+    # The queue is started on first use in each process, i.e., after the production server forked its workers.
+    global job_queue
+    with install_lock:
+        if job_queue is None:
+            job_queue = JobQueue(queue_path, queue_pool_size, run_job)
+            logger.info("Running queued jobs from %s with %d threads.", queue_path, queue_pool_size)
+    return job_queue
@@ -0,0 +1,212 @@
+import hashlib
+import logging
+import os
+import re
+import subprocess
+import threading
+from collections.abc import Callable
+from types import SimpleNamespace
+from typing import TYPE_CHECKING
+
+from github import GithubException, UnknownObjectException
+
+import readme_extractor
+import validation_budget
+from github_graphql import TotalCountList, license_pattern, readme_pattern
+
+if TYPE_CHECKING:
+    from github.PaginatedList import PaginatedList
+    from github.Repository import Repository
+
+logger = logging.getLogger(__name__)
+
+# Directory with local clones of repositories (e.g., created with `git clone --mirror`) as <owner>/<name>.git or
+# <owner>/<name>, which are used instead of the GitHub API where possible. Empty to always use the API.
+mirrors_path = os.environ.get("QUARE_LOCAL_REPOSITORIES", "")
+
+# Names of common licenses as reported by GitHub, by a pattern of their text
+license_names = [
+    (r"Apache License,?\s+Version 2\.0", "Apache License 2.0"),
+    (r"GNU AFFERO GENERAL PUBLIC LICENSE\s+Version 3", "GNU Affero General Public License v3.0"),
+    (r"GNU LESSER GENERAL PUBLIC LICENSE\s+Version 3", "GNU Lesser General Public License v3.0"),
+    (r"GNU LESSER GENERAL PUBLIC LICENSE\s+Version 2\.1", "GNU Lesser General Public License v2.1"),
+    (r"GNU GENERAL PUBLIC LICENSE\s+Version 3", "GNU General Public License v3.0"),
+    (r"GNU GENERAL PUBLIC LICENSE\s+Version 2", "GNU General Public License v2.0"),
+    (r"Mozilla Public License,?\s+(Version|v\.)\s*2\.0", "Mozilla Public License 2.0"),
+    (r"Eclipse Public License - v 2\.0", "Eclipse Public License 2.0"),
+    (r"Boost Software License", "Boost Software License 1.0"),
+    (r"The Unlicense|unencumbered software released into the public domain", "The Unlicense"),
+    (r"CC0 1\.0|Creative Commons.*Zero", "Creative Commons Zero v1.0 Universal"),
+    (r"Permission is hereby granted, free of charge", "MIT License"),
+    (r"Redistribution and use in source and binary forms.*Neither the name", 'BSD 3-Clause "New" or "Revised" License'),
+    (r"Redistribution and use in source and binary forms", 'BSD 2-Clause "Simplified" License'),
+    (r"ISC License|Permission to use, copy, modify, and/or distribute", "ISC License")
+]
+# Names of repositories (<owner>/<name>) for which a local clone is looked up
+repo_name_pattern = re.compile(r"^[A-Za-z0-9_.-]+/[A-Za-z0-9_.-]+$")
+
+license_name_patterns = [(re.compile(pattern, re.IGNORECASE | re.DOTALL), name) for pattern, name in license_names]
+
+
+class LocalRepository:
+    # Mimics the subset of github.Repository.Repository that is used by the include_* functions of the
+    # shacl_validator (like github_graphql.GraphQLRepository), but reads branches, tags, the root directory and files
+    # from a local clone. Properties that are not part of the git repository (visibility, description, homepage, main
+    # language, topics and issues) are taken from the GitHub API, which is only requested if one of them is needed.
+    def __init__(self, path: str, repo_name: str, get_api_repository: Callable[[], "Repository | None"]) -> None:
+        self.path = path
+        self.html_url = f"https://github.com/{repo_name}"
+        # The HEAD of a mirror is the default branch of the remote repository, whereas the HEAD of a working copy is
+        # the branch that is checked out, so the default branch of its origin is used instead.
+        if self.run_git("rev-parse", "--is-bare-repository").strip() == "true":
+            self.revision = self.run_git("symbolic-ref", "--short", "HEAD").strip()
+            self.default_branch = self.revision
+        else:
+            self.revision = self.run_git("symbolic-ref", "--short", "refs/remotes/origin/HEAD").strip()
+            self.default_branch = self.revision.removeprefix("origin/")
+        self.get_api_repository = get_api_repository
+        self.api_repository: "Repository | None" = None
+        self.api_repository_lock = threading.Lock()
+
+    def run_git(self, *arguments: str) -> str:
+        return self.run_git_binary(*arguments).decode()
+
+    def run_git_binary(self, *arguments: str) -> bytes:
+        validation_budget.check_deadline()
+        return subprocess.run(["git", "-C", self.path, *arguments], capture_output=True, check=True).stdout
+
+    def get_api_property(self, name: str, default=None):
+        with self.api_repository_lock:
+            if self.api_repository is None:
+                self.api_repository = self.get_api_repository()
+        if self.api_repository is None:
+            logger.warning(f"The property {name} of {self.html_url} is only available from the GitHub API, which "
+                           f"requires an access token for repositories that are validated from a local clone.")
+            return default
+        return getattr(self.api_repository, name)
+
+    @property
+    def private(self) -> bool | None:
+        return self.get_api_property("private")
+
+    @property
+    def description(self) -> str | None:
+        return self.get_api_property("description")
+
+    @property
+    def homepage(self) -> str | None:
+        return self.get_api_property("homepage")
+
+    @property
+    def language(self) -> str | None:
+        return self.get_api_property("language")
+
+    def get_topics(self) -> list[str]:
+        # The topics are part of the repository metadata, so they do not need a request of their own.
+        return self.get_api_property("topics", [])
+
+    def get_issues(self, state: str = "open") -> "TotalCountList | PaginatedList":
+        get_issues = self.get_api_property("get_issues")
+        return get_issues(state=state) if get_issues else TotalCountList()
+
+    def get_branches(self) -> TotalCountList:
+        # Branches of a mirror are local branches, those of a working copy are remote-tracking branches.
+        branches = self.run_git("for-each-ref", "--format=%(refname)", "refs/heads", "refs/remotes/origin").split()
+        names = [branch.removeprefix("refs/heads/").removeprefix("refs/remotes/origin/") for branch in branches]
+        return TotalCountList(SimpleNamespace(name=name) for name in dict.fromkeys(names) if name != "HEAD")
+
+    def get_releases(self) -> TotalCountList:
+        # Releases are approximated by the tags, newest first as the releases of the GitHub API.
+        tags = self.run_git("for-each-ref", "--sort=-creatordate", "--format=%(refname:short)", "refs/tags").split()
+        return TotalCountList(SimpleNamespace(html_url=f"{self.html_url}/releases/tag/{tag}", tag_name=tag)
+                              for tag in tags)
+
+    def get_git_tree(self, sha: str) -> SimpleNamespace:
+        # The default branch of a working copy is read from its remote-tracking branch.
+        sha = self.revision if sha == self.default_branch else sha
+        try:
+            entries = self.run_git("ls-tree", "-z", sha).split("\0")
+        except subprocess.CalledProcessError as e:
+            raise GithubException(404, message=f"The tree of {sha} does not exist in the local clone. {e.stderr}")
+
+        tree = []
+        for entry in filter(None, entries):
+            metadata, path = entry.split("\t", 1)
+            tree.append(SimpleNamespace(path=path, type=metadata.split()[1]))
+        return SimpleNamespace(tree=tree)
+
+    def get_license(self) -> SimpleNamespace:
+        license_file_name = self.find_root_file(license_pattern)
+        if not license_file_name:
+            raise UnknownObjectException(404, message="The repository has no license.")
+
+        text = self.get_file_content(license_file_name).decode(errors="replace")
+        name = next((name for pattern, name in license_name_patterns if pattern.search(text)), "Other")
+        return SimpleNamespace(html_url=self.get_blob_url(license_file_name), license=SimpleNamespace(name=name))
+
+    def get_readme(self) -> SimpleNamespace:
+        readme_file_name = self.find_root_file(readme_pattern)
+        if not readme_file_name:
+            raise UnknownObjectException(404, message="The repository has no README file in its root directory.")
+
+        # Only the part of the README file that is analyzed is read.
+        return SimpleNamespace(html_url=self.get_blob_url(readme_file_name),
+                               decoded_content=self.get_file_content(readme_file_name,
+                                                                     readme_extractor.readme_max_bytes))
+
+    def find_root_file(self, pattern: re.Pattern) -> str | None:
+        for item in self.get_git_tree(self.revision).tree:
+            if item.type == "blob" and pattern.match(item.path):
+                return item.path
+        return None
+
+    def get_file_content(self, path: str, max_bytes: int | None = None) -> bytes:
+        if max_bytes is None:
+            return self.run_git_binary("cat-file", "blob", f"{self.revision}:{path}")
+
+        with subprocess.Popen(["git", "-C", self.path, "cat-file", "blob", f"{self.revision}:{path}"],
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL) as process:
+            content = process.stdout.read(max_bytes)
+            process.kill()
+        return content
+
+    def get_blob_url(self, path: str) -> str:
+        return f"{self.html_url}/blob/{self.default_branch}/{path}"
+
+
+def get_local_repository(repo_name: str,
+                         get_api_repository: Callable[[], "Repository | None"]) -> LocalRepository | None:
+    clone_path = find_clone(repo_name)
+    if not clone_path:
+        return None
+
+    # Clones whose default branch cannot be determined (e.g., working copies without the HEAD of their origin) are
+    # not used, so that the repository is requested from the API instead.
+    try:
+        return LocalRepository(clone_path, repo_name, get_api_repository)
+    except (subprocess.CalledProcessError, OSError) as e:
+        logger.warning(f"The local clone {clone_path} cannot be read. Falling back to the GitHub API. {e}")
+        return None
+
+
+def find_clone(repo_name: str) -> str | None:
+    if not mirrors_path:
+        return None
+
+    # The name of the repository is given by the requests, so it must not point outside of the directory of the
+    # clones (e.g., with "..").
+    if not repo_name_pattern.match(repo_name) or {".", ".."} & set(repo_name.split("/")):
+        return None
+
+    root_path = os.path.realpath(mirrors_path)
+    for path in (os.path.join(mirrors_path, f"{repo_name}.git"), os.path.join(mirrors_path, repo_name)):
+        if os.path.isdir(path) and os.path.commonpath([root_path, os.path.realpath(path)]) == root_path:
+            return path
+    return None
+
+
+def get_refs_hash(path: str) -> str:
+    # Changes whenever a branch or tag of the local clone is updated, e.g., by `git remote update`.
+    refs = subprocess.run(["git", "-C", path, "for-each-ref", "--format=%(objectname) %(refname)"],
+                          capture_output=True, check=True).stdout
+    return hashlib.sha256(refs).hexdigest()
@@ -0,0 +1,155 @@
+import resource
+import sys
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+import instrumentation
+import token_scheduler
+
+# Type and description of each metric family, in the order they are exposed
+families: dict[str, tuple[str, str]] = {
+    "quare_http_requests_total": ("counter", "Requests to the API by endpoint and status"),
+    "quare_http_request_duration_seconds": ("histogram", "Duration of the requests to the API by endpoint and "
+                                                         "project type"),
+    "quare_validations_total": ("counter", "Validations by project type, result and status of the result cache"),
+    "quare_validation_duration_seconds": ("histogram", "Duration of the validations by project type"),
+    "quare_validations_in_flight": ("gauge", "Validations that are currently running"),
+    "quare_coalesced_requests_total": ("counter", "Requests that waited for an identical validation or fetch of the "
+                                                  "repository by layer"),
+    "quare_violations_total": ("counter", "Violated shapes by project type"),
+    "quare_github_requests_total": ("counter", "Requests to the GitHub API by fetcher, resource and status"),
+    "quare_stage_duration_seconds": ("histogram", "Duration of the stages of the validations (e.g., of each fetcher)"),
+    "quare_github_http_cache_total": ("counter", "Responses of the GitHub API by the event of the HTTP cache"),
+    "quare_github_rate_limit_remaining": ("gauge", "Remaining requests of each access token by resource"),
+    "quare_github_rate_limit_reset_timestamp_seconds": ("gauge", "Time of the next reset of each rate limit"),
+    "quare_process_peak_rss_bytes": ("gauge", "Largest resident set size of the process since its start")
+}
+
+Labels = tuple[tuple[str, str], ...]
+
+counters: dict[tuple[str, Labels], float] = {}
+histograms: dict[tuple[str, Labels], instrumentation.Histogram] = {}
+metrics_lock = threading.Lock()
+
+# Label of all samples that identifies the worker process of the production server (see gunicorn.conf.py), since each
+# worker keeps its own metrics and a scrape is answered by any of them
+worker_labels: Labels = ()
+
+# Fetcher (or other part of the validator) on whose behalf GitHub is currently requested
+github_caller: ContextVar[str] = ContextVar("github_caller", default="other")
+
+
+def increment(name: str, labels: dict[str, str] | None = None, value: float = 1) -> None:
+    key = (name, tuple(sorted((labels or {}).items())))
+    with metrics_lock:
+        counters[key] = counters.get(key, 0) + value
+
+
+def observe(name: str, duration: float, labels: dict[str, str] | None = None) -> None:
+    key = (name, tuple(sorted((labels or {}).items())))
+    with metrics_lock:
+        if key not in histograms:
+            histograms[key] = instrumentation.Histogram()
+        histograms[key].observe(duration)
+
+
+@contextmanager
+def track_in_flight() -> Iterator[None]:
+    increment("quare_validations_in_flight")
+    try:
+        yield
+    finally:
+        increment("quare_validations_in_flight", value=-1)
+
+
+@contextmanager
+def calling_github(caller: str) -> Iterator[None]:
+    token = github_caller.set(caller)
+    try:
+        yield
+    finally:
+        github_caller.reset(token)
+
+
+def set_worker(pid: int) -> None:
+    global worker_labels
+    worker_labels = (("worker", str(pid)),)
+
+
+def render() -> str:
+    # Renders all metrics in the Prometheus text exposition format.
+    samples: dict[str, list[str]] = {name: [] for name in families}
+
+    with metrics_lock:
+        for (name, labels), value in counters.items():
+            samples[name].append(format_sample(name, labels, value))
+        histogram_snapshot = [(name, labels, list(histogram.counts), histogram.total, histogram.count)
+                              for (name, labels), histogram in histograms.items()]
+
+    for name, labels, counts, total, count in histogram_snapshot:
+        samples[name].extend(format_histogram(name, labels, counts, total, count))
+
+    for stage, histogram in instrumentation.get_histograms().items():
+        samples["quare_stage_duration_seconds"].extend(format_histogram(
+            "quare_stage_duration_seconds", (("stage", stage),), list(histogram["buckets"].values()),
+            histogram["sum"], histogram["count"], cumulative=True))
+
+    add_github_samples(samples)
+    samples["quare_process_peak_rss_bytes"].append(format_sample("quare_process_peak_rss_bytes", (),
+                                                                 get_peak_rss_bytes()))
+
+    lines = []
+    for name, (metric_type, description) in families.items():
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {metric_type}")
+        lines.extend(samples[name])
+    return "\n".join(lines) + "\n"
+
+
+def get_peak_rss_bytes() -> int:
+    # Reported in kilobytes on Linux, but in bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss if sys.platform == "darwin" else peak_rss * 1024
+
+
+def add_github_samples(samples: dict[str, list[str]]) -> None:
+    # The HTTP cache is only reported once it was used, so that rendering the metrics does not import PyGithub.
+    if "github_http_cache" in sys.modules:
+        for event, value in sys.modules["github_http_cache"].get_cache_metrics().items():
+            samples["quare_github_http_cache_total"].append(
+                format_sample("quare_github_http_cache_total", (("event", event),), value))
+
+    for quota in token_scheduler.scheduler.get_quota():
+        for resource_name, rate_limit in quota["resources"].items():
+            labels = (("resource", resource_name), ("token", quota["token"]))
+            samples["quare_github_rate_limit_remaining"].append(
+                format_sample("quare_github_rate_limit_remaining", labels, rate_limit["remaining"]))
+            samples["quare_github_rate_limit_reset_timestamp_seconds"].append(
+                format_sample("quare_github_rate_limit_reset_timestamp_seconds", labels, rate_limit["reset"]))
+
+
+def format_histogram(name: str, labels: Labels, counts: list[int], total: float, count: int,
+                     cumulative: bool = False) -> list[str]:
+    lines = []
+    cumulative_count = 0
+    for bucket, bucket_count in zip(instrumentation.buckets, counts):
+        cumulative_count = bucket_count if cumulative else cumulative_count + bucket_count
+        lines.append(format_sample(f"{name}_bucket", labels + (("le", str(bucket)),), cumulative_count))
+    lines.append(format_sample(f"{name}_bucket", labels + (("le", "+Inf"),), count))
+    lines.append(format_sample(f"{name}_sum", labels, total))
+    lines.append(format_sample(f"{name}_count", labels, count))
+    return lines
+
+
+def format_sample(name: str, labels: Labels, value: float) -> str:
+    labels = worker_labels + labels
+    if not labels:
+        return f"{name} {value}"
+    formatted_labels = ",".join(f'{label}="{escape(label_value)}"' for label, label_value in labels)
+    return f"{name}{{{formatted_labels}}} {value}"
+
+
+def escape(label_value: str) -> str:
+    return label_value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
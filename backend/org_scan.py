@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+import bulk_evaluation
+import shacl_validator
+import validation_interface
+
+if TYPE_CHECKING:
+    from github.Repository import Repository
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of repositories of an organization or user that are validated concurrently
+scan_pool_size = int(os.environ.get("QUARE_SCAN_POOL_SIZE", 16))
+# Largest page size of the GitHub API, so that listing 1,000 repositories takes 10 requests
+listing_page_size = 100
+
+
+def run_scan(owner: str, github_access_token: str = "", repo_type: str = "FAIRSoftware",
+             include_forks: bool = True, include_archived: bool = True, output_path: str = "") -> dict:
+    # Validates all repositories of an organization or user and prints the compliance matrix (or writes it to a
+    # JSON file).
+    compliance_matrix = scan_owner(github_access_token, owner, repo_type, include_forks, include_archived)
+    if not output_path:
+        return compliance_matrix
+
+    with open(output_path, "w") as file:
+        json.dump(compliance_matrix, file, indent=2)
+    return compliance_matrix["compliance"]
+
+
+def scan_owner(github_access_token: str, owner: str, repo_type: str = "FAIRSoftware", include_forks: bool = True,
+               include_archived: bool = True) -> dict:
+    shacl_validator.get_fetch_plan(repo_type)
+    repos = [repo for repo in list_repositories(github_access_token, owner)
+             if (include_forks or not repo.fork) and (include_archived or not repo.archived)]
+    logger.info("Scanning %d repositories of %s against the %s project type.", len(repos), owner, repo_type)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(scan_pool_size, len(repos)))) as executor:
+        results = list(executor.map(lambda repo: scan_repo(github_access_token, repo, repo_type), repos))
+
+    criteria = bulk_evaluation.get_criteria(repo_type)
+    # Share of the validated repositories that fulfil each criterion
+    validated_results = [result["results"] for result in results if "results" in result]
+    compliance = {criterion: sum(result[criterion] for result in validated_results) / max(1, len(validated_results))
+                  for criterion in criteria}
+
+    return {"owner": owner, "repoType": repo_type, "criteria": criteria, "compliance": compliance,
+            "repositories": results}
+
+
+def list_repositories(github_access_token: str, owner: str) -> list["Repository"]:
+    from github import UnknownObjectException
+
+    client = shacl_validator.create_github_client(github_access_token, per_page=listing_page_size)
+    try:
+        # Private repositories of an organization are only listed for its members.
+        return list(client.get_organization(owner).get_repos(type="all"))
+    except UnknownObjectException:
+        return list(client.get_user(owner).get_repos())
+
+
+def scan_repo(github_access_token: str, repo: "Repository", repo_type: str) -> dict:
+    from github import GithubException
+
+    # The repository from the listing is passed on, so that its metadata is not requested again.
+    try:
+        return_code, number_of_violations, violations, _ = validation_interface.run_validator_against_types(
+            github_access_token, repo.full_name, [repo_type], listed_repo=repo)[repo_type]
+    except GithubException as e:
+        logger.warning(f"Could not validate {repo.full_name} against the {repo_type} project type. {e}")
+        return {"repoName": repo.full_name, "error": str(e)}
+
+    return {"repoName": repo.full_name, "returnCode": return_code, "numberOfViolations": number_of_violations,
+            "results": bulk_evaluation.get_results_per_criterion(repo_type, violations)}
+
+
+if __name__ == "__main__":
+    import fire
+
+    logging.basicConfig(level=logging.INFO)
+    fire.Fire(run_scan)
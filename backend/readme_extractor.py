@@ -0,0 +1,245 @@
+import base64
+import html
+import io
+import os
+import re
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass, field
+
+import validation_budget
+
+# Number of bytes of a README file that are downloaded (where possible) and analyzed. Sections and DOIs after it are
+# not found.
+readme_max_bytes = int(os.environ.get("QUARE_README_MAX_BYTES", 1024 * 1024))
+# Number of characters of the content of a section that are added to the repository representation, since the shapes
+# only check whether the sections exist
+excerpt_length = int(os.environ.get("QUARE_README_EXCERPT_LENGTH", 500))
+# Number of seconds after which the download of a large README file is given up
+download_timeout = 15
+# Lines are truncated after this number of bytes (e.g., inline images), so that no single line is held in full
+max_line_bytes = 64 * 1024
+
+# Keywords of the headings of the README sections, by the property of the repository representation they are added as
+section_keywords: dict[str, tuple[str, ...]] = {
+    "hasInstallationInstructions": ("install", "setup", "set up", "setting up"),
+    "hasUsageNotes": ("usage", "how to use", "user manual"),
+    "hasPurpose": ("purpose",),
+    "softwareRequirements": ("dependencies", "requirements", "prerequisite"),
+    "citation": ("citation", "cite", "citing")
+}
+
+# Regex adapted from https://www.crossref.org/blog/dois-and-matching-regular-expressions/
+doi_pattern = re.compile(r"https://doi\.org/10\.\d{4,}/[-._;()/:A-Za-z0-9]+")
+
+# Headings as recognized by Python-Markdown, i.e., ATX headings (which do not need a space after the hashes) and
+# setext headings (a single line underlined with "=" or "-"), as well as headings in raw HTML
+atx_heading_pattern = re.compile(r"^(#{1,6})(.*?)#*$")
+setext_underline_pattern = re.compile(r"^(=+|-+)[ ]*$")
+html_heading_pattern = re.compile(r"<h([1-6])\b[^>]*>(.*?)</h\1\s*>", re.IGNORECASE)
+fence_pattern = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+# Markdown of a line that does not contribute to the text of a section (list item markers, block quotes, horizontal
+# rules and link reference definitions)
+block_marker_pattern = re.compile(r"^[ \t]*(?:>[ ]?)*[ \t]*(?:(?:[*+-]|\d+\.)[ \t]+)?")
+horizontal_rule_pattern = re.compile(r"^ {0,3}([-*_])( *\1){2,} *$")
+reference_definition_pattern = re.compile(r"^ {0,3}\[[^\]]+\]:[ \t]*\S+")
+
+# Inline Markdown that does not contribute to the text of a section, in the order it is removed
+image_pattern = re.compile(r"!\[[^\]]*\]\([^)]*\)|!\[[^\]]*\]\[[^\]]*\]")
+link_pattern = re.compile(r"\[([^\]]*)\](?:\([^)]*\)|\[[^\]]*\])")
+autolink_pattern = re.compile(r"<((?:https?|ftp)://[^>]*|[^>@\s]+@[^>\s]+)>")
+tag_pattern = re.compile(r"<!--.*?-->|</?[A-Za-z][^>]*>")
+code_pattern = re.compile(r"(`+)(.+?)(?<!`)\1(?!`)")
+emphasis_pattern = re.compile(r"(\*{1,3}|(?<!\w)_{1,3})(?=\S)(.+?)(?<=\S)\1")
+escape_pattern = re.compile(r"\\([\\`*_{}\[\]()#+\-.!])")
+
+
+@dataclass
+class ReadmeExtract:
+    # Property and content of each section whose heading contains a keyword, in the order of the README file
+    sections: list[tuple[str, str]] = field(default_factory=list)
+    contains_doi: bool = False
+
+
+class ReadmeExtractor:
+    # Walks the lines of a Markdown README file once and collects the sections whose headings contain a keyword and
+    # whether there is a DOI, without rendering the file to HTML. The content of a section is its text up to the next
+    # heading (of any level), with inline Markdown and HTML removed and whitespace collapsed, up to the excerpt length.
+    # Only the given sections (all if None) are collected.
+    def __init__(self, sections: Iterable[str] | None = None, check_for_doi: bool = True) -> None:
+        self.extract = ReadmeExtract()
+        self.sections = set(section_keywords) if sections is None else set(sections)
+        self.check_for_doi = check_for_doi
+        self.found_sections: set[str] = set()
+        self.properties: list[str] = []
+        self.content: list[str] = []
+        self.content_length = 0
+        self.paragraph: list[str] = []
+        self.fence: str | None = None
+        self.after_blank_line = True
+
+    def feed(self, line: str) -> None:
+        line = line.rstrip("\r\n")
+        if self.check_for_doi and not self.extract.contains_doi and doi_pattern.search(line):
+            self.extract.contains_doi = True
+
+        if self.fence is not None:
+            # Fenced code blocks are added as is, including their info string (e.g., the language).
+            if line.lstrip().startswith(self.fence):
+                self.fence = None
+            else:
+                self.add_content(line, is_code=True)
+            return
+
+        fence = fence_pattern.match(line)
+        if fence:
+            self.end_paragraph()
+            self.fence = fence.group(1)
+            self.add_content(line.lstrip()[len(self.fence):].strip("`~"), is_code=True)
+            return
+
+        if not line.strip():
+            self.end_paragraph()
+            self.after_blank_line = True
+            return
+
+        # Indented code blocks (after a blank line) cannot contain headings.
+        if self.after_blank_line and (line.startswith("    ") or line.startswith("\t")):
+            self.add_content(line, is_code=True)
+            return
+        self.after_blank_line = False
+
+        atx_heading = atx_heading_pattern.match(line)
+        if atx_heading:
+            self.end_paragraph()
+            self.start_section(atx_heading.group(2))
+            return
+
+        if len(self.paragraph) == 1 and setext_underline_pattern.match(line):
+            heading = self.paragraph.pop()
+            self.start_section(heading)
+            return
+
+        if horizontal_rule_pattern.match(line) or reference_definition_pattern.match(line):
+            return
+
+        html_heading = html_heading_pattern.search(line)
+        if html_heading:
+            self.end_paragraph()
+            self.add_content(line[:html_heading.start()])
+            self.start_section(html_heading.group(2))
+            self.add_content(line[html_heading.end():])
+            return
+
+        self.paragraph.append(line)
+
+    def end_paragraph(self) -> None:
+        for line in self.paragraph:
+            self.add_content(block_marker_pattern.sub("", line))
+        self.paragraph = []
+
+    def add_content(self, text: str, is_code: bool = False) -> None:
+        # Only the content of sections whose heading contains a keyword is kept, up to the excerpt length.
+        if self.properties and self.content_length <= excerpt_length:
+            text = text if is_code else get_plain_text(text)
+            self.content.append(text)
+            self.content_length += len(text) + 1
+
+    def start_section(self, heading: str) -> None:
+        self.end_section()
+        heading = get_plain_text(heading).lower()
+        self.properties = [property_name for property_name, keywords in section_keywords.items()
+                           if property_name in self.sections and any(keyword in heading for keyword in keywords)]
+
+    def end_section(self) -> None:
+        content = " ".join(" ".join(self.content).split())[:excerpt_length].rstrip()
+        self.extract.sections.extend((property_name, content) for property_name in self.properties)
+        self.found_sections.update(self.properties)
+        self.properties = []
+        self.content = []
+        self.content_length = 0
+
+    def is_complete(self) -> bool:
+        # Whether each section has been found (and the excerpt of the current one is complete) and, if needed, a DOI,
+        # so that the rest of the file cannot change the result.
+        found_sections = self.found_sections
+        if self.content_length > excerpt_length:
+            found_sections = found_sections | set(self.properties)
+        return found_sections >= self.sections and (self.extract.contains_doi or not self.check_for_doi)
+
+    def finish(self) -> ReadmeExtract:
+        self.end_paragraph()
+        self.end_section()
+        return self.extract
+
+
+def extract_readme(lines: Iterable[str], sections: Iterable[str] | None = None,
+                   check_for_doi: bool = True) -> ReadmeExtract:
+    extractor = ReadmeExtractor(sections, check_for_doi)
+    for line in lines:
+        extractor.feed(line)
+        if extractor.is_complete():
+            break
+    return extractor.finish()
+
+
+def get_readme_content(readme) -> bytes:
+    # The REST API returns the README file base64-encoded (with a line break after every 60 characters), so only the
+    # part within the byte cap is decoded.
+    if getattr(readme, "encoding", None) == "base64" and isinstance(getattr(readme, "content", None), str):
+        encoded_length = -(-readme_max_bytes // 3) * 4
+        encoded = "".join(readme.content[:encoded_length + encoded_length // 60 + 4].split())
+        return base64.b64decode(encoded[:len(encoded) // 4 * 4])[:readme_max_bytes]
+    # README files larger than 1 MB are returned without their content (with the encoding "none"), so the beginning of
+    # the raw file is downloaded instead.
+    encoding = getattr(readme, "encoding", None)
+    if isinstance(encoding, str) and encoding != "base64":
+        return download_content(readme.download_url, readme_max_bytes)
+    return readme.decoded_content[:readme_max_bytes]
+
+
+def download_content(url: str, max_bytes: int) -> bytes:
+    # Requests only the first bytes of the file and stops reading once they are received, in case the server ignores
+    # the range. The download URL of a file in a private repository contains a token of its own.
+    import requests
+
+    validation_budget.check_deadline()
+    content = bytearray()
+    with requests.get(url, headers={"Range": f"bytes=0-{max_bytes - 1}"}, stream=True,
+                      timeout=download_timeout) as response:
+        response.raise_for_status()
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            content += chunk
+            if len(content) >= max_bytes:
+                break
+    return bytes(content[:max_bytes])
+
+
+def read_lines(content: bytes, max_bytes: int | None = None) -> Iterator[str]:
+    # Decodes the lines of a file one at a time up to the byte cap, truncating very long lines.
+    max_bytes = readme_max_bytes if max_bytes is None else max_bytes
+    stream = io.BytesIO(content)
+    remaining_bytes = max_bytes
+    while remaining_bytes > 0:
+        line = stream.readline(min(remaining_bytes, max_line_bytes))
+        if not line:
+            break
+        remaining_bytes -= len(line)
+        # The rest of a truncated line is skipped, but counts towards the byte cap.
+        rest = line
+        while not rest.endswith(b"\n") and remaining_bytes > 0:
+            rest = stream.readline(min(remaining_bytes, max_line_bytes))
+            if not rest:
+                break
+            remaining_bytes -= len(rest)
+        yield line.decode(errors="replace")
+
+
+def get_plain_text(markdown_text: str) -> str:
+    text = image_pattern.sub("", markdown_text)
+    text = link_pattern.sub(r"\1", text)
+    text = autolink_pattern.sub(r"\1", text)
+    text = tag_pattern.sub("", text)
+    text = code_pattern.sub(lambda match: match.group(2).strip(), text)
+    text = emphasis_pattern.sub(r"\2", text)
+    text = escape_pattern.sub(r"\1", text)
+    return html.unescape(text).strip()
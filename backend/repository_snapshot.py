@@ -0,0 +1,120 @@
+import hashlib
+import os
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from time import monotonic
+
+from rdflib import Graph, URIRef
+from rdflib.namespace import RDF
+
+import metrics
+import validation_budget
+from fetch_planner import FetchPlan
+
+# Number of seconds for which a fetched repository representation is reused (0 disables the reuse across requests)
+snapshot_ttl = float(os.environ.get("QUARE_SNAPSHOT_TTL", 60))
+
+# Snapshots by token scope and repository name
+snapshots: dict[tuple[str, str], "RepositorySnapshot"] = {}
+snapshots_lock = threading.Lock()
+# Snapshots that are currently being created, with the fetch plan they are created with
+in_flight: dict[tuple[str, str], tuple[FetchPlan, "Future[RepositorySnapshot]"]] = {}
+
+
+@dataclass
+class RepositorySnapshot:
+    # Repository representation without the type of the repository, so that it can be validated against any project
+    # type whose fetch plan is covered by the one the snapshot was created with
+    graph: Graph
+    repo_entity: URIRef
+    fetch_plan: FetchPlan
+    created_at: float
+    # Requirements whose fetchers did not finish within the time budget of the request that created the snapshot
+    timed_out_fetchers: list[str] = field(default_factory=list)
+
+    def create_data_graph(self, project_type: URIRef) -> Graph:
+        data_graph = Graph()
+        for triple in self.graph:
+            data_graph.add(triple)
+        data_graph.add((self.repo_entity, RDF.type, project_type))
+        return data_graph
+
+
+def get_snapshot(access_token: str, repo_name: str, fetch_plan: FetchPlan,
+                 create_representation: Callable[[FetchPlan], tuple[Graph, URIRef]]) -> RepositorySnapshot:
+    # Snapshots are only shared between requests with the same token, since the token determines what is visible.
+    key = (get_token_scope(access_token), repo_name)
+
+    while True:
+        with snapshots_lock:
+            evict_expired_snapshots()
+            snapshot = snapshots.get(key)
+            if snapshot and snapshot.fetch_plan.covers(fetch_plan):
+                return snapshot
+            # Concurrent requests for the same repository wait for a fetch that is already running if it fetches
+            # everything they need, even if they validate the repository against other project types.
+            fetching_plan, pending_snapshot = in_flight.get(key, (None, None))
+            leader = pending_snapshot is None
+            if leader:
+                pending_snapshot = Future()
+                in_flight[key] = (fetch_plan, pending_snapshot)
+        if leader or not fetching_plan.covers(fetch_plan):
+            break
+
+        metrics.increment("quare_coalesced_requests_total", {"layer": "fetch"})
+        snapshot = pending_snapshot.result()
+        # Without a deadline of its own, a request does not accept a representation that lacks properties, but
+        # fetches the repository again (as the first request).
+        if not snapshot.timed_out_fetchers or validation_budget.get_fetch_deadline() is not None:
+            validation_budget.record_timed_out_fetchers(snapshot.timed_out_fetchers)
+            return snapshot
+
+    try:
+        snapshot = create_snapshot(fetch_plan, create_representation)
+    except BaseException as exception:
+        if leader:
+            finish_fetch(key, pending_snapshot, exception=exception)
+        raise
+
+    # Representations without the triples of fetchers that did not finish within the time budget are incomplete.
+    if snapshot_ttl > 0 and not snapshot.timed_out_fetchers:
+        with snapshots_lock:
+            snapshots[key] = snapshot
+    if leader:
+        finish_fetch(key, pending_snapshot, snapshot)
+    return snapshot
+
+
+def create_snapshot(fetch_plan: FetchPlan,
+                    create_representation: Callable[[FetchPlan], tuple[Graph, URIRef]]) -> RepositorySnapshot:
+    timed_out_fetchers = len(validation_budget.get_timed_out_fetchers())
+    snapshot = RepositorySnapshot(*create_representation(fetch_plan), fetch_plan, monotonic())
+    snapshot.timed_out_fetchers = validation_budget.get_timed_out_fetchers()[timed_out_fetchers:]
+    return snapshot
+
+
+def finish_fetch(key: tuple[str, str], pending_snapshot: "Future[RepositorySnapshot]",
+                 snapshot: RepositorySnapshot | None = None, exception: BaseException | None = None) -> None:
+    with snapshots_lock:
+        del in_flight[key]
+    if exception is not None:
+        pending_snapshot.set_exception(exception)
+    else:
+        pending_snapshot.set_result(snapshot)
+
+
+def get_token_scope(access_token: str) -> str:
+    return hashlib.sha256(access_token.encode()).hexdigest() if access_token else "anonymous"
+
+
+def evict_expired_snapshots() -> None:
+    now = monotonic()
+    for key in [key for key, snapshot in snapshots.items() if now - snapshot.created_at > snapshot_ttl]:
+        del snapshots[key]
+
+
+def clear_snapshots() -> None:
+    with snapshots_lock:
+        snapshots.clear()
@@ -0,0 +1,108 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+cache_enabled = os.environ.get("QUARE_RESULT_CACHE", "true").lower() in ("1", "true", "yes")
+cache_path = os.environ.get("QUARE_RESULT_CACHE_PATH", "./data/cache/result_cache.sqlite")
+cache_max_entries = int(os.environ.get("QUARE_RESULT_CACHE_MAX_ENTRIES", 1024))
+# Number of seconds after which a cached result is no longer used, even if the repository state did not change, since
+# not every change of a repository (e.g., a new release) changes the properties the state is derived from
+cache_ttl = float(os.environ.get("QUARE_RESULT_CACHE_TTL", 24 * 60 * 60))
+
+result_cache: "ResultCache | None" = None
+install_lock = threading.Lock()
+
+# Validation result as returned by validation_interface.run_validator
+ValidationResult = tuple[int, int | None, list[dict], str | None]
+
+
+class ResultCache:
+    # Validation results with the time they were computed at, in a bounded in-memory LRU tier in front of a SQLite
+    # tier that survives restarts
+    def __init__(self, path: str, max_entries: int, ttl: float) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.entries: OrderedDict[str, tuple[ValidationResult, float]] = OrderedDict()
+        self.lock = threading.Lock()
+
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("""CREATE TABLE IF NOT EXISTS results (
+            key TEXT PRIMARY KEY, result TEXT, created_at REAL)""")
+
+    def get(self, key: str) -> tuple[ValidationResult, float] | None:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                row = self.connection.execute("SELECT result, created_at FROM results WHERE key = ?",
+                                              (key,)).fetchone()
+                if row is None:
+                    return None
+                entry = (tuple(json.loads(row[0])), row[1])
+
+            if time.time() - entry[1] > self.ttl:
+                self.entries.pop(key, None)
+                self.connection.execute("DELETE FROM results WHERE key = ?", (key,))
+                return None
+
+            self.set_entry(key, entry)
+            return entry
+
+    def put(self, key: str, result: ValidationResult) -> None:
+        created_at = time.time()
+        with self.lock:
+            self.set_entry(key, (result, created_at))
+            self.connection.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?)",
+                                    (key, json.dumps(result), created_at))
+            self.connection.execute("DELETE FROM results WHERE created_at < ?", (created_at - self.ttl,))
+
+    def set_entry(self, key: str, entry: tuple[ValidationResult, float]) -> None:
+        # Marks the entry as most recently used and evicts the least recently used ones from the in-memory tier.
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+
+def get_result_cache() -> ResultCache:
+    global result_cache
+    with install_lock:
+        if result_cache is None:
+            result_cache = ResultCache(cache_path, cache_max_entries, cache_ttl)
+            logger.info("Caching validation results in %s (at most %d in memory).", cache_path, cache_max_entries)
+    return result_cache
+
+
+def get_cache_key(repository_state: tuple[str, str], project_type: str, shapes_hash: str) -> str:
+    # A result is valid as long as the repository, i.e., its state, and the shapes of the project type did not change.
+    repo_full_name, state = repository_state
+    return hashlib.sha256(f"{repo_full_name.lower()}\n{state}\n{project_type}\n{shapes_hash}".encode()).hexdigest()
+
+
+def get_cached_result(repository_state: tuple[str, str], project_type: str, shapes_hash: str,
+                      include_report: bool = False) -> tuple[ValidationResult, float] | None:
+    # Returns the cached result and its age in seconds.
+    entry = get_result_cache().get(get_cache_key(repository_state, project_type, shapes_hash))
+    if entry is None:
+        return None
+
+    (return_code, number_of_violations, violations, report), created_at = entry
+    # Results are cached without the text report unless it was requested.
+    if include_report and report is None:
+        return None
+    return (return_code, number_of_violations, violations, report if include_report else None), \
+        max(0.0, time.time() - created_at)
+
+
+def store_result(repository_state: tuple[str, str], project_type: str, shapes_hash: str,
+                 result: ValidationResult) -> None:
+    get_result_cache().put(get_cache_key(repository_state, project_type, shapes_hash), result)
@@ -1,22 +1,39 @@
 #!/usr/bin/env python3
 
 import logging
-import re
-from itertools import pairwise
-
-import fire
-import markdown
-from bs4 import BeautifulSoup, Tag
-from github import Github, UnknownObjectException, GithubException
-from github.PaginatedList import PaginatedList
-from github.Repository import Repository
+import os
+from concurrent.futures import ThreadPoolExecutor, wait
+from itertools import islice, pairwise
+from time import perf_counter
+from typing import TYPE_CHECKING
+
 from packaging import version
 from packaging.version import Version
-from pyshacl import validate
-from rdflib import Graph, Literal, Namespace, URIRef
+from rdflib import BNode, Graph, Literal, Namespace, URIRef
 from rdflib.namespace import RDF, RDFS
 from rdflib.term import Node
 
+import compiled_validator
+import fetch_planner
+import instrumentation
+import metrics
+import repository_snapshot
+import shapes_artifact
+import token_scheduler
+import validation_budget
+from readme_extractor import (doi_pattern, excerpt_length, extract_readme, get_readme_content, read_lines,
+                              section_keywords)
+
+# PyGithub, pyshacl, Markdown, Beautiful Soup and Fire are imported on first use, since importing them takes longer
+# than the creation of the shapes graph and not every process needs all of them.
+if TYPE_CHECKING:
+    from bs4 import BeautifulSoup, Tag
+    from github import Github
+    from github.PaginatedList import PaginatedList
+    from github.Repository import Repository
+
+    import github_graphql
+
 sh = Namespace("http://www.w3.org/ns/shacl#")
 # Software Description Ontology (SD)
 sd = Namespace("https://w3id.org/okn/o/sd#")
@@ -25,16 +42,121 @@ base_namespace_path = "https://example.org/repo/"
 types = Namespace(f"{base_namespace_path}project-types/")
 props = Namespace(f"{base_namespace_path}props/")
 
+# The repository representation is created via the REST API ("rest") or the GraphQL API ("graphql").
+representation_backend = os.environ.get("QUARE_REPRESENTATION_BACKEND", "rest")
+
+# The data graph is validated by pyshacl ("pyshacl") or by shapes compiled into Python predicates ("compiled"). The
+# compiled engine falls back to pyshacl for project types whose shapes it cannot compile.
+validation_engine = os.environ.get("QUARE_VALIDATION_ENGINE", "pyshacl")
+
+# The sections of README files and their DOIs are extracted in a single pass over the Markdown lines ("streaming") or
+# from the HTML the Markdown is rendered to ("markdown").
+readme_extractor = os.environ.get("QUARE_README_EXTRACTOR", "streaming")
+
+# Maximum number of properties of a repository that are fetched concurrently
+fetch_pool_size = int(os.environ.get("QUARE_FETCH_POOL_SIZE", 8))
+
+# Predicates whose objects are shapes that have to be evaluated as part of the referencing shape
+shape_reference_predicates = {sh["property"], sh["node"], sh["or"], sh["and"], sh["xone"], sh["not"],
+                              sh["qualifiedValueShape"], RDF.first, RDF.rest}
+
+shapes_files = ["./data/shacl/property_shapes.ttl", "./data/shacl/node_shapes.ttl", "./data/shacl/project_shapes.ttl"]
+
 shapes_graph: Graph
+# Hash of the shapes files the shapes graph was created from
+shapes_hash: str
+# Minimal shapes graph of each project type (and the compiled engine for it), so that the cost of a validation only
+# depends on the criteria of the expected type instead of on all project types
+project_type_shapes_graphs: dict[str, Graph]
+project_type_compiled_shapes: dict[str, compiled_validator.CompiledShapes]
+# Resources that have to be fetched to validate a project type, derived from the paths of its shapes
+project_type_fetch_plans: dict[str, fetch_planner.FetchPlan]
 
 
 def create_project_type_representation() -> None:
-    global shapes_graph
-    shapes_graph = Graph()
-    # Here, "graph merging" is used (https://rdflib.readthedocs.io/en/stable/merging.html).
-    shapes_graph.parse("./data/shacl/property_shapes.ttl")
-    shapes_graph.parse("./data/shacl/node_shapes.ttl")
-    shapes_graph.parse("./data/shacl/project_shapes.ttl")
+    global shapes_graph, shapes_hash, project_type_shapes_graphs, project_type_compiled_shapes, \
+        project_type_fetch_plans
+    with instrumentation.span("shapes_load"):
+        shapes_hash = shapes_artifact.get_shapes_hash(shapes_files)
+        project_type_compiled_shapes = {}
+
+        # The shapes graph and its slices are loaded from the precompiled artifact if the shapes files did not change.
+        artifact = shapes_artifact.load_artifact(shapes_hash)
+        if artifact:
+            shapes_graph = artifact["shapes_graph"]
+            project_type_shapes_graphs = artifact["project_type_shapes_graphs"]
+            project_type_fetch_plans = artifact["project_type_fetch_plans"]
+            return
+
+        shapes_graph = Graph()
+        # Here, "graph merging" is used (https://rdflib.readthedocs.io/en/stable/merging.html).
+        for shapes_file in shapes_files:
+            shapes_graph.parse(shapes_file)
+
+        project_type_shapes_graphs = {}
+        project_type_fetch_plans = {}
+        for project_type_node in shapes_graph.subjects(predicate=RDF.type, object=RDFS.Class, unique=True):
+            get_project_type_shapes_graph(project_type_node.split("/")[-1])
+
+        shapes_artifact.save_artifact(shapes_hash, {"shapes_graph": shapes_graph,
+                                                    "project_type_shapes_graphs": project_type_shapes_graphs,
+                                                    "project_type_fetch_plans": project_type_fetch_plans})
+
+
+def get_project_type_shapes_graph(expected_type: str) -> Graph:
+    # Project types that were added to the shapes graph after startup are sliced on first use.
+    if expected_type not in project_type_shapes_graphs:
+        project_type_shapes_graph = create_project_type_shapes_graph(types[expected_type])
+        project_type_fetch_plans[expected_type] = fetch_planner.create_fetch_plan(project_type_shapes_graph)
+        project_type_shapes_graphs[expected_type] = project_type_shapes_graph
+    # The shapes are compiled on first use, since the compiled engine cannot be stored in the artifact.
+    if expected_type not in project_type_compiled_shapes:
+        project_type_compiled_shapes[expected_type] = compiled_validator.CompiledShapes(
+            project_type_shapes_graphs[expected_type])
+    return project_type_shapes_graphs[expected_type]
+
+
+def preload() -> None:
+    # Compiles the shapes of all project types and imports the dependencies of the validation up front, so that a
+    # server that forks its workers afterwards (see gunicorn.conf.py) shares them with all workers.
+    for expected_type in list(project_type_shapes_graphs):
+        get_project_type_shapes_graph(expected_type)
+        project_type_compiled_shapes[expected_type].get_compiled_project_type(types[expected_type])
+
+    import github  # noqa: F401
+    import pyshacl  # noqa: F401
+    if readme_extractor == "markdown":
+        import bs4  # noqa: F401
+        import markdown  # noqa: F401
+
+
+def create_project_type_shapes_graph(project_type_node: URIRef) -> Graph:
+    # Copies the node shape of the project type and the transitive closure of the shapes it references, including
+    # the blank nodes and RDF lists they consist of (e.g., sequence paths and the members of sh:or).
+    project_type_shapes_graph = Graph()
+    for prefix, namespace in shapes_graph.namespaces():
+        project_type_shapes_graph.bind(prefix, namespace, replace=True)
+
+    for node in get_referenced_nodes(shapes_graph, project_type_node):
+        for predicate, obj in shapes_graph.predicate_objects(subject=node):
+            project_type_shapes_graph.add((node, predicate, obj))
+
+    return project_type_shapes_graph
+
+
+def get_referenced_nodes(graph: Graph, shape: Node) -> set[Node]:
+    # Transitive closure of the shapes (and blank nodes) a shape references
+    nodes_to_visit: list[Node] = [shape]
+    visited_nodes: set[Node] = set()
+    while nodes_to_visit:
+        node = nodes_to_visit.pop()
+        if node in visited_nodes:
+            continue
+        visited_nodes.add(node)
+        for predicate, obj in graph.predicate_objects(subject=node):
+            if isinstance(obj, BNode) or predicate in shape_reference_predicates:
+                nodes_to_visit.append(obj)
+    return visited_nodes
 
 
 create_project_type_representation()
@@ -75,38 +197,129 @@ def get_quality_criteria_for_project_type(project_type_node: Node) -> list[str]:
     return quality_criteria
 
 
-def get_requirements_list_for_repository_representation(expected_type: str) -> list[str]:
-    # https://rdflib.readthedocs.io/en/stable/intro_to_graphs.html#graph-methods-for-accessing-triples
-    # Tries to get the value of "sh:description" of the project type. If there are multiple ones, an error is raised.
-    description_literal = shapes_graph.value(subject=types[expected_type], predicate=sh["description"], object=None,
-                                             any=False)
-    if not description_literal:
-        raise ValueError("Project type '" + expected_type + "' is missing the mandatory triple with sh:description.")
+def get_fetch_plan(expected_type: str) -> fetch_planner.FetchPlan:
+    if (types[expected_type], RDF.type, RDFS.Class) not in shapes_graph:
+        raise ValueError("Project type '" + expected_type + "' is not defined in the shapes graph.")
 
-    requirements_str = description_literal.__str__().removeprefix(
-        "The following repository properties are required to validate this project type:")
-    requirements_list = requirements_str.split(",")
-    requirements_list = [requirement.strip() for requirement in requirements_list]
-    requirements_list[-1] = requirements_list[-1].removesuffix(".")
+    get_project_type_shapes_graph(expected_type)
+    return project_type_fetch_plans[expected_type]
 
-    return requirements_list
 
+def create_repository_representation(access_token: str = "", repo_name: str = "", expected_type: str = "") -> Graph:
+    snapshot = get_repository_snapshot(access_token, repo_name, [expected_type])
+    with instrumentation.span("graph_build"):
+        return snapshot.create_data_graph(types[expected_type])
+
+
+def get_repository_snapshot(access_token: str, repo_name: str, expected_types: list[str],
+                            listed_repo: "Repository | None" = None) -> repository_snapshot.RepositorySnapshot:
+    # The repository is fetched once with everything that is needed by any of the project types.
+    with instrumentation.span("fetch_plan"):
+        fetch_plan = fetch_planner.merge_fetch_plans([get_fetch_plan(expected_type)
+                                                      for expected_type in expected_types])
+    return repository_snapshot.get_snapshot(
+        access_token, repo_name, fetch_plan,
+        lambda plan: create_untyped_repository_representation(access_token, repo_name, plan, listed_repo))
 
-def create_repository_representation(requirements_list: list[str], access_token: str = "", repo_name: str = "",
-                                     expected_type: str = "") -> Graph:
-    graph = Graph()
-    github = Github(access_token) if access_token else Github()
 
-    # get repo
-    repo = github.get_repo(repo_name)
+def create_untyped_repository_representation(access_token: str, repo_name: str, fetch_plan: fetch_planner.FetchPlan,
+                                             listed_repo: "Repository | None" = None) -> tuple[Graph, URIRef]:
+    graph = Graph()
+    with instrumentation.span("fetch.Repository"), metrics.calling_github("Repository"):
+        # Repositories from a listing (e.g., of an organization) already contain their metadata, so they are not
+        # requested again. The GraphQL API fetches the metadata along with everything else in a single query anyway.
+        if listed_repo is not None and representation_backend == "rest":
+            repo = listed_repo
+        else:
+            repo = get_repository(fetch_plan.requirements, access_token, repo_name, fetch_plan.limits)
     repo_entity = URIRef(repo.html_url)
-    graph.add((repo_entity, RDF.type, types[expected_type]))
 
-    return add_required_properties_to_graph(graph, repo_entity, repo, requirements_list)
+    add_required_properties_to_graph(graph, repo_entity, repo, fetch_plan.requirements, fetch_plan.limits,
+                                     fetch_plan.readme_sections)
+    return graph, repo_entity
+
+
+def get_repository(requirements_list: list[str], access_token: str = "", repo_name: str = "",
+                   fetch_limits: dict[str, int] | None = None) -> "Repository | github_graphql.GraphQLRepository":
+    from github import GithubException, UnknownObjectException
+
+    import github_graphql
+
+    import local_repository
+
+    install_http_connection()
+    # Requests without an access token are routed to the token pool, if one is configured.
+    access_token = access_token or token_scheduler.get_pool_access_token()
+
+    # A local clone of the repository is read directly, only the properties that are not part of it are requested
+    # from the API (if there is an access token).
+    repo = local_repository.get_local_repository(
+        repo_name, lambda: create_github_client(access_token).get_repo(repo_name) if access_token else None)
+    if repo:
+        return repo
+
+    if representation_backend == "graphql":
+        # The GraphQL API cannot be used anonymously, so the REST API is the fallback.
+        if not access_token:
+            logging.warning("The GraphQL API requires an access token. Falling back to the REST API.")
+        else:
+            try:
+                return github_graphql.get_repository(access_token, repo_name, requirements_list, fetch_limits)
+            except UnknownObjectException:
+                raise
+            except GithubException as e:
+                logging.warning(f"The GraphQL query failed. Falling back to the REST API. {e}")
+
+    return create_github_client(access_token).get_repo(repo_name)
+
+
+def install_http_connection() -> None:
+    import github_http_cache
+
+    github_http_cache.install_connection_class()
+    if github_http_cache.cache_enabled:
+        github_http_cache.install_cache()
+
+
+def create_github_client(access_token: str = "", per_page: int = 30) -> "Github":
+    from github import Auth, Github
+
+    install_http_connection()
+    access_token = access_token or token_scheduler.get_pool_access_token()
+    return Github(auth=Auth.Token(access_token), per_page=per_page) if access_token else Github(per_page=per_page)
+
+
+def get_repository_state(access_token: str = "", repo_name: str = "",
+                         listed_repo: "Repository | None" = None) -> tuple[str, str] | None:
+    # Cheap probe of the repository metadata (a single request, usually answered with "304 Not Modified" by the HTTP
+    # cache) that changes whenever something is pushed, the repository settings are changed or issues are opened or
+    # closed. Since the probe uses the token of the request, it also ensures that the repository is visible with it.
+    # The metadata of a listed repository is used as is.
+    from github import GithubException
 
+    import local_repository
 
-def add_required_properties_to_graph(graph: Graph, repo_entity: URIRef, repo: Repository,
-                                     requirements_list: list[str]) -> Graph:
+    # Without an access token, a local clone is validated without the API, so its state only depends on its refs.
+    if not (access_token or token_scheduler.get_pool_access_token()):
+        local_repo = local_repository.get_local_repository(repo_name, lambda: None)
+        if local_repo:
+            return repo_name, f"local|{local_repository.get_refs_hash(local_repo.path)}"
+
+    try:
+        if listed_repo is not None:
+            repo = listed_repo
+        else:
+            with metrics.calling_github("RepositoryState"):
+                repo = create_github_client(access_token).get_repo(repo_name)
+        return repo.full_name, f"{repo.pushed_at.isoformat()}|{repo.updated_at.isoformat()}|{repo.open_issues_count}"
+    except GithubException as e:
+        logging.warning(f"The state of the repository {repo_name} could not be retrieved: {e}")
+        return None
+
+
+def add_required_properties_to_graph(graph: Graph, repo_entity: URIRef, repo: "Repository",
+                                     requirements_list: list[str], fetch_limits: dict[str, int] | None = None,
+                                     readme_sections: set[str] | None = None) -> Graph:
     requirements_function_mapping = {
         "Branches": include_branches,
         "BranchesIncludingRootDirFilesOfDefaultBranch": include_branches_with_root_dir_files_of_default_branch,
@@ -124,51 +337,109 @@ def add_required_properties_to_graph(graph: Graph, repo_entity: URIRef, repo: Re
         "Topics": include_topics,
         "Visibility": include_visibility
     }
+    # Requirements that are fetched from paginated lists, which can be truncated without changing the result
+    requirements_collection_mapping = {
+        "Branches": "branches",
+        "BranchesIncludingRootDirFilesOfDefaultBranch": "branches",
+        "Issues": "issues",
+        "Releases": "releases",
+        "ReleasesIncludingIncrementCheck": "releases"
+    }
+    fetch_limits = fetch_limits or {}
+
+    def fetch(requirement: str) -> tuple[Graph, float]:
+        # Each fetcher adds its triples to a graph of its own, since rdflib graphs are not thread-safe.
+        time_start = perf_counter()
+        requirement_graph = Graph()
+        collection = requirements_collection_mapping.get(requirement)
+        fetcher_deadline = validation_budget.get_fetcher_deadline(fetch_deadline, fetch_slice)
+        with metrics.calling_github(requirement), validation_budget.fetching_until(fetcher_deadline):
+            if collection in fetch_limits:
+                requirements_function_mapping[requirement](requirement_graph, repo_entity, repo,
+                                                           limit=fetch_limits[collection])
+            elif requirement.startswith("Readme"):
+                # The README file is only read until the sections that are needed have been found.
+                requirements_function_mapping[requirement](requirement_graph, repo_entity, repo,
+                                                           sections=readme_sections)
+            else:
+                requirements_function_mapping[requirement](requirement_graph, repo_entity, repo)
+        return requirement_graph, perf_counter() - time_start
 
+    known_requirements = []
     for requirement in requirements_list:
-        if not requirements_function_mapping[requirement]:
-            logging.exception(f"No function found for the requirement: {requirement}")
+        if requirement not in requirements_function_mapping:
+            logging.error(f"No function found for the requirement: {requirement}")
             continue
-
-        # Manipulates the graph in-place
-        requirements_function_mapping[requirement](graph, repo_entity, repo)
+        known_requirements.append(requirement)
+
+    # The fetchers are independent of each other, so they run concurrently. With a time budget, each fetcher gets a
+    # time slice from when it starts. Fetchers that exceed it stop before their next request to GitHub, fetchers
+    # that have not started by the fetch deadline are cancelled, and the (partial) triples of both are left out.
+    # A request to GitHub that is already running cannot be interrupted, its response is abandoned.
+    workers = max(1, min(fetch_pool_size, len(known_requirements)))
+    fetch_deadline = validation_budget.get_fetch_deadline()
+    fetch_slice = validation_budget.get_fetch_slice(len(known_requirements), workers)
+    with instrumentation.span("fetch"):
+        executor = ThreadPoolExecutor(max_workers=workers)
+        futures = [executor.submit(fetch, requirement) for requirement in known_requirements]
+        wait(futures, timeout=validation_budget.get_remaining_fetch_time())
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    # The triples are merged in the order of the requirements, regardless of which fetcher finished first.
+    timed_out_fetchers = []
+    with instrumentation.span("graph_build"):
+        for requirement, future in zip(known_requirements, futures):
+            if not future.done() or future.cancelled() or isinstance(future.exception(),
+                                                                     validation_budget.DeadlineExceeded):
+                timed_out_fetchers.append(requirement)
+                continue
+            requirement_graph, time_elapsed = future.result()
+            graph += requirement_graph
+            instrumentation.record(f"fetch.{requirement}", time_elapsed)
+
+    if timed_out_fetchers:
+        logging.warning(f"The fetchers {', '.join(timed_out_fetchers)} did not finish within the time budget.")
+        validation_budget.record_timed_out_fetchers(timed_out_fetchers)
 
     return graph
 
 
-def include_visibility(graph: Graph, repo_entity: URIRef, repo: Repository) -> None:
-    graph.add((repo_entity, props["isPrivate"], Literal(repo.private)))
+def include_visibility(graph: Graph, repo_entity: URIRef, repo: "Repository") -> None:
+    # The visibility of a local clone is unknown without an access token.
+    if repo.private is not None:
+        graph.add((repo_entity, props["isPrivate"], Literal(repo.private)))
 
 
-def include_topics(graph: Graph, repo_entity: URIRef, repo: Repository) -> None:
+def include_topics(graph: Graph, repo_entity: URIRef, repo: "Repository") -> None:
     topic_list = repo.get_topics()
     if topic_list:
         for topic in topic_list:
             graph.add((repo_entity, sd["keywords"], Literal(topic)))
 
 
-def include_description(graph: Graph, repo_entity: URIRef, repo: Repository) -> None:
+def include_description(graph: Graph, repo_entity: URIRef, repo: "Repository") -> None:
     if repo.description:
         graph.add((repo_entity, sd["description"], Literal(repo.description)))
 
 
-def include_homepage(graph: Graph, repo_entity: URIRef, repo: Repository) -> None:
+def include_homepage(graph: Graph, repo_entity: URIRef, repo: "Repository") -> None:
     if repo.homepage:
         graph.add((repo_entity, sd["website"], URIRef(repo.homepage)))
 
 
-def include_main_language(graph: Graph, repo_entity: URIRef, repo: Repository) -> None:
+def include_main_language(graph: Graph, repo_entity: URIRef, repo: "Repository") -> None:
     if repo.language:
         graph.add((repo_entity, sd["programmingLanguage"], Literal(repo.language)))
 
 
-def include_releases(graph: Graph, repo_entity: URIRef, repo: Repository,
-                     check_version_increment: bool = False) -> None:
+def include_releases(graph: Graph, repo_entity: URIRef, repo: "Repository",
+                     check_version_increment: bool = False, limit: int | None = None) -> None:
     release_list = repo.get_releases()
     if not release_list:
         return
 
-    for release in release_list:
+    # Stops paginating as soon as enough releases are fetched.
+    for release in islice(validation_budget.until_deadline(release_list), limit):
         release_entity = URIRef(release.html_url)
         graph.add((release_entity, sd["hasVersionId"], Literal(release.tag_name)))
         graph.add((repo_entity, sd["hasVersion"], release_entity))
@@ -182,13 +453,15 @@ def include_releases(graph: Graph, repo_entity: URIRef, repo: Repository,
         graph.add((repo_entity, props["versionsHaveValidIncrement"], Literal(False)))
 
 
-def include_releases_with_increment_check(graph: Graph, repo_entity: URIRef, repo: Repository) -> None:
-    return include_releases(graph, repo_entity, repo, check_version_increment=True)
+def include_releases_with_increment_check(graph: Graph, repo_entity: URIRef, repo: "Repository",
+                                          limit: int | None = None) -> None:
+    return include_releases(graph, repo_entity, repo, check_version_increment=True, limit=limit)
 
 
-def versions_have_valid_increment(release_list: PaginatedList | list[dict]) -> bool:
+def versions_have_valid_increment(release_list: "PaginatedList | list[dict]") -> bool:
     try:
-        version_list = [version.parse(release.tag_name.removeprefix("v")) for release in release_list]
+        version_list = [version.parse(release.tag_name.removeprefix("v"))
+                        for release in validation_budget.until_deadline(release_list)]
         sorted_version_list = sorted(version_list)
     except ValueError:
         return False
@@ -223,12 +496,14 @@ def version_pair_has_valid_version_increment(pair: tuple[Version, Version]) -> b
     return False
 
 
-def include_branches(graph: Graph, repo_entity: URIRef, repo: Repository,
-                     include_root_dir_files_of_default_branch: bool = False) -> None:
+def include_branches(graph: Graph, repo_entity: URIRef, repo: "Repository",
+                     include_root_dir_files_of_default_branch: bool = False, limit: int | None = None) -> None:
+    from github import GithubException
+
     branch_list = repo.get_branches()
     default_branch_name = repo.default_branch
 
-    for branch in branch_list:
+    for branch in islice(validation_budget.until_deadline(branch_list), limit):
         branch_entity = URIRef(f"{repo.html_url}/tree/{branch.name}")
         graph.add((branch_entity, sd["name"], Literal(branch.name)))
         graph.add((repo_entity, props["hasBranch"], branch_entity))
@@ -253,20 +528,23 @@ def include_branches(graph: Graph, repo_entity: URIRef, repo: Repository,
             graph.add((default_branch_entity, props["hasFileInRootDirectory"], Literal(item.path)))
 
 
-def include_branches_with_root_dir_files_of_default_branch(graph: Graph, repo_entity: URIRef, repo: Repository) -> None:
-    return include_branches(graph, repo_entity, repo, include_root_dir_files_of_default_branch=True)
+def include_branches_with_root_dir_files_of_default_branch(graph: Graph, repo_entity: URIRef, repo: "Repository",
+                                                           limit: int | None = None) -> None:
+    return include_branches(graph, repo_entity, repo, include_root_dir_files_of_default_branch=True, limit=limit)
 
 
-def include_issues(graph: Graph, repo_entity: URIRef, repo: Repository) -> None:
+def include_issues(graph: Graph, repo_entity: URIRef, repo: "Repository", limit: int | None = None) -> None:
     issue_list = repo.get_issues(state="open")
     if issue_list:
-        for issue in issue_list:
+        for issue in islice(validation_budget.until_deadline(issue_list), limit):
             issue_entity = URIRef(issue.html_url)
             graph.add((issue_entity, props["hasState"], Literal(issue.state)))
             graph.add((repo_entity, props["hasIssue"], issue_entity))
 
 
-def include_license(graph: Graph, repo_entity: URIRef, repo: Repository) -> None:
+def include_license(graph: Graph, repo_entity: URIRef, repo: "Repository") -> None:
+    from github import UnknownObjectException
+
     try:
         license_data = repo.get_license()
         if license_data:
@@ -277,8 +555,10 @@ def include_license(graph: Graph, repo_entity: URIRef, repo: Repository) -> None
         logging.exception(f"No license could be retrieved due to: {e}")
 
 
-def include_readme(graph: Graph, repo_entity: URIRef, repo: Repository, include_sections: bool = False,
-                   include_check_for_doi: bool = False) -> None:
+def include_readme(graph: Graph, repo_entity: URIRef, repo: "Repository", include_sections: bool = False,
+                   include_check_for_doi: bool = False, sections: set[str] | None = None) -> None:
+    from github import UnknownObjectException
+
     try:
         readme = repo.get_readme()
     except UnknownObjectException as e:
@@ -294,28 +574,36 @@ def include_readme(graph: Graph, repo_entity: URIRef, repo: Repository, include_
     if not (include_sections or include_check_for_doi):
         return
 
+    # Only the beginning of very large README files is analyzed.
+    content = get_readme_content(readme)
+    if readme_extractor == "streaming":
+        extract = extract_readme(read_lines(content), sections if include_sections else (),
+                                 include_check_for_doi)
+        if include_sections:
+            for property_name, section_content in extract.sections:
+                graph.add((repo_entity, sd[property_name], Literal(section_content)))
+        if include_check_for_doi:
+            graph.add((readme_entity, props["containsDoi"], Literal(str(extract.contains_doi).lower())))
+        return
+
+    import markdown
+    from bs4 import BeautifulSoup
+
     md = markdown.Markdown()
-    html = md.convert(readme.decoded_content.decode())
+    html = md.convert(content.decode(errors="replace"))
     soup = BeautifulSoup(html, "html.parser")
     if include_sections:
         process_readme_sections(graph, repo_entity, soup)
 
     if include_check_for_doi:
         # Check whether there is at least one DOI in the README file (as text or link href).
-        # Regex adapted from https://www.crossref.org/blog/dois-and-matching-regular-expressions/
-        doi_pattern = re.compile(r"https://doi\.org/10\.\d{4,}/[-._;()/:A-Za-z0-9]+")
         if soup.find_all(string=doi_pattern) or soup.find_all(href=doi_pattern):
             graph.add((readme_entity, props["containsDoi"], Literal("true")))
         else:
             graph.add((readme_entity, props["containsDoi"], Literal("false")))
 
 
-def process_readme_sections(graph: Graph, repo_entity: URIRef, soup: BeautifulSoup) -> None:
-    installation_instructions_keywords = ("install", "setup", "set up", "setting up")
-    usage_notes_keywords = ("usage", "how to use", "user manual")
-    sw_requirements_keywords = ("dependencies", "requirements", "prerequisite")
-    citation_keywords = ("citation", "cite", "citing")
-
+def process_readme_sections(graph: Graph, repo_entity: URIRef, soup: "BeautifulSoup") -> None:
     heading_tags = ["h" + str(ctr) for ctr in range(1, 7)]
     headings_elems = [soup.find_all(tag)
                       for tag in heading_tags if soup.find_all(tag)]
@@ -324,28 +612,15 @@ def process_readme_sections(graph: Graph, repo_entity: URIRef, soup: BeautifulSo
     for heading in headings_elems:
         lower_cased_heading = heading.text.lower()
 
-        if any(keyword in lower_cased_heading for keyword in installation_instructions_keywords):
-            content = get_content_from_readme_section(heading, heading_tags)
-            graph.add((repo_entity, sd["hasInstallationInstructions"], Literal(content)))
+        for property_name, keywords in section_keywords.items():
+            if any(keyword in lower_cased_heading for keyword in keywords):
+                content = get_content_from_readme_section(heading, heading_tags)
+                graph.add((repo_entity, sd[property_name], Literal(content)))
 
-        if any(keyword in lower_cased_heading for keyword in usage_notes_keywords):
-            content = get_content_from_readme_section(heading, heading_tags)
-            graph.add((repo_entity, sd["hasUsageNotes"], Literal(content)))
 
-        if "purpose" in lower_cased_heading:
-            content = get_content_from_readme_section(heading, heading_tags)
-            graph.add((repo_entity, sd["hasPurpose"], Literal(content)))
+def get_content_from_readme_section(heading_elem: "Tag", heading_tags: list[str]) -> str:
+    from bs4 import Tag
 
-        if any(keyword in lower_cased_heading for keyword in sw_requirements_keywords):
-            content = get_content_from_readme_section(heading, heading_tags)
-            graph.add((repo_entity, sd["softwareRequirements"], Literal(content)))
-
-        if any(keyword in lower_cased_heading for keyword in citation_keywords):
-            content = get_content_from_readme_section(heading, heading_tags)
-            graph.add((repo_entity, sd["citation"], Literal(content)))
-
-
-def get_content_from_readme_section(heading_elem: Tag, heading_tags: list[str]) -> str:
     content = ""
     for sibling in heading_elem.next_siblings:
         if isinstance(sibling, Tag) and sibling.name in heading_tags:
@@ -353,56 +628,186 @@ def get_content_from_readme_section(heading_elem: Tag, heading_tags: list[str])
         stripped_text = sibling.text.strip()
         if stripped_text:
             content += stripped_text + " "
-    return content.rstrip()
+        if len(content) > excerpt_length:
+            break
+    return content[:excerpt_length].rstrip()
 
 
-def include_readme_with_sections(graph: Graph, repo_entity: URIRef, repo: Repository) -> None:
-    return include_readme(graph, repo_entity, repo, include_sections=True)
+def include_readme_with_sections(graph: Graph, repo_entity: URIRef, repo: "Repository",
+                                 sections: set[str] | None = None) -> None:
+    return include_readme(graph, repo_entity, repo, include_sections=True, sections=sections)
 
 
-def include_readme_with_check_for_doi(graph: Graph, repo_entity: URIRef, repo: Repository) -> None:
-    return include_readme(graph, repo_entity, repo, include_check_for_doi=True)
+def include_readme_with_check_for_doi(graph: Graph, repo_entity: URIRef, repo: "Repository",
+                                      sections: set[str] | None = None) -> None:
+    return include_readme(graph, repo_entity, repo, include_check_for_doi=True, sections=sections)
 
 
-def include_readme_with_sections_and_check_for_doi(graph: Graph, repo_entity: URIRef, repo: Repository) -> None:
-    return include_readme(graph, repo_entity, repo, include_sections=True, include_check_for_doi=True)
+def include_readme_with_sections_and_check_for_doi(graph: Graph, repo_entity: URIRef, repo: "Repository",
+                                                   sections: set[str] | None = None) -> None:
+    return include_readme(graph, repo_entity, repo, include_sections=True, include_check_for_doi=True,
+                          sections=sections)
 
 
-def run_validation(data_graph):
-    result = validate(data_graph,
-                      shacl_graph=shapes_graph,
-                      ont_graph=None,
-                      inference='rdfs',
-                      abort_on_first=False,
-                      allow_infos=False,
-                      allow_warnings=False,
-                      meta_shacl=False,
-                      advanced=False,
-                      js=False,
-                      debug=False)
+def run_validation(data_graph: Graph, expected_type: str,
+                   include_report_text: bool = True) -> tuple[bool, Graph, str | None]:
+    with instrumentation.span("validation"):
+        project_type_shapes_graph = get_project_type_shapes_graph(expected_type)
 
-    return result
+        if validation_engine == "compiled":
+            result = project_type_compiled_shapes[expected_type].validate(data_graph, include_report_text)
+            if result is not None:
+                return result
 
+        from pyshacl import validate
 
-def validate_repo_against_specs(github_access_token: str = "", repo_name: str = "",
-                                expected_type: str = "") -> tuple[bool, int, str]:
+        conforms, results_graph, result_text = validate(data_graph,
+                                                        shacl_graph=project_type_shapes_graph,
+                                                        ont_graph=None,
+                                                        inference='rdfs',
+                                                        abort_on_first=False,
+                                                        allow_infos=False,
+                                                        allow_warnings=False,
+                                                        meta_shacl=False,
+                                                        advanced=False,
+                                                        js=False,
+                                                        debug=False)
+
+        return conforms, results_graph, result_text if include_report_text else None
+
+
+def validate_repo(github_access_token: str = "", repo_name: str = "", expected_type: str = "",
+                  include_report_text: bool = False) -> tuple[bool, Graph, str | None]:
     logging.info(f"Validating repo {repo_name} using the SHACL approach..")
 
-    requirements_list = get_requirements_list_for_repository_representation(expected_type)
-    data_graph = create_repository_representation(requirements_list, github_access_token, repo_name, expected_type)
-    return_code, _, result_text = run_validation(data_graph)
-    number_of_violations = get_number_of_violations(return_code, result_text)
+    data_graph = create_repository_representation(github_access_token, repo_name, expected_type)
+    return exclude_undetermined_criteria(expected_type, *run_validation(data_graph, expected_type, include_report_text))
+
+
+def validate_repo_against_types(github_access_token: str = "", repo_name: str = "",
+                                expected_types: list[str] | None = None, include_report_text: bool = False,
+                                listed_repo: "Repository | None" = None) -> dict[str, tuple[bool, Graph, str | None]]:
+    logging.info(f"Validating repo {repo_name} against {len(expected_types)} project types using the SHACL approach..")
+
+    snapshot = get_repository_snapshot(github_access_token, repo_name, expected_types, listed_repo)
+
+    results = {}
+    for expected_type in expected_types:
+        with instrumentation.span("graph_build"):
+            data_graph = snapshot.create_data_graph(types[expected_type])
+        results[expected_type] = exclude_undetermined_criteria(
+            expected_type, *run_validation(data_graph, expected_type, include_report_text))
+    return results
+
+
+def exclude_undetermined_criteria(expected_type: str, conforms: bool, results_graph: Graph,
+                                  report: str | None) -> tuple[bool, Graph, str | None]:
+    # Criteria that depend on a fetcher that did not finish within the time budget can be neither fulfilled nor
+    # violated, so their results are removed from the results graph and they are reported as undetermined instead.
+    timed_out_fetchers = validation_budget.get_timed_out_fetchers()
+    if not timed_out_fetchers:
+        return conforms, results_graph, report
+
+    undetermined_criteria = get_undetermined_criteria(expected_type, timed_out_fetchers)
+    undetermined_shapes = set().union(*undetermined_criteria.values())
+    for validation_report, validation_result in list(results_graph.subject_objects(predicate=sh["result"])):
+        if get_result_shapes(results_graph, validation_result) & undetermined_shapes:
+            results_graph.remove((validation_report, sh["result"], validation_result))
+
+    if not conforms and get_number_of_violations(results_graph) == 0:
+        conforms = True
+        for validation_report in results_graph.subjects(predicate=sh["conforms"]):
+            results_graph.set((validation_report, sh["conforms"], Literal(True)))
+    validation_budget.record_undetermined_criteria(expected_type, sorted(undetermined_criteria))
+    return conforms, results_graph, report
+
+
+def get_undetermined_criteria(expected_type: str, timed_out_fetchers: list[str]) -> dict[str, set[Node]]:
+    # Criteria (i.e., the shapes referenced by the project type) that need a resource of a timed out fetcher, with the
+    # shapes they consist of
+    timed_out_resources = {fetch_planner.get_resource(requirement) for requirement in timed_out_fetchers}
+    project_type_shapes_graph = get_project_type_shapes_graph(expected_type)
+
+    undetermined_criteria = {}
+    for predicate in (sh["property"], sh["node"]):
+        for criterion in project_type_shapes_graph.objects(subject=types[expected_type], predicate=predicate):
+            criterion_shapes = get_referenced_nodes(project_type_shapes_graph, criterion)
+            resources = {fetch_planner.resources_by_predicate[path_predicate][0]
+                         for shape in criterion_shapes
+                         for path in project_type_shapes_graph.objects(subject=shape, predicate=sh["path"])
+                         for path_predicate in fetch_planner.get_path_predicates(project_type_shapes_graph, path)
+                         if path_predicate in fetch_planner.resources_by_predicate}
+            if resources & timed_out_resources:
+                undetermined_criteria[criterion.split("/")[-1]] = criterion_shapes
+    return undetermined_criteria
+
+
+def get_result_shapes(results_graph: Graph, validation_result: Node) -> set[Node]:
+    # Shapes of a validation result and its details, e.g., of the node shape whose violation is reported by a result
+    # of the project type with the NodeConstraintComponent
+    shapes = set()
+    for detail in get_referenced_nodes(results_graph, validation_result):
+        shapes.update(results_graph.objects(subject=detail, predicate=sh["sourceShape"]))
+        shapes.update(results_graph.objects(subject=detail, predicate=sh["sourceConstraint"]))
+    return shapes
+
+
+def validate_repo_against_specs(github_access_token: str = "", repo_name: str = "", expected_type: str = "",
+                                time_budget: float | None = None) -> tuple[bool, int, str]:
+    with validation_budget.budget(time_budget) as request_budget:
+        return_code, results_graph, result_text = validate_repo(github_access_token, repo_name, expected_type,
+                                                                include_report_text=True)
+    number_of_violations = get_number_of_violations(results_graph)
+    if request_budget.timed_out_fetchers:
+        logging.warning(f"The fetchers {', '.join(request_budget.timed_out_fetchers)} timed out, so the criteria "
+                        f"{', '.join(request_budget.undetermined_criteria[expected_type])} are undetermined.")
 
     return return_code, number_of_violations, result_text
 
 
-def get_number_of_violations(return_code: bool, result_text: str) -> int:
-    if return_code:
-        return 0
-    line_with_number_of_violations = result_text.splitlines()[2]
-    number_of_violations = re.search(r"Results\s+\((\d+)\)", line_with_number_of_violations).group(1)
-    return int(number_of_violations)
+def get_number_of_violations(results_graph: Graph) -> int:
+    return len(set(results_graph.objects(predicate=sh["result"])))
+
+
+def get_violations(results_graph: Graph) -> list[dict]:
+    # For a NodeConstraintComponent, the more specific violations of the referenced node shapes are in the details,
+    # so they are reported instead of the general one. Hence, each violation corresponds to a violated criterion.
+    violations = []
+    results = list(results_graph.objects(predicate=sh["result"]))
+    while results:
+        result = results.pop()
+        details = list(results_graph.objects(subject=result, predicate=sh["detail"]))
+        constraint_component = results_graph.value(subject=result, predicate=sh["sourceConstraintComponent"])
+        if constraint_component == sh["NodeConstraintComponent"] and details:
+            results.extend(details)
+            continue
+
+        messages = sorted(str(message) for message in results_graph.objects(subject=result,
+                                                                             predicate=sh["resultMessage"]))
+        violations.append({
+            "sourceShape": str(results_graph.value(subject=result, predicate=sh["sourceShape"])),
+            "focusNode": str(results_graph.value(subject=result, predicate=sh["focusNode"])),
+            "resultPath": get_result_path(results_graph, results_graph.value(subject=result,
+                                                                            predicate=sh["resultPath"])),
+            "severity": str(results_graph.value(subject=result, predicate=sh["resultSeverity"])),
+            "message": messages[0] if messages else None,
+            "constraintComponent": str(constraint_component)
+        })
+
+    return sorted(violations, key=lambda violation: (violation["sourceShape"], violation["constraintComponent"],
+                                                     violation["message"] or ""))
+
+
+def get_result_path(results_graph: Graph, path: Node | None) -> str | list[str] | None:
+    # Sequence paths are represented as lists of predicates.
+    if path is None:
+        return None
+    if isinstance(path, BNode):
+        return [str(predicate) for predicate in results_graph.items(path)]
+    return str(path)
 
 
 if __name__ == "__main__":
+    import fire
+
     fire.Fire(validate_repo_against_specs)
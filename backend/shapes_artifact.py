@@ -0,0 +1,71 @@
+import hashlib
+import logging
+import os
+import pickle
+from pathlib import Path
+from typing import Any
+
+import rdflib
+
+# The merged shapes graph and the data derived from it are stored as a pickle file, so that the Turtle files do not
+# have to be parsed and sliced again on each start of a process.
+artifact_enabled = os.environ.get("QUARE_SHAPES_ARTIFACT", "true").lower() in ("1", "true", "yes")
+artifact_directory = os.environ.get("QUARE_SHAPES_ARTIFACT_PATH", "./data/cache")
+artifact_prefix = "shapes_"
+# Incremented whenever the data derived from the shapes changes its structure (e.g., the fetch plans)
+artifact_format = 2
+
+
+def get_shapes_hash(shapes_files: list[str]) -> str:
+    # The artifact is invalidated by any change of the shapes files. The rdflib version is part of the hash, since the
+    # pickled graphs depend on its internal data structures.
+    shapes_hash = hashlib.sha256(f"{rdflib.__version__}|{artifact_format}".encode())
+    for shapes_file in shapes_files:
+        shapes_hash.update(Path(shapes_file).name.encode())
+        shapes_hash.update(Path(shapes_file).read_bytes())
+    return shapes_hash.hexdigest()
+
+
+def get_artifact_path(shapes_hash: str, directory: str | None = None) -> Path:
+    return Path(directory or artifact_directory) / f"{artifact_prefix}{shapes_hash[:16]}.pickle"
+
+
+def load_artifact(shapes_hash: str, directory: str | None = None) -> dict[str, Any] | None:
+    if not artifact_enabled:
+        return None
+
+    path = get_artifact_path(shapes_hash, directory)
+    try:
+        with open(path, "rb") as file:
+            artifact = pickle.load(file)
+    except FileNotFoundError:
+        return None
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError) as e:
+        logging.warning(f"The shapes artifact {path} could not be loaded: {e}")
+        return None
+
+    if artifact.get("shapes_hash") != shapes_hash:
+        return None
+    return artifact
+
+
+def save_artifact(shapes_hash: str, artifact: dict[str, Any], directory: str | None = None) -> None:
+    if not artifact_enabled:
+        return
+
+    path = get_artifact_path(shapes_hash, directory)
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # The file is written under a temporary name first, so that concurrently starting processes never read a
+        # partially written artifact.
+        temporary_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(temporary_path, "wb") as file:
+            pickle.dump({**artifact, "shapes_hash": shapes_hash}, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_path, path)
+
+        # Artifacts of previous versions of the shapes are no longer used.
+        for stale_path in path.parent.glob(f"{artifact_prefix}*.pickle"):
+            if stale_path != path:
+                stale_path.unlink(missing_ok=True)
+    except OSError as e:
+        logging.warning(f"The shapes artifact {path} could not be saved: {e}")
@@ -0,0 +1,16 @@
+import pytest
+from pytest_mock import MockerFixture
+
+from backend import shacl_validator, validation_interface
+
+
+@pytest.fixture(autouse=True)
+def clear_repository_snapshots() -> None:
+    # The tests mock different repositories with the same name, so snapshots must not be reused between them.
+    shacl_validator.repository_snapshot.clear_snapshots()
+
+
+@pytest.fixture(autouse=True)
+def disable_result_cache(mocker: MockerFixture) -> None:
+    # For the same reason, results are not cached unless a test enables the cache.
+    mocker.patch.object(validation_interface.result_cache, "cache_enabled", False)
@@ -0,0 +1,54 @@
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from github import GithubException, UnknownObjectException
+from pytest_mock import MockerFixture
+from unittest.mock import MagicMock
+
+from backend.bulk_evaluation import evaluate_repos, read_checkpoint
+
+
+def get_repo(repo_name: str) -> MagicMock:
+    if repo_name == "owner/deleted-repo":
+        raise UnknownObjectException(404, {"message": "Not Found"}, {})
+    if repo_name == "owner/unreachable-repo":
+        raise GithubException(502, {"message": "Bad Gateway"}, {})
+
+    repo = MagicMock()
+    repo.html_url = f"https://testing.example.org/{repo_name}"
+    repo.private = True
+    repo.default_branch = "main"
+    repo.get_branches.return_value = [SimpleNamespace(name="main")]
+    return repo
+
+
+@pytest.fixture
+def github_repo(mocker: MockerFixture) -> MagicMock:
+    return mocker.patch("github.MainClass.Github.get_repo", side_effect=get_repo)
+
+
+def test_results_are_checkpointed_per_repository(github_repo: MagicMock, tmp_path: Path) -> None:
+    checkpoint_path = str(tmp_path / "checkpoint.jsonl")
+    repos = ["owner/first-repo", "owner/deleted-repo", "owner/unreachable-repo", "owner/second-repo"]
+
+    assert evaluate_repos(repos, checkpoint_path, repo_type="OngoingResearchProject", pool_size=2) == 3
+
+    results = {result["repoName"]: result for result in read_checkpoint(checkpoint_path)}
+    assert set(results) == {"owner/first-repo", "owner/deleted-repo", "owner/second-repo"}
+    assert results["owner/first-repo"]["results"] == {"AtLeastTwoBranches": False, "PrivateRepository": True}
+    assert "error" in results["owner/deleted-repo"]
+
+
+def test_completed_repositories_are_skipped_on_restart(github_repo: MagicMock, tmp_path: Path) -> None:
+    checkpoint_path = tmp_path / "checkpoint.jsonl"
+    result = {"repoName": "owner/first-repo", "repoType": "OngoingResearchProject", "results": {}}
+    # The process was killed while writing the second result.
+    checkpoint_path.write_text(json.dumps(result) + "\n" + '{"repoName": "owner/sec')
+
+    assert evaluate_repos(["owner/first-repo", "owner/second-repo"], str(checkpoint_path),
+                          repo_type="OngoingResearchProject") == 1
+    assert [call.args[0] for call in github_repo.call_args_list] == ["owner/second-repo"]
+    assert [result["repoName"] for result in read_checkpoint(str(checkpoint_path))] == ["owner/first-repo",
+                                                                                       "owner/second-repo"]
@@ -0,0 +1,65 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from pytest_mock import MockerFixture
+from unittest.mock import MagicMock
+
+from backend import validation_interface
+from backend.result_cache import ResultCache
+
+
+@pytest.fixture
+def github_repo(mocker: MockerFixture) -> MagicMock:
+    mocker.patch.object(validation_interface.result_cache, "result_cache", ResultCache(":memory:", 16, 60))
+    mocker.patch.object(validation_interface.result_cache, "cache_enabled", True)
+    github_repo_mock = mocker.patch("github.MainClass.Github.get_repo")
+    github_repo_mock.return_value.full_name = "owner/test-repo"
+    github_repo_mock.return_value.pushed_at = datetime(2024, 1, 1)
+    github_repo_mock.return_value.updated_at = datetime(2024, 1, 1)
+    github_repo_mock.return_value.open_issues_count = 0
+    github_repo_mock.return_value.html_url = "https://testing.example.org/test-repo"
+    github_repo_mock.return_value.private = True
+    github_repo_mock.return_value.default_branch = "main"
+    github_repo_mock.return_value.get_branches.return_value = [SimpleNamespace(name="main")]
+    github_repo_mock.return_value.get_readme.return_value.decoded_content = b""
+    return github_repo_mock
+
+
+def validate(repo_type: str = "OngoingResearchProject") -> tuple[tuple, dict]:
+    cache_status: dict = {}
+    result = validation_interface.run_validator(repo_name="owner/test-repo", repo_type=repo_type,
+                                                cache_status=cache_status)
+    return result, cache_status
+
+
+def test_result_is_reused_for_unchanged_repository(github_repo: MagicMock) -> None:
+    result, cache_status = validate()
+    assert cache_status["status"] == "miss"
+
+    cached_result, cache_status = validate()
+    assert cache_status["status"] == "hit"
+    assert cache_status["age"] >= 0
+    assert cached_result == result
+    # Only the metadata of the repository was requested again.
+    assert github_repo.return_value.get_branches.call_count == 1
+
+
+def test_result_is_invalidated_by_push(github_repo: MagicMock) -> None:
+    (return_code, _, _, _), _ = validate()
+    assert return_code == 1
+
+    github_repo.return_value.pushed_at = datetime(2024, 1, 2)
+    github_repo.return_value.get_branches.return_value = [SimpleNamespace(name="main"),
+                                                          SimpleNamespace(name="develop")]
+    validation_interface.shacl_validator.repository_snapshot.clear_snapshots()
+
+    (return_code, _, _, _), cache_status = validate()
+    assert cache_status["status"] == "miss"
+    assert return_code == 0
+
+
+def test_results_are_cached_per_project_type(github_repo: MagicMock) -> None:
+    validate()
+    _, cache_status = validate("TeachingTool")
+    assert cache_status["status"] == "miss"
@@ -0,0 +1,48 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+from pytest_mock import MockerFixture
+from unittest.mock import MagicMock
+
+from backend import shacl_validator
+from backend.shacl_validator import create_repository_representation, sd
+
+delay = 0.2
+
+
+def slow(value):
+    def fetch(*args, **kwargs):
+        time.sleep(delay)
+        return value
+
+    return fetch
+
+
+@pytest.fixture
+def slow_github_repo(mocker: MockerFixture) -> MagicMock:
+    github_repo_mock = mocker.patch("github.MainClass.Github.get_repo")
+    github_repo_mock.return_value.html_url = "https://testing.example.org/test-repo"
+    github_repo_mock.return_value.default_branch = "main"
+    github_repo_mock.return_value.get_topics.side_effect = slow(["topic"])
+    github_repo_mock.return_value.get_branches.side_effect = slow([SimpleNamespace(name="main")])
+    github_repo_mock.return_value.get_releases.side_effect = slow([])
+    github_repo_mock.return_value.get_license.side_effect = slow(None)
+    github_repo_mock.return_value.get_readme.side_effect = slow(None)
+    return github_repo_mock
+
+
+def test_fetchers_run_concurrently(slow_github_repo: MagicMock) -> None:
+    time_start = time.perf_counter()
+    with shacl_validator.instrumentation.trace() as fetch_trace:
+        graph = create_repository_representation(repo_name="test-repo", expected_type="TeachingTool")
+    time_elapsed = time.perf_counter() - time_start
+
+    fetch_timings = {name: duration for name, duration in fetch_trace.get_durations().items()
+                     if name.startswith("fetch.") and name != "fetch.Repository"}
+    assert set(fetch_timings) == {"fetch.Visibility", "fetch.Topics", "fetch.Description", "fetch.License",
+                                  "fetch.Releases", "fetch.Branches", "fetch.ReadmeIncludingSections"}
+    assert fetch_timings["fetch.Topics"] >= delay
+    assert time_elapsed < 3 * delay
+    assert (None, sd["keywords"], None) in graph
+    assert (None, sd["name"], None) in graph
@@ -0,0 +1,32 @@
+import logging
+from types import SimpleNamespace
+
+import pytest
+from pytest_mock import MockerFixture
+
+from backend import evaluation
+from backend.github_graphql import TotalCountList
+
+
+def test_compiled_shapes_are_faster_than_pyshacl(mocker: MockerFixture, caplog: pytest.LogCaptureFixture) -> None:
+    github_repo_mock = mocker.patch("github.MainClass.Github.get_repo")
+    github_repo_mock.return_value.html_url = "https://testing.example.org/test-repo"
+    github_repo_mock.return_value.private = False
+    github_repo_mock.return_value.description = "A test repository"
+    github_repo_mock.return_value.default_branch = "main"
+    github_repo_mock.return_value.get_topics.return_value = ["fair"]
+    github_repo_mock.return_value.get_branches.return_value = [SimpleNamespace(name="main")]
+    github_repo_mock.return_value.get_git_tree.return_value = SimpleNamespace(tree=[])
+    github_repo_mock.return_value.get_readme.return_value.decoded_content = b"# Usage\nRun it.\n"
+    github_repo_mock.return_value.get_releases.return_value = TotalCountList(
+        SimpleNamespace(html_url=f"https://testing.example.org/test-repo/releases/v1.{minor}.0",
+                        tag_name=f"v1.{minor}.0") for minor in range(5))
+
+    with caplog.at_level(logging.WARNING):
+        engine_benchmark_results = evaluation.execute_engine_benchmark("owner/test-repo", "", runs=5)
+
+    assert "differ" not in caplog.text
+    assert len(engine_benchmark_results) == 5
+    # The compiled shapes are about 8 to 10 times faster, so a regression shows up well before the bound is reached.
+    for repo_type, runtimes in engine_benchmark_results.items():
+        assert runtimes["compiled"] * 2 < runtimes["pyshacl"], repo_type
@@ -2,11 +2,19 @@ import pytest
 from pytest_mock import MockerFixture
 from unittest.mock import MagicMock
 
+from backend import shacl_validator
 from backend.shacl_validator import validate_repo_against_specs, shapes_graph
 
 readme_url = "https://testing.example.org/test-repo/blob/main/README.md"
 
 
+# All tests are run with both validation engines, which must produce the same results.
+@pytest.fixture(autouse=True, params=["pyshacl", "compiled"])
+def validation_engine(request: pytest.FixtureRequest, mocker: MockerFixture) -> str:
+    mocker.patch.object(shacl_validator, "validation_engine", request.param)
+    return request.param
+
+
 @pytest.fixture
 def basic_github_repo(mocker: MockerFixture) -> MagicMock:
     shapes_graph.parse("./tests/integration/references/test_project_shapes.ttl")
@@ -0,0 +1,71 @@
+import pytest
+from pytest_mock import MockerFixture
+from unittest.mock import MagicMock
+
+from backend import shacl_validator
+from backend.shacl_validator import validate_repo_against_specs, shapes_graph
+
+repo_url = "https://testing.example.org/test-repo"
+
+
+def graphql_response(**repository_data) -> tuple[dict, dict]:
+    return {}, {"data": {"repository": {"url": repo_url, "defaultBranchRef": {"name": "main"}, **repository_data}}}
+
+
+def connection(nodes: list[dict]) -> dict:
+    return {"nodes": nodes, "pageInfo": {"hasNextPage": False, "endCursor": None}}
+
+
+@pytest.fixture
+def graphql_query(mocker: MockerFixture) -> MagicMock:
+    shapes_graph.parse("./tests/integration/references/test_project_shapes.ttl")
+    mocker.patch.object(shacl_validator, "representation_backend", "graphql")
+    return mocker.patch("github.Requester.Requester.graphql_query")
+
+
+def test_explicit_citation_positive(graphql_query: MagicMock) -> None:
+    graphql_query.return_value = graphql_response(
+        branches=connection([{"name": "main"}, {"name": "dev"}]),
+        rootTree={"entries": [{"name": "CITATION.cff", "type": "blob"}, {"name": "src", "type": "tree"}]},
+        readme_0=None)
+    _, number_of_violations, _ = validate_repo_against_specs("token", "owner/test-repo", "TestExplicitCitation")
+    assert number_of_violations == 0
+    assert graphql_query.call_count == 1
+
+
+def test_explicit_citation_negative(graphql_query: MagicMock) -> None:
+    graphql_query.return_value = graphql_response(
+        branches=connection([{"name": "main"}]),
+        rootTree={"entries": [{"name": "LICENSE", "type": "blob"}]},
+        readme_0=None)
+    _, number_of_violations, _ = validate_repo_against_specs("token", "owner/test-repo", "TestExplicitCitation")
+    assert number_of_violations == 1
+
+
+def test_usage_notes_in_readme_positive(graphql_query: MagicMock) -> None:
+    graphql_query.return_value = graphql_response(
+        rootTree={"entries": [{"name": "README.md", "type": "blob"}]},
+        readme_0={"text": "# About\nPlaceholder about section.\n\n# Usage\nPlaceholder usage section.\n"})
+    _, number_of_violations, _ = validate_repo_against_specs("token", "owner/test-repo", "TestUsageNotesInReadme")
+    assert number_of_violations == 0
+
+
+def test_releases_are_paginated(graphql_query: MagicMock) -> None:
+    first_page = {"nodes": [{"url": f"{repo_url}/releases/tag/v1.0.0", "tagName": "v1.0.0"}],
+                  "pageInfo": {"hasNextPage": True, "endCursor": "cursor"}}
+    second_page = connection([{"url": f"{repo_url}/releases/tag/v1.0.1", "tagName": "v1.0.1"}])
+    graphql_query.side_effect = [graphql_response(releases=first_page), graphql_response(releases=second_page)]
+
+    _, number_of_violations, _ = validate_repo_against_specs("token", "owner/test-repo", "TestSemanticVersioning")
+    assert number_of_violations == 0
+    assert graphql_query.call_args.args[1]["cursor"] == "cursor"
+
+
+def test_fallback_to_rest_without_access_token(graphql_query: MagicMock, mocker: MockerFixture) -> None:
+    get_repo = mocker.patch("github.MainClass.Github.get_repo")
+    get_repo.return_value.html_url = repo_url
+    get_repo.return_value.private = False
+    _, number_of_violations, _ = validate_repo_against_specs(repo_name="test-repo",
+                                                             expected_type="TestPublicRepository")
+    assert number_of_violations == 0
+    graphql_query.assert_not_called()
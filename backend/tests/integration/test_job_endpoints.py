@@ -0,0 +1,52 @@
+import json
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from pytest_mock import MockerFixture
+from unittest.mock import MagicMock
+
+from backend import api
+
+
+@pytest.fixture
+def github_repo(mocker: MockerFixture) -> MagicMock:
+    github_repo_mock = mocker.patch("github.MainClass.Github.get_repo")
+    github_repo_mock.return_value.html_url = "https://testing.example.org/test-repo"
+    github_repo_mock.return_value.private = True
+    github_repo_mock.return_value.default_branch = "main"
+    github_repo_mock.return_value.get_branches.return_value = [SimpleNamespace(name="main")]
+    return github_repo_mock
+
+
+@pytest.fixture(autouse=True)
+def job_queue_path(mocker: MockerFixture, tmp_path: Path) -> None:
+    mocker.patch.object(api.job_queue, "queue_path", str(tmp_path / "job_queue.sqlite"))
+    mocker.patch.object(api.job_queue, "job_queue", None)
+
+
+def test_submitted_job_returns_validation_result(github_repo: MagicMock) -> None:
+    client = api.app.test_client()
+    response = client.post("/jobs", data=json.dumps({"accessToken": "", "repoName": "owner/test-repo",
+                                                     "repoType": "OngoingResearchProject"}))
+    assert response.status_code == 202
+    job_id = response.json["jobId"]
+
+    deadline = time.time() + 10
+    while (job := client.get(f"/jobs/{job_id}").json)["status"] in ("queued", "running"):
+        assert time.time() < deadline
+        time.sleep(0.05)
+
+    assert job["status"] == "succeeded"
+    assert job["priority"] == "interactive"
+    assert job["result"]["repoName"] == "owner/test-repo"
+    assert "AtLeastTwoBranches" in {violation["sourceShape"].split("/")[-1]
+                                    for violation in job["result"]["violations"]}
+
+
+def test_unknown_jobs_and_priorities_are_rejected() -> None:
+    client = api.app.test_client()
+    assert client.get("/jobs/unknown").status_code == 404
+    assert client.post("/jobs", data=json.dumps({"accessToken": "", "repoName": "owner/test-repo",
+                                                 "repoType": "FAIRSoftware", "priority": "urgent"})).status_code == 400
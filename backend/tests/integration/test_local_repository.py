@@ -0,0 +1,120 @@
+import os
+import subprocess
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+from unittest.mock import MagicMock
+
+from backend import local_repository, shacl_validator
+from backend.local_repository import LocalRepository
+
+readme = """# Test Repository
+
+## Installation
+
+Run `pip install test-repo`.
+
+## Citation
+
+Please cite https://doi.org/10.5281/zenodo.1234567.
+"""
+
+mit_license = """MIT License
+
+Permission is hereby granted, free of charge, to any person obtaining a copy of this software.
+"""
+
+
+def run_git(path: Path, *arguments: str) -> None:
+    environment = {**os.environ, "GIT_AUTHOR_NAME": "Test", "GIT_AUTHOR_EMAIL": "test@example.org",
+                   "GIT_COMMITTER_NAME": "Test", "GIT_COMMITTER_EMAIL": "test@example.org"}
+    subprocess.run(["git", "-C", str(path), *arguments], check=True, capture_output=True, env=environment)
+
+
+@pytest.fixture
+def mirrors_path(tmp_path: Path) -> Path:
+    working_copy = tmp_path / "working-copy"
+    working_copy.mkdir()
+    run_git(working_copy, "init", "--initial-branch=main")
+    (working_copy / "README.md").write_text(readme)
+    (working_copy / "LICENSE").write_text(mit_license)
+    (working_copy / "CITATION.cff").write_text("cff-version: 1.2.0\n")
+    run_git(working_copy, "add", ".")
+    run_git(working_copy, "commit", "-m", "Initial commit")
+    run_git(working_copy, "tag", "-a", "v1.0.0", "-m", "First release")
+    run_git(working_copy, "branch", "develop")
+
+    mirrors_path = tmp_path / "mirrors"
+    subprocess.run(["git", "clone", "--mirror", str(working_copy), str(mirrors_path / "owner" / "test-repo.git")],
+                   check=True, capture_output=True)
+    return mirrors_path
+
+
+def test_local_repository_reads_git_directory(mirrors_path: Path) -> None:
+    repo = LocalRepository(str(mirrors_path / "owner" / "test-repo.git"), "owner/test-repo", lambda: None)
+
+    assert repo.default_branch == "main"
+    assert [branch.name for branch in repo.get_branches()] == ["develop", "main"]
+    assert [release.tag_name for release in repo.get_releases()] == ["v1.0.0"]
+    assert {item.path for item in repo.get_git_tree("main").tree} == {"README.md", "LICENSE", "CITATION.cff"}
+    assert repo.get_readme().decoded_content.decode() == readme
+    assert repo.get_readme().html_url == "https://github.com/owner/test-repo/blob/main/README.md"
+    assert repo.get_license().license.name == "MIT License"
+    # Properties that are only available from the API are missing without an access token.
+    assert repo.private is None
+    assert repo.get_topics() == []
+
+
+def test_local_clone_is_validated_without_api(mirrors_path: Path, mocker: MockerFixture) -> None:
+    mocker.patch("local_repository.mirrors_path", str(mirrors_path))
+    get_repo: MagicMock = mocker.patch("github.MainClass.Github.get_repo")
+
+    _, results_graph, _ = shacl_validator.validate_repo("", "owner/test-repo", "FAIRSoftware")
+    violated_shapes = {violation["sourceShape"].split("/")[-1]
+                       for violation in shacl_validator.get_violations(results_graph)}
+
+    get_repo.assert_not_called()
+    assert not violated_shapes & {"DescriptionOrReadme", "ExactlyOneLicense", "ExplicitCitation",
+                                  "InstallationInstructionsInReadme", "PersistentId", "SemanticVersioning"}
+    # The topics and the description are only available from the API.
+    assert "DescriptionOrAtLeastOneTopic" in violated_shapes
+
+
+def test_working_copy_uses_default_branch_of_origin(mirrors_path: Path, tmp_path: Path) -> None:
+    working_copy = tmp_path / "clone"
+    subprocess.run(["git", "clone", str(mirrors_path / "owner" / "test-repo.git"), str(working_copy)],
+                   check=True, capture_output=True)
+    run_git(working_copy, "checkout", "develop")
+    repo = LocalRepository(str(working_copy), "owner/test-repo", lambda: None)
+
+    assert repo.default_branch == "main"
+    assert repo.get_readme().html_url == "https://github.com/owner/test-repo/blob/main/README.md"
+
+
+def test_unreadable_clone_falls_back_to_api(mirrors_path: Path, mocker: MockerFixture) -> None:
+    mocker.patch.object(local_repository, "mirrors_path", str(mirrors_path))
+    # A working copy with a detached HEAD and without the HEAD of its origin has no default branch.
+    working_copy = mirrors_path / "owner" / "detached"
+    subprocess.run(["git", "clone", str(mirrors_path / "owner" / "test-repo.git"), str(working_copy)],
+                   check=True, capture_output=True)
+    run_git(working_copy, "checkout", "--detach")
+    run_git(working_copy, "remote", "set-head", "origin", "--delete")
+
+    assert local_repository.get_local_repository("owner/detached", lambda: None) is None
+    assert local_repository.get_local_repository("owner/test-repo", lambda: None).default_branch == "main"
+
+
+@pytest.mark.parametrize("repo_name", ["../../srv/other", "owner/..", "owner/../owner/test-repo", "/etc/passwd",
+                                       "owner/test-repo/../test-repo", "owner"])
+def test_names_outside_of_the_clones_are_rejected(mirrors_path: Path, mocker: MockerFixture, repo_name: str) -> None:
+    mocker.patch.object(local_repository, "mirrors_path", str(mirrors_path / "owner"))
+    assert local_repository.find_clone(repo_name) is None
+
+
+def test_symbolic_links_outside_of_the_clones_are_rejected(mirrors_path: Path, tmp_path: Path,
+                                                          mocker: MockerFixture) -> None:
+    mocker.patch.object(local_repository, "mirrors_path", str(tmp_path / "links"))
+    (tmp_path / "links" / "owner").mkdir(parents=True)
+    (tmp_path / "links" / "owner" / "test-repo.git").symlink_to(mirrors_path / "owner" / "test-repo.git")
+    assert local_repository.find_clone("owner/test-repo") is None
@@ -0,0 +1,45 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from pytest_mock import MockerFixture
+from unittest.mock import MagicMock
+
+from backend.api import app
+
+
+@pytest.fixture
+def github_repo(mocker: MockerFixture) -> MagicMock:
+    github_repo_mock = mocker.patch("github.MainClass.Github.get_repo")
+    github_repo_mock.return_value.html_url = "https://testing.example.org/test-repo"
+    github_repo_mock.return_value.private = True
+    github_repo_mock.return_value.default_branch = "main"
+    github_repo_mock.return_value.get_branches.return_value = [SimpleNamespace(name="main")]
+    return github_repo_mock
+
+
+def test_validations_are_exposed_as_metrics(github_repo: MagicMock) -> None:
+    client = app.test_client()
+    response = client.post("/validate", data=json.dumps({"accessToken": "", "repoName": "owner/test-repo",
+                                                         "repoType": "OngoingResearchProject",
+                                                         "includeTimings": True}))
+    assert {"fetch.Branches", "validation", "verbalization", "request"} <= set(response.json["timings"])
+
+    lines = client.get("/metrics").get_data(as_text=True).splitlines()
+    assert any(line.startswith('quare_http_requests_total{endpoint="validate",status="200"}') for line in lines)
+    assert any(line.startswith('quare_http_request_duration_seconds_count{endpoint="validate",'
+                               'repo_type="OngoingResearchProject"}') for line in lines)
+    assert any(line.startswith('quare_violations_total{repo_type="OngoingResearchProject",'
+                               'shape="AtLeastTwoBranches"}') for line in lines)
+    assert any(line.startswith('quare_stage_duration_seconds_count{stage="fetch.Branches"}') for line in lines)
+    assert "quare_validations_in_flight 0" in lines
+
+
+def test_unknown_project_types_are_not_used_as_label_values(github_repo: MagicMock) -> None:
+    client = app.test_client()
+    client.post("/validate", data=json.dumps({"accessToken": "", "repoName": "owner/test-repo",
+                                              "repoType": "MadeUpProjectType"}))
+
+    metrics_text = client.get("/metrics").get_data(as_text=True)
+    assert "MadeUpProjectType" not in metrics_text
+    assert 'quare_http_request_duration_seconds_count{endpoint="validate",repo_type="unknown"}' in metrics_text
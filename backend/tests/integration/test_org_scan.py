@@ -0,0 +1,41 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from github import UnknownObjectException
+from pytest_mock import MockerFixture
+from unittest.mock import MagicMock
+
+from backend.api import app
+
+
+def create_listed_repo(name: str, number_of_branches: int, fork: bool = False) -> MagicMock:
+    repo = MagicMock(full_name=f"owner/{name}", html_url=f"https://testing.example.org/{name}", private=True,
+                     default_branch="main", fork=fork, archived=False)
+    repo.get_branches.return_value = [SimpleNamespace(name=f"branch-{index}") for index in range(number_of_branches)]
+    return repo
+
+
+@pytest.fixture
+def listed_repos(mocker: MockerFixture) -> list[MagicMock]:
+    repos = [create_listed_repo("first-repo", 2), create_listed_repo("second-repo", 1),
+             create_listed_repo("forked-repo", 1, fork=True)]
+    mocker.patch("github.MainClass.Github.get_organization",
+                 side_effect=UnknownObjectException(404, {"message": "Not Found"}, {}))
+    mocker.patch("github.MainClass.Github.get_user").return_value.get_repos.return_value = repos
+    return repos
+
+
+def test_scan_validates_listed_repositories_without_fetching_them_again(listed_repos: list[MagicMock],
+                                                                        mocker: MockerFixture) -> None:
+    get_repo = mocker.patch("github.MainClass.Github.get_repo")
+    response = app.test_client().post("/scan", data=json.dumps({"accessToken": "", "owner": "owner",
+                                                               "repoType": "OngoingResearchProject",
+                                                               "includeForks": False}))
+
+    scan_result = response.json
+    assert [repo["repoName"] for repo in scan_result["repositories"]] == ["owner/first-repo", "owner/second-repo"]
+    assert "AtLeastTwoBranches" in scan_result["criteria"]
+    assert [repo["results"]["AtLeastTwoBranches"] for repo in scan_result["repositories"]] == [True, False]
+    assert scan_result["compliance"]["AtLeastTwoBranches"] == 0.5
+    get_repo.assert_not_called()
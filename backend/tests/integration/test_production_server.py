@@ -0,0 +1,55 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import requests
+
+from backend import shacl_validator
+
+pytest.importorskip("gunicorn")
+
+backend_path = Path(__file__).parents[2]
+
+
+def test_preload_compiles_shapes_of_all_project_types() -> None:
+    shacl_validator.preload()
+
+    assert set(shacl_validator.project_type_compiled_shapes) == set(shacl_validator.project_type_shapes_graphs)
+    assert all(shacl_validator.types[project_type] in compiled_shapes.compiled_project_types
+               for project_type, compiled_shapes in shacl_validator.project_type_compiled_shapes.items())
+
+
+def test_workers_share_preloaded_shapes_and_shut_down_gracefully() -> None:
+    with socket.socket() as free_socket:
+        free_socket.bind(("127.0.0.1", 0))
+        port = free_socket.getsockname()[1]
+
+    environment = {**os.environ, "HOST": "127.0.0.1", "PORT": str(port), "QUARE_WORKERS": "2", "QUARE_THREADS": "2"}
+    server = subprocess.Popen([sys.executable, "-m", "gunicorn", "--config", "gunicorn.conf.py", "api:app"],
+                              cwd=backend_path, env=environment, stderr=subprocess.PIPE, text=True)
+    try:
+        deadline = time.time() + 30
+        while True:
+            try:
+                # Idle keep-alive connections would delay the shutdown until the graceful timeout.
+                with requests.get(f"http://127.0.0.1:{port}/project-type-specifications", timeout=1,
+                                  headers={"Connection": "close"}) as response:
+                    specifications = response.json()["projectTypeSpecifications"]
+                break
+            except requests.ConnectionError:
+                assert time.time() < deadline
+                time.sleep(0.2)
+        assert "FAIRSoftware" in specifications
+    finally:
+        server.send_signal(signal.SIGTERM)
+        _, log = server.communicate(timeout=30)
+
+    assert server.returncode == 0
+    # The shapes are loaded once by the master instead of by each worker.
+    assert log.count("Preloaded the shapes of") == 1
+    assert log.count("Booting worker") == 2
@@ -0,0 +1,47 @@
+import pytest
+from pytest_mock import MockerFixture
+from unittest.mock import MagicMock
+
+from backend import shacl_validator
+from backend.shacl_validator import get_number_of_violations, validate_repo, validate_repo_against_types, shapes_graph
+
+
+@pytest.fixture
+def github_repo(mocker: MockerFixture) -> MagicMock:
+    shapes_graph.parse("./tests/integration/references/test_project_shapes.ttl")
+    github_repo_mock = mocker.patch("github.MainClass.Github.get_repo")
+    github_repo_mock.return_value.html_url = "https://testing.example.org/test-repo"
+    github_repo_mock.return_value.private = False
+    github_repo_mock.return_value.description = None
+    github_repo_mock.return_value.get_topics.return_value = ["topic"]
+    github_repo_mock.return_value.get_readme.return_value.decoded_content = b""
+    return github_repo_mock
+
+
+def test_repository_is_fetched_once_for_all_types(github_repo: MagicMock) -> None:
+    results = validate_repo_against_types(repo_name="test-repo", expected_types=[
+        "TestPublicRepository", "TestDescriptionOrAtLeastOneTopic", "OngoingResearchProject"])
+
+    assert github_repo.call_count == 1
+    assert {expected_type: get_number_of_violations(results_graph)
+            for expected_type, (_, results_graph, _) in results.items()} == {
+        "TestPublicRepository": 0, "TestDescriptionOrAtLeastOneTopic": 0, "OngoingResearchProject": 2}
+
+
+def test_snapshot_is_reused_if_it_covers_the_type(github_repo: MagicMock) -> None:
+    validate_repo_against_types(repo_name="test-repo",
+                                expected_types=["TestPublicRepository", "TestDescriptionOrAtLeastOneTopic"])
+    validate_repo(repo_name="test-repo", expected_type="TestPublicRepository")
+    assert github_repo.call_count == 1
+
+    # The branches, releases, license and README file are not part of the snapshot, so the repository is fetched again.
+    validate_repo(repo_name="test-repo", expected_type="TeachingTool")
+    assert github_repo.call_count == 2
+
+
+def test_snapshot_is_not_reused_without_ttl(github_repo: MagicMock, mocker: MockerFixture) -> None:
+    mocker.patch.object(shacl_validator.repository_snapshot, "snapshot_ttl", 0)
+
+    validate_repo(repo_name="test-repo", expected_type="TestPublicRepository")
+    validate_repo(repo_name="test-repo", expected_type="TestPublicRepository")
+    assert github_repo.call_count == 2
@@ -0,0 +1,107 @@
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+from pytest_mock import MockerFixture
+from unittest.mock import MagicMock
+
+from backend import api, validation_interface
+from backend.github_graphql import TotalCountList
+
+metrics = validation_interface.metrics
+
+
+@pytest.fixture
+def slow_github_repo(mocker: MockerFixture) -> tuple[MagicMock, threading.Event]:
+    fetching = threading.Event()
+    repo = MagicMock()
+    repo.html_url = "https://testing.example.org/test-repo"
+    repo.private = True
+    repo.default_branch = "main"
+    repo.get_branches.return_value = [SimpleNamespace(name="main")]
+    repo.get_readme.return_value.decoded_content = b""
+
+    def get_repo(*_) -> MagicMock:
+        fetching.set()
+        time.sleep(0.5)
+        return repo
+
+    mocker.patch.dict(metrics.counters, clear=True)
+    return mocker.patch("github.MainClass.Github.get_repo", side_effect=get_repo), fetching
+
+
+def validate_concurrently(fetching: threading.Event, repo_types: list[str]) -> list[tuple]:
+    # The further requests are started once the first one fetches the repository.
+    results: list[tuple] = [()] * len(repo_types)
+
+    def validate(index: int) -> None:
+        results[index] = validation_interface.run_validator(repo_name="owner/test-repo", repo_type=repo_types[index])
+
+    threads = [threading.Thread(target=validate, args=(index,)) for index in range(len(repo_types))]
+    threads[0].start()
+    assert fetching.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def get_coalesced_requests(layer: str) -> float:
+    return metrics.counters.get(("quare_coalesced_requests_total", (("layer", layer),)), 0)
+
+
+def test_concurrent_validations_share_the_result(slow_github_repo: tuple[MagicMock, threading.Event]) -> None:
+    get_repo, fetching = slow_github_repo
+    results = validate_concurrently(fetching, ["OngoingResearchProject"] * 3)
+
+    assert get_repo.call_count == 1
+    assert get_coalesced_requests("validation") == 2
+    assert results[0] == results[1] == results[2]
+    assert results[1] is not results[0]
+
+
+def test_concurrent_validations_against_other_project_types_share_the_fetch(
+        slow_github_repo: tuple[MagicMock, threading.Event]) -> None:
+    get_repo, fetching = slow_github_repo
+    # The fetch plan of finished research projects covers the one of ongoing research projects.
+    _, ongoing_result = validate_concurrently(fetching, ["FinishedResearchProject", "OngoingResearchProject"])
+
+    assert get_repo.call_count == 1
+    assert get_coalesced_requests("validation") == 0
+    assert get_coalesced_requests("fetch") == 1
+    assert ongoing_result == validation_interface.run_validator(repo_name="owner/test-repo",
+                                                                repo_type="OngoingResearchProject")
+
+
+def test_requests_without_time_budget_do_not_accept_partial_results(
+        slow_github_repo: tuple[MagicMock, threading.Event]) -> None:
+    get_repo, fetching = slow_github_repo
+
+    def get_releases() -> TotalCountList:
+        # Takes longer than the time budget of the first request allows for.
+        time.sleep(1.5)
+        return TotalCountList(SimpleNamespace(html_url="https://testing.example.org/test-repo/releases/v1.0.0",
+                                              tag_name="v1.0.0") for _ in range(1))
+
+    get_repo.side_effect(None).get_releases.side_effect = get_releases
+    fetching.clear()
+    responses: list[dict] = [{}, {}]
+
+    def validate(index: int, request_data: dict) -> None:
+        response = api.app.test_client().post("/validate", data=json.dumps(
+            {"accessToken": "", "repoName": "owner/test-repo", "repoType": "FAIRSoftware", **request_data}))
+        responses[index] = response.json
+
+    budgeted_request = threading.Thread(target=validate, args=(0, {"timeBudget": 1.5}))
+    budgeted_request.start()
+    assert fetching.wait(5)
+    validate(1, {})
+    budgeted_request.join()
+
+    assert get_coalesced_requests("validation") == 1
+    assert responses[0]["timedOutFetchers"] == ["ReleasesIncludingIncrementCheck"]
+    assert "timedOutFetchers" not in responses[1]
+    assert "undeterminedCriteria" not in responses[1]
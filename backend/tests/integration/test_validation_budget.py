@@ -0,0 +1,79 @@
+import json
+import time
+from types import SimpleNamespace
+
+import pytest
+from pytest_mock import MockerFixture
+from unittest.mock import MagicMock
+
+from backend import api, shacl_validator
+
+time_budget = 1
+
+
+class SlowReleases:
+    # Paginated list of releases of which each takes longer to fetch than the time budget allows for all of them
+    totalCount = 100
+
+    def __iter__(self):
+        for index in range(self.totalCount):
+            time.sleep(time_budget / 20)
+            yield SimpleNamespace(html_url=f"https://testing.example.org/test-repo/releases/v1.0.{index}",
+                                  tag_name=f"v1.0.{index}")
+
+
+@pytest.fixture
+def slow_github_repo(mocker: MockerFixture) -> MagicMock:
+    github_repo_mock = mocker.patch("github.MainClass.Github.get_repo")
+    github_repo_mock.return_value.html_url = "https://testing.example.org/test-repo"
+    github_repo_mock.return_value.private = False
+    github_repo_mock.return_value.description = "A test repository"
+    github_repo_mock.return_value.default_branch = "main"
+    github_repo_mock.return_value.get_branches.return_value = [SimpleNamespace(name="main")]
+    github_repo_mock.return_value.get_git_tree.return_value = SimpleNamespace(tree=[])
+    github_repo_mock.return_value.get_readme.return_value = SimpleNamespace(
+        html_url="https://testing.example.org/test-repo/blob/main/README.md", decoded_content=b"# Usage\nRun it.\n")
+    github_repo_mock.return_value.get_releases.return_value = SlowReleases()
+    # A request that does not return in time at all
+    github_repo_mock.return_value.get_license.side_effect = lambda: time.sleep(3 * time_budget)
+    return github_repo_mock
+
+
+def test_criteria_of_timed_out_fetchers_are_undetermined(slow_github_repo: MagicMock) -> None:
+    client = api.app.test_client()
+    time_start = time.perf_counter()
+    response = client.post("/validate", data=json.dumps({"accessToken": "", "repoName": "owner/test-repo",
+                                                         "repoType": "FAIRSoftware", "timeBudget": time_budget}))
+    assert time.perf_counter() - time_start < 2 * time_budget
+
+    assert response.json["timedOutFetchers"] == ["License", "ReleasesIncludingIncrementCheck"]
+    # A persistent ID can also be given by the releases.
+    assert response.json["undeterminedCriteria"] == ["ExactlyOneLicense", "PersistentId", "SemanticVersioning"]
+    violated_shapes = {violation["sourceShape"].split("/")[-1] for violation in response.json["violations"]}
+    assert "ExplicitCitation" in violated_shapes
+    assert not violated_shapes & {"ExactlyOneLicense", "PersistentId", "SemanticVersioning"}
+    assert response.json["numberOfViolations"] == len(response.json["violations"])
+
+
+def test_validation_without_budget_waits_for_all_fetchers(slow_github_repo: MagicMock, mocker: MockerFixture) -> None:
+    slow_github_repo.return_value.get_license.side_effect = None
+    slow_github_repo.return_value.get_license.return_value = None
+    mocker.patch.object(SlowReleases, "totalCount", 5)
+    _, results_graph, _ = shacl_validator.validate_repo(repo_name="owner/test-repo", expected_type="FAIRSoftware")
+
+    violated_shapes = {violation["sourceShape"].split("/")[-1]
+                       for violation in shacl_validator.get_violations(results_graph)}
+    assert "ExactlyOneLicense" in violated_shapes
+    assert "SemanticVersioning" not in violated_shapes
+
+
+def test_fetchers_that_exceed_their_time_slice_do_not_delay_the_others(slow_github_repo: MagicMock,
+                                                                        mocker: MockerFixture) -> None:
+    # With a single worker, the fetchers run one after another, so slow releases would use up the whole budget.
+    mocker.patch.object(shacl_validator, "fetch_pool_size", 1)
+    slow_github_repo.return_value.get_license.side_effect = None
+    slow_github_repo.return_value.get_license.return_value = None
+    with shacl_validator.validation_budget.budget(time_budget) as request_budget:
+        shacl_validator.validate_repo(repo_name="owner/test-repo", expected_type="FAIRSoftware")
+
+    assert request_budget.timed_out_fetchers == ["ReleasesIncludingIncrementCheck"]
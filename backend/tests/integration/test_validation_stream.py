@@ -0,0 +1,45 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from pytest_mock import MockerFixture
+from unittest.mock import MagicMock
+
+from backend.api import app
+
+
+@pytest.fixture
+def github_repo(mocker: MockerFixture) -> MagicMock:
+    github_repo_mock = mocker.patch("github.MainClass.Github.get_repo")
+    github_repo_mock.return_value.html_url = "https://testing.example.org/test-repo"
+    github_repo_mock.return_value.private = True
+    github_repo_mock.return_value.default_branch = "main"
+    github_repo_mock.return_value.get_branches.return_value = [SimpleNamespace(name="main")]
+    return github_repo_mock
+
+
+def parse_events(stream: str) -> list[tuple[str, dict]]:
+    events = []
+    for message in stream.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in message.splitlines() if not line.startswith(":"))
+        if fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_stream_sends_result_of_each_repository(github_repo: MagicMock) -> None:
+    response = app.test_client().get(
+        "/validate/stream?repoName=owner/test-repo&repoType=OngoingResearchProject&repoName=owner/test-repo"
+        "&repoType=OngoingResearchProject&repoName=owner/other-repo&repoType=OngoingResearchProject",
+        headers={"Authorization": "token test-token"})
+    assert response.mimetype == "text/event-stream"
+
+    events = parse_events(response.get_data(as_text=True))
+    assert [event for event, _ in events] == ["result", "result", "done"]
+    results = {result["repoName"]: result for _, result in events[:2]}
+    # Repositories that are requested multiple times are validated once.
+    assert results["owner/test-repo"]["positions"] == [0, 1]
+    assert results["owner/other-repo"]["positions"] == [2]
+    assert results["owner/test-repo"]["numberOfViolations"] == len(results["owner/test-repo"]["verbalized"]) > 0
+    assert events[-1][1] == {"numberOfRepositories": 3}
+    assert github_repo.call_count == 2
@@ -0,0 +1,71 @@
+from pyshacl import validate
+from rdflib import Graph, Literal, Namespace, URIRef
+from rdflib.namespace import RDF
+
+from backend.compiled_validator import CompiledShapes
+
+ex = Namespace("https://testing.example.org/")
+
+shapes = """
+@prefix ex: <https://testing.example.org/> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@prefix sh: <http://www.w3.org/ns/shacl#> .
+
+ex:MainBranch a sh:PropertyShape ;
+    sh:path ( ex:hasBranch ex:name ) ;
+    sh:qualifiedValueShape [ sh:pattern "^main$" ] ;
+    sh:qualifiedMinCount 1 ;
+    sh:message "There is no branch named main." .
+
+ex:DescriptionOrReadme a sh:NodeShape ;
+    sh:or ( [ sh:path ex:description ; sh:minCount 1 ] [ sh:path ex:readme ; sh:minCount 1 ] ) ;
+    sh:message "There is neither a description nor a README file." .
+
+ex:Project a rdfs:Class, sh:NodeShape ;
+    sh:property ex:MainBranch ;
+    sh:node ex:DescriptionOrReadme .
+"""
+
+
+def create_data_graph(*branch_names: str, description: str | None = None) -> Graph:
+    graph = Graph()
+    repo = URIRef("https://testing.example.org/test-repo")
+    graph.add((repo, RDF.type, ex.Project))
+    for branch_name in branch_names:
+        branch = URIRef(f"https://testing.example.org/test-repo/tree/{branch_name}")
+        graph.add((repo, ex.hasBranch, branch))
+        graph.add((branch, ex.name, Literal(branch_name)))
+    if description:
+        graph.add((repo, ex.description, Literal(description)))
+    return graph
+
+
+def validate_with_pyshacl(shapes_graph: Graph, data_graph: Graph) -> tuple[bool, Graph, str]:
+    return validate(data_graph, shacl_graph=shapes_graph, inference="rdfs")
+
+
+def test_report_matches_pyshacl() -> None:
+    shapes_graph = Graph().parse(data=shapes, format="turtle")
+    compiled_shapes = CompiledShapes(shapes_graph)
+
+    for data_graph in (create_data_graph("main", description="placeholder"), create_data_graph("dev"),
+                       create_data_graph()):
+        conforms, _, result_text = compiled_shapes.validate(data_graph)
+        expected_conforms, _, expected_result_text = validate_with_pyshacl(shapes_graph, data_graph)
+        assert conforms == expected_conforms
+        assert result_text == expected_result_text
+
+
+def test_results_graph_contains_source_shapes() -> None:
+    shapes_graph = Graph().parse(data=shapes, format="turtle")
+    _, results_graph, _ = CompiledShapes(shapes_graph).validate(create_data_graph("dev"))
+
+    source_shapes = set(results_graph.objects(None, URIRef("http://www.w3.org/ns/shacl#sourceShape")))
+    assert {ex.MainBranch, ex.Project} <= source_shapes
+
+
+def test_explicit_targets_fall_back_to_pyshacl() -> None:
+    shapes_graph = Graph().parse(data=shapes, format="turtle")
+    shapes_graph.add((ex.MainBranch, URIRef("http://www.w3.org/ns/shacl#targetNode"), ex.Other))
+
+    assert CompiledShapes(shapes_graph).validate(create_data_graph("main")) is None
@@ -0,0 +1,76 @@
+from collections.abc import Iterator
+from types import SimpleNamespace
+
+import pytest
+from pytest_mock import MockerFixture
+from unittest.mock import MagicMock
+
+from backend.fetch_planner import create_fetch_plan, get_fetch_limits, merge_fetch_plans
+from backend.github_graphql import build_connection_query
+from backend.shacl_validator import get_project_type_shapes_graph, validate_repo_against_specs
+
+
+def test_requirements_are_derived_from_paths() -> None:
+    fetch_plan = create_fetch_plan(get_project_type_shapes_graph("OngoingResearchProject"))
+    assert fetch_plan.requirements == ["Visibility", "Branches"]
+
+
+def test_readme_is_fetched_once_for_all_checks() -> None:
+    # The README file has to exist (DescriptionOrReadme), contain a DOI (PersistentId) and several sections.
+    requirements = create_fetch_plan(get_project_type_shapes_graph("FAIRSoftware")).requirements
+    assert [requirement for requirement in requirements if requirement.startswith("Readme")] == [
+        "ReadmeIncludingSectionsAndCheckForDoi"]
+    assert "BranchesIncludingRootDirFilesOfDefaultBranch" in requirements
+    assert "ReleasesIncludingIncrementCheck" in requirements
+
+
+def test_limits_of_cardinality_constraints() -> None:
+    # "NoOpenIssues" needs a single open issue, "AtLeastOneRelease" a single release and "AtLeastTwoBranches" two
+    # branches to reach the verdict.
+    assert get_fetch_limits(get_project_type_shapes_graph("FinishedResearchProject")) == {"issues": 1, "releases": 1}
+    assert get_fetch_limits(get_project_type_shapes_graph("OngoingResearchProject")) == {"branches": 2}
+
+
+def test_no_limits_for_constraints_on_each_item() -> None:
+    # The tags of all releases have to follow Semantic Versioning and each branch is checked for its files.
+    assert get_fetch_limits(get_project_type_shapes_graph("FAIRSoftware")) == {}
+
+
+@pytest.fixture
+def fetched_branches(mocker: MockerFixture) -> list[str]:
+    fetched: list[str] = []
+
+    def get_branches() -> Iterator[SimpleNamespace]:
+        for index in range(1000):
+            fetched.append(f"branch-{index}")
+            yield SimpleNamespace(name=f"branch-{index}")
+
+    github_repo_mock: MagicMock = mocker.patch("github.MainClass.Github.get_repo")
+    github_repo_mock.return_value.html_url = "https://testing.example.org/test-repo"
+    github_repo_mock.return_value.private = True
+    github_repo_mock.return_value.default_branch = "branch-0"
+    github_repo_mock.return_value.get_branches.side_effect = get_branches
+    return fetched
+
+
+def test_pagination_stops_at_limit(fetched_branches: list[str]) -> None:
+    _, number_of_violations, _ = validate_repo_against_specs(repo_name="test-repo",
+                                                             expected_type="OngoingResearchProject")
+    assert number_of_violations == 0
+    assert len(fetched_branches) == 2
+
+
+def test_graphql_connections_request_only_needed_nodes() -> None:
+    assert "first: 2" in build_connection_query("branches", {"branches": 2})
+    assert "first: 100" in build_connection_query("releases", {"branches": 2})
+
+
+def test_readme_is_only_read_until_the_checked_sections_are_found() -> None:
+    assert create_fetch_plan(get_project_type_shapes_graph("FAIRSoftware")).readme_sections == {
+        "hasInstallationInstructions", "hasUsageNotes", "softwareRequirements", "citation"}
+    teaching_tool_plan = create_fetch_plan(get_project_type_shapes_graph("TeachingTool"))
+    internal_documentation_plan = create_fetch_plan(get_project_type_shapes_graph("InternalDocumentation"))
+    merged_plan = merge_fetch_plans([teaching_tool_plan, internal_documentation_plan])
+    assert merged_plan.readme_sections == {"hasUsageNotes", "hasPurpose"}
+    assert merged_plan.covers(teaching_tool_plan)
+    assert not teaching_tool_plan.covers(merged_plan)
@@ -0,0 +1,109 @@
+import time
+
+import pytest
+from pytest_mock import MockerFixture
+from unittest.mock import MagicMock
+
+from backend import github_http_cache
+from backend.github_http_cache import CachingHTTPSConnection, ResponseCache
+
+url = "/repos/owner/test-repo"
+
+
+def response(status: int, headers: dict[str, str], body: str = "") -> MagicMock:
+    mock = MagicMock()
+    mock.status_code = status
+    mock.headers = headers
+    mock.text = body
+    return mock
+
+
+@pytest.fixture
+def connection(mocker: MockerFixture) -> CachingHTTPSConnection:
+    mocker.patch.object(CachingHTTPSConnection, "cache", ResponseCache(":memory:", 1024))
+    mocker.patch.object(CachingHTTPSConnection, "shared_session", MagicMock())
+    github_http_cache.cache_metrics.clear()
+    return CachingHTTPSConnection("api.github.com")
+
+
+def send_request(connection: CachingHTTPSConnection, token: str = "token 1") -> str:
+    connection.request("GET", url, None, {"Authorization": token})
+    return connection.getresponse().read()
+
+
+def test_not_modified_response_is_served_from_cache(connection: CachingHTTPSConnection) -> None:
+    connection.session.get.side_effect = [response(200, {"ETag": '"abc"'}, '{"name": "test-repo"}'),
+                                          response(304, {"X-RateLimit-Remaining": "4999"})]
+
+    assert send_request(connection) == '{"name": "test-repo"}'
+    assert send_request(connection) == '{"name": "test-repo"}'
+    assert connection.session.get.call_args.kwargs["headers"]["If-None-Match"] == '"abc"'
+    assert github_http_cache.get_cache_metrics() == {"hit": 0, "revalidated": 1, "miss": 1}
+
+
+def test_fresh_response_is_revalidated_by_default(connection: CachingHTTPSConnection) -> None:
+    connection.session.get.side_effect = [
+        response(200, {"ETag": '"abc"', "Cache-Control": "private, max-age=60"}, "{}"),
+        response(200, {"ETag": '"def"', "Cache-Control": "private, max-age=60"}, '{"description": "Fixed"}')]
+
+    send_request(connection)
+    assert send_request(connection) == '{"description": "Fixed"}'
+    assert connection.session.get.call_args.kwargs["headers"]["If-None-Match"] == '"abc"'
+    assert github_http_cache.get_cache_metrics()["hit"] == 0
+
+
+def test_fresh_response_is_served_without_request(connection: CachingHTTPSConnection, mocker: MockerFixture) -> None:
+    mocker.patch.object(github_http_cache, "trust_max_age", True)
+    connection.session.get.return_value = response(200, {"ETag": '"abc"', "Cache-Control": "private, max-age=60"},
+                                                   "{}")
+
+    send_request(connection)
+    send_request(connection)
+    assert connection.session.get.call_count == 1
+    assert github_http_cache.get_cache_metrics()["hit"] == 1
+
+
+def test_responses_are_not_shared_between_tokens(connection: CachingHTTPSConnection) -> None:
+    connection.session.get.return_value = response(200, {"ETag": '"abc"'}, "{}")
+
+    send_request(connection, "token 1")
+    send_request(connection, "token 2")
+    assert "If-None-Match" not in connection.session.get.call_args.kwargs["headers"]
+
+
+def test_tokens_of_the_pool_share_their_responses(connection: CachingHTTPSConnection, mocker: MockerFixture) -> None:
+    scheduler = mocker.patch.object(github_http_cache.token_scheduler, "scheduler")
+    scheduler.acquire.side_effect = ["token a", "token b"]
+    scheduler.record.return_value = False
+    connection.session.get.side_effect = [response(200, {"ETag": '"abc"'}, "{}"), response(304, {})]
+
+    send_request(connection, github_http_cache.token_scheduler.pool_authorization)
+    assert send_request(connection, github_http_cache.token_scheduler.pool_authorization) == "{}"
+    headers = connection.session.get.call_args.kwargs["headers"]
+    assert headers["Authorization"] == "token b"
+    assert headers["If-None-Match"] == '"abc"'
+
+
+def test_size_of_responses_is_counted_in_bytes() -> None:
+    cache = ResponseCache(":memory:", 300)
+    cache.put("a", {"etag": "a"}, "ä" * 100)
+    cache.put("b", {"etag": "b"}, "ä" * 100)
+
+    assert cache.get("a") is None
+    assert cache.get("b") is not None
+
+
+def test_least_recently_used_response_is_evicted() -> None:
+    cache = ResponseCache(":memory:", 300)
+    for key in ("a", "b", "c"):
+        cache.put(key, {"etag": key}, "x" * 100)
+
+    assert cache.get("a") is None
+    assert cache.get("c") is not None
+
+
+def test_requests_after_the_deadline_of_the_fetcher_are_not_sent(connection: CachingHTTPSConnection) -> None:
+    validation_budget = github_http_cache.validation_budget
+    with validation_budget.fetching_until(time.monotonic() - 1), pytest.raises(validation_budget.DeadlineExceeded):
+        send_request(connection)
+    connection.session.get.assert_not_called()
@@ -0,0 +1,32 @@
+import pytest
+
+from backend import instrumentation
+from backend.instrumentation import get_histograms, record, span, trace
+
+
+def test_spans_are_added_to_enclosing_traces() -> None:
+    with trace() as request_trace:
+        with span("request"):
+            with trace() as validation_trace:
+                record("validation", 0.2)
+                record("validation", 0.1)
+            record("verbalization", 0.01)
+
+    assert validation_trace.get_durations() == {"validation": pytest.approx(0.3)}
+    assert set(request_trace.get_durations()) == {"validation", "verbalization", "request"}
+    # Spans outside of a trace are only aggregated.
+    record("shapes_load", 0.05)
+    assert instrumentation.current_trace.get() is None
+
+
+def test_durations_are_aggregated_into_histograms() -> None:
+    instrumentation.clear_histograms()
+    for duration in (0.003, 0.2, 0.4, 3):
+        record("fetch.Branches", duration)
+
+    histogram = get_histograms()["fetch.Branches"]
+    assert histogram["count"] == 4
+    assert histogram["sum"] == pytest.approx(3.603)
+    assert histogram["buckets"][0.005] == 1
+    assert histogram["buckets"][0.5] == 3
+    assert histogram["buckets"][120] == 4
@@ -0,0 +1,55 @@
+import sqlite3
+from pathlib import Path
+
+from backend.job_queue import JobQueue, priorities
+
+
+def run_job(access_token: str, repo_name: str, repo_type: str, include_report: bool) -> dict:
+    if repo_name == "owner/missing-repo":
+        raise ValueError("Not Found")
+    return {"repoName": repo_name, "returnCode": 0}
+
+
+def test_interactive_jobs_are_run_before_bulk_jobs() -> None:
+    queue = JobQueue(":memory:", 0, run_job, start=False)
+    bulk_jobs = [queue.submit("", f"owner/bulk-repo-{index}", "FAIRSoftware", priority="bulk") for index in range(2)]
+    interactive_job = queue.submit("", "owner/test-repo", "FAIRSoftware")
+
+    assert queue.claim(max(priorities.values()))[0] == interactive_job
+    # The thread that is reserved for interactive jobs does not run bulk jobs.
+    assert queue.claim(priorities["interactive"]) is None
+    assert [queue.claim(priorities["bulk"])[0] for _ in bulk_jobs] == bulk_jobs
+
+
+def test_jobs_record_result_or_error() -> None:
+    queue = JobQueue(":memory:", 0, run_job, start=False)
+    job_ids = [queue.submit("secret", repo_name, "FAIRSoftware") for repo_name in ("owner/test-repo",
+                                                                                   "owner/missing-repo")]
+    assert queue.get(job_ids[0])["status"] == "queued"
+
+    while queue.run_next(max(priorities.values())):
+        pass
+
+    assert queue.get(job_ids[0])["status"] == "succeeded"
+    assert queue.get(job_ids[0])["result"] == {"repoName": "owner/test-repo", "returnCode": 0}
+    assert queue.get(job_ids[1])["status"] == "failed"
+    assert queue.get(job_ids[1])["error"] == "Not Found"
+    assert queue.get("unknown") is None
+
+
+def test_queued_jobs_survive_restart_without_access_tokens(tmp_path: Path) -> None:
+    path = str(tmp_path / "job_queue.sqlite")
+    stopped_queue = JobQueue(path, 0, run_job, start=False)
+    job_without_token = stopped_queue.submit("", "owner/test-repo", "FAIRSoftware", priority="bulk")
+    job_with_token = stopped_queue.submit("secret", "owner/private-repo", "FAIRSoftware")
+    # The process stopped sending heartbeats.
+    stopped_queue.connection.execute("UPDATE processes SET heartbeat_at = 0")
+
+    queue = JobQueue(path, 0, run_job, start=False)
+    queue.recover_jobs()
+    assert queue.get(job_with_token)["status"] == "failed"
+    assert queue.run_next(max(priorities.values()))
+    assert queue.get(job_without_token)["status"] == "succeeded"
+
+    dump = "\n".join(sqlite3.connect(path).iterdump())
+    assert "secret" not in dump
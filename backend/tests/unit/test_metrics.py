@@ -0,0 +1,30 @@
+from pytest_mock import MockerFixture
+
+from backend import metrics
+
+
+def test_metrics_are_rendered_in_prometheus_format() -> None:
+    metrics.counters.clear()
+    metrics.histograms.clear()
+    metrics.increment("quare_violations_total", {"repo_type": "FAIRSoftware", "shape": "PersistentId"}, 2)
+    metrics.observe("quare_validation_duration_seconds", 0.3, {"repo_type": "FAIRSoftware"})
+    metrics.observe("quare_validation_duration_seconds", 4, {"repo_type": "FAIRSoftware"})
+
+    lines = metrics.render().splitlines()
+    assert "# TYPE quare_violations_total counter" in lines
+    assert 'quare_violations_total{repo_type="FAIRSoftware",shape="PersistentId"} 2' in lines
+    assert 'quare_validation_duration_seconds_bucket{repo_type="FAIRSoftware",le="0.5"} 1' in lines
+    assert 'quare_validation_duration_seconds_bucket{repo_type="FAIRSoftware",le="+Inf"} 2' in lines
+    assert 'quare_validation_duration_seconds_count{repo_type="FAIRSoftware"} 2' in lines
+
+
+def test_label_values_are_escaped() -> None:
+    assert metrics.format_sample("metric", (("label", 'a "quoted"\nvalue'),), 1) == \
+           'metric{label="a \\"quoted\\"\\nvalue"} 1'
+
+
+def test_samples_are_labelled_with_the_worker(mocker: MockerFixture) -> None:
+    mocker.patch.object(metrics, "worker_labels", ())
+    metrics.set_worker(4242)
+    assert metrics.format_sample("metric", (("label", "value"),), 1) == 'metric{worker="4242",label="value"} 1'
+    assert metrics.format_sample("metric", (), 1) == 'metric{worker="4242"} 1'
@@ -0,0 +1,32 @@
+from rdflib import URIRef
+from rdflib.namespace import RDF
+
+from backend.shacl_validator import get_project_type_shapes_graph, sh, shapes_graph, types
+
+property_shapes = "https://example.org/repo/property-shapes/"
+
+
+def test_shapes_graph_only_contains_shapes_of_project_type() -> None:
+    project_type_shapes_graph = get_project_type_shapes_graph("OngoingResearchProject")
+
+    assert set(project_type_shapes_graph.subjects(RDF.type, sh["PropertyShape"])) == {
+        URIRef(f"{property_shapes}PrivateRepository"), URIRef(f"{property_shapes}AtLeastTwoBranches")}
+    assert (types["TeachingTool"], None, None) not in project_type_shapes_graph
+
+
+def test_shapes_graph_contains_referenced_node_shapes_and_lists() -> None:
+    project_type_shapes_graph = get_project_type_shapes_graph("FAIRSoftware")
+
+    # Every shape that is referenced by the project type has to be fully contained, down to the RDF lists of paths
+    # and logical constraints.
+    for _, _, obj in project_type_shapes_graph:
+        if (obj, None, None) in shapes_graph:
+            assert (obj, None, None) in project_type_shapes_graph
+    assert len(project_type_shapes_graph) < len(shapes_graph)
+
+
+def test_shapes_graph_of_later_added_project_type() -> None:
+    shapes_graph.parse("./tests/integration/references/test_project_shapes.ttl")
+    project_type_shapes_graph = get_project_type_shapes_graph("TestPublicRepository")
+
+    assert (types["TestPublicRepository"], sh["property"], None) in project_type_shapes_graph
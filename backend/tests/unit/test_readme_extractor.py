@@ -0,0 +1,127 @@
+import base64
+from collections.abc import Iterator
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from github.ContentFile import ContentFile
+from pytest_mock import MockerFixture
+from unittest.mock import MagicMock, PropertyMock
+from rdflib import Graph, Literal, URIRef
+
+from backend import readme_extractor, shacl_validator
+from backend.readme_extractor import extract_readme, get_readme_content, read_lines
+
+readmes_path = Path(__file__).parent / "references" / "readmes"
+# README files on which the streaming extractor deliberately differs from the Markdown rendering (see below)
+diverging_readmes = {"fenced_code"}
+
+
+def create_readme_representation(mocker: MockerFixture, extractor: str, content: bytes) -> set[tuple]:
+    mocker.patch.object(shacl_validator, "readme_extractor", extractor)
+    readme = SimpleNamespace(html_url="https://github.com/owner/test-repo/blob/main/README.md",
+                             decoded_content=content)
+    graph = Graph()
+    shacl_validator.include_readme_with_sections_and_check_for_doi(
+        graph, URIRef("https://github.com/owner/test-repo"), SimpleNamespace(get_readme=lambda: readme))
+    # The HTML keeps the line breaks of the Markdown paragraphs, which the streaming extractor collapses.
+    return {(subject, predicate, Literal(" ".join(value.split())) if isinstance(value, Literal) else value)
+            for subject, predicate, value in graph}
+
+
+@pytest.mark.parametrize("readme_path", sorted(path for path in readmes_path.glob("*.md")
+                                                if path.stem not in diverging_readmes), ids=lambda path: path.stem)
+def test_streaming_extractor_matches_markdown_rendering(mocker: MockerFixture, readme_path: Path) -> None:
+    content = readme_path.read_bytes()
+    assert create_readme_representation(mocker, "streaming", content) == \
+        create_readme_representation(mocker, "markdown", content)
+
+
+def test_fenced_code_blocks_differ_from_markdown_rendering(mocker: MockerFixture) -> None:
+    # Python-Markdown is used without the fenced code extension, so it renders the fences as text and the comments in
+    # them as headings: "# Install the dependencies first" ends the installation instructions and starts a section
+    # with the software requirements. The streaming extractor keeps fenced code blocks (including blank lines and
+    # comments) in the section they belong to, which is the accepted difference between both paths.
+    content = (readmes_path / "fenced_code.md").read_bytes()
+    repo = URIRef("https://github.com/owner/test-repo")
+    usage_notes = (repo, shacl_validator.sd["hasUsageNotes"],
+                   Literal("Run example-tool in the directory of the project."))
+    streaming_representation = create_readme_representation(mocker, "streaming", content)
+    markdown_representation = create_readme_representation(mocker, "markdown", content)
+
+    assert streaming_representation - markdown_representation == {
+        (repo, shacl_validator.sd["hasInstallationInstructions"],
+         Literal("sh # Install the dependencies first pip install example-tool example-tool --version"))}
+    assert markdown_representation - streaming_representation == {
+        (repo, shacl_validator.sd["hasInstallationInstructions"], Literal("```sh")),
+        (repo, shacl_validator.sd["hasInstallationInstructions"],
+         Literal("pip install example-tool example-tool --version ```")),
+        (repo, shacl_validator.sd["softwareRequirements"],
+         Literal("pip install example-tool example-tool --version ```"))}
+    assert usage_notes in streaming_representation & markdown_representation
+
+
+def test_sections_and_doi() -> None:
+    extract = extract_readme((readmes_path / "python_package.md").read_text().splitlines())
+    assert extract.contains_doi
+    assert [property_name for property_name, _ in extract.sections] == [
+        "hasPurpose", "softwareRequirements", "hasInstallationInstructions", "hasInstallationInstructions",
+        "hasUsageNotes", "citation"]
+    assert ("softwareRequirements", "Python >= 3.10 rdflib 7.x git on the PATH") in extract.sections
+
+
+def test_comments_in_fenced_code_blocks_are_not_headings() -> None:
+    extract = extract_readme(["# Usage", "", "```sh", "# Install the dependencies first", "make", "```"])
+    assert extract.sections == [("hasUsageNotes", "sh # Install the dependencies first make")]
+
+
+def test_reading_stops_once_all_sections_and_a_doi_are_found() -> None:
+    read_lines_count = 0
+
+    def lines() -> Iterator[str]:
+        nonlocal read_lines_count
+        for line in ["# Usage", "Run it.", "# Citation", "https://doi.org/10.5281/zenodo.1234567", "# License"]:
+            read_lines_count += 1
+            yield line
+        raise AssertionError("The README file was read completely.")
+
+    extract = extract_readme(lines(), sections={"hasUsageNotes"}, check_for_doi=True)
+    assert extract.sections == [("hasUsageNotes", "Run it.")]
+    assert extract.contains_doi
+    assert read_lines_count == 4
+
+
+def test_sections_are_truncated_to_an_excerpt(mocker: MockerFixture) -> None:
+    mocker.patch.object(readme_extractor, "excerpt_length", 20)
+    extract = extract_readme(["# Installation", "", "word " * 1000, "", "# Usage", "Run it."],
+                             sections={"hasInstallationInstructions"}, check_for_doi=False)
+    assert extract.sections == [("hasInstallationInstructions", "word word word word")]
+
+
+def test_large_readme_files_are_capped(mocker: MockerFixture) -> None:
+    content = b"# Usage\n" + b"x" * 200_000 + b"\n# Citation\n" + b"y" * 100 + b"\n"
+    assert [len(line) for line in read_lines(content, max_bytes=150_000)] == [8, readme_extractor.max_line_bytes]
+    assert [line.rstrip() for line in read_lines(content)][2:] == ["# Citation", "y" * 100]
+
+    # Only the beginning of the base64-encoded content of the REST API is decoded.
+    mocker.patch.object(readme_extractor, "readme_max_bytes", 1000)
+    readme = SimpleNamespace(encoding="base64", content=base64.encodebytes(content).decode())
+    assert get_readme_content(readme) == content[:1000]
+
+
+def test_readme_files_without_content_are_downloaded_up_to_the_cap(mocker: MockerFixture) -> None:
+    # The REST API returns README files larger than 1 MB without their content.
+    mocker.patch.object(readme_extractor, "readme_max_bytes", 1000)
+    readme = MagicMock(spec=ContentFile, encoding="none", content="",
+                       download_url="https://raw.githubusercontent.com/owner/test-repo/main/README.md")
+    type(readme).decoded_content = PropertyMock(side_effect=AssertionError("unsupported encoding: none"))
+    response = MagicMock()
+    response.iter_content.return_value = iter([b"# Usage\n" + b"x" * 600, b"y" * 600, b"z" * 600])
+    get = mocker.patch("requests.get")
+    get.return_value.__enter__.return_value = response
+
+    content = get_readme_content(readme)
+    assert content == (b"# Usage\n" + b"x" * 600 + b"y" * 600)[:1000]
+    assert get.call_args.args == ("https://raw.githubusercontent.com/owner/test-repo/main/README.md",)
+    assert get.call_args.kwargs["headers"] == {"Range": "bytes=0-999"}
+    assert get.call_args.kwargs["stream"]
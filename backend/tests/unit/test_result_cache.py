@@ -0,0 +1,36 @@
+from pathlib import Path
+
+from pytest_mock import MockerFixture
+
+from backend import result_cache
+from backend.result_cache import ResultCache
+
+result = (1, 1, [{"sourceShape": "https://example.org/repo/AtLeastOneRelease"}], None)
+
+
+def test_results_survive_restarts(tmp_path: Path) -> None:
+    path = str(tmp_path / "result_cache.sqlite")
+    ResultCache(path, 16, 60).put("key", result)
+
+    cached_result, _ = ResultCache(path, 16, 60).get("key")
+    assert cached_result == result
+
+
+def test_least_recently_used_results_are_evicted_from_memory() -> None:
+    cache = ResultCache(":memory:", 2, 60)
+    cache.put("first", result)
+    cache.put("second", result)
+    cache.get("first")
+    cache.put("third", result)
+
+    assert list(cache.entries) == ["first", "third"]
+    # Evicted results are still found in the SQLite tier.
+    assert cache.get("second") is not None
+
+
+def test_expired_results_are_not_used(mocker: MockerFixture) -> None:
+    cache = ResultCache(":memory:", 16, 60)
+    cache.put("key", result)
+
+    mocker.patch.object(result_cache.time, "time", return_value=result_cache.time.time() + 61)
+    assert cache.get("key") is None
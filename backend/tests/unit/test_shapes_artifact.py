@@ -0,0 +1,46 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from rdflib.compare import isomorphic
+
+from backend import shacl_validator
+from backend.shapes_artifact import get_shapes_hash, load_artifact, save_artifact
+
+# Modules that are only imported when they are used for the first time
+lazily_imported_modules = ["github", "pyshacl", "markdown", "bs4", "fire", "requests"]
+
+
+def test_import_does_not_load_heavy_dependencies() -> None:
+    script = (f"import json, sys; import shacl_validator; "
+              f"print(json.dumps([module for module in {lazily_imported_modules} if module in sys.modules]))")
+    process = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, check=True)
+    assert json.loads(process.stdout) == []
+
+
+def test_artifact_is_reused_for_unchanged_shapes(tmp_path: Path) -> None:
+    shapes_hash = get_shapes_hash(shacl_validator.shapes_files)
+    save_artifact(shapes_hash, {"project_type_shapes_graphs": shacl_validator.project_type_shapes_graphs,
+                                "project_type_fetch_plans": shacl_validator.project_type_fetch_plans}, str(tmp_path))
+
+    artifact = load_artifact(shapes_hash, str(tmp_path))
+    assert artifact["project_type_fetch_plans"] == shacl_validator.project_type_fetch_plans
+    assert isomorphic(artifact["project_type_shapes_graphs"]["FAIRSoftware"],
+                      shacl_validator.project_type_shapes_graphs["FAIRSoftware"])
+
+
+def test_artifact_is_invalidated_by_changed_shapes(tmp_path: Path) -> None:
+    shapes_file = tmp_path / "shapes.ttl"
+    shapes_file.write_text("@prefix sh: <http://www.w3.org/ns/shacl#> .")
+    shapes_hash = get_shapes_hash([str(shapes_file)])
+    save_artifact(shapes_hash, {"shapes_graph": None}, str(tmp_path))
+
+    shapes_file.write_text("@prefix sh: <http://www.w3.org/ns/shacl#> . # changed")
+    changed_shapes_hash = get_shapes_hash([str(shapes_file)])
+    assert changed_shapes_hash != shapes_hash
+    assert load_artifact(changed_shapes_hash, str(tmp_path)) is None
+
+    # Only the artifact of the current shapes is kept.
+    save_artifact(changed_shapes_hash, {"shapes_graph": None}, str(tmp_path))
+    assert [path.name for path in tmp_path.glob("shapes_*.pickle")] == [f"shapes_{changed_shapes_hash[:16]}.pickle"]
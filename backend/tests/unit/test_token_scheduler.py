@@ -0,0 +1,70 @@
+import time
+
+import pytest
+from pytest_mock import MockerFixture
+from unittest.mock import MagicMock
+
+from backend.github_http_cache import CachingHTTPSConnection, ResponseCache
+from backend.token_scheduler import TokenScheduler, pool_authorization
+
+
+def rate_limit_headers(remaining: int, reset_in: float = 3600, resource: str = "core") -> dict[str, str]:
+    return {"x-ratelimit-remaining": str(remaining), "x-ratelimit-limit": "5000",
+            "x-ratelimit-reset": str(time.time() + reset_in), "x-ratelimit-resource": resource}
+
+
+def test_requests_are_routed_to_token_with_most_headroom() -> None:
+    scheduler = TokenScheduler(["first", "second"])
+    scheduler.record("token first", "core", 200, rate_limit_headers(10))
+    scheduler.record("token second", "core", 200, rate_limit_headers(4000))
+
+    assert scheduler.acquire(pool_authorization, "core") == "token second"
+    # The GraphQL API has a rate limit of its own.
+    scheduler.record("token second", "graphql", 200, rate_limit_headers(0, resource="graphql"))
+    assert scheduler.acquire(pool_authorization, "graphql") == "token first"
+
+
+def test_requests_wait_for_reset_of_exhausted_token() -> None:
+    scheduler = TokenScheduler([])
+    assert not scheduler.record("token user", "core", 200, rate_limit_headers(0, reset_in=0.3))
+
+    time_start = time.perf_counter()
+    assert scheduler.acquire("token user", "core") == "token user"
+    assert time.perf_counter() - time_start >= 0.25
+
+
+def test_secondary_rate_limit_blocks_token_for_retry_after() -> None:
+    scheduler = TokenScheduler(["first", "second"])
+    assert scheduler.record("token first", "core", 403, {**rate_limit_headers(100), "retry-after": "60"})
+
+    assert [scheduler.acquire(pool_authorization, "core") for _ in range(3)] == ["token second"] * 3
+    assert scheduler.get_quota()[0]["blockedFor"] > 59
+
+
+def test_states_of_tokens_are_dropped_after_the_reset() -> None:
+    scheduler = TokenScheduler(["pooled"])
+    scheduler.record("token pooled", "core", 200, rate_limit_headers(100, reset_in=-1))
+    scheduler.record("token expired", "core", 200, rate_limit_headers(100, reset_in=-1))
+    scheduler.record("token active", "core", 200, rate_limit_headers(100))
+    scheduler.record("token new", "core", 200, rate_limit_headers(100))
+
+    assert set(scheduler.states) == {"token pooled", "token active", "token new"}
+
+
+@pytest.fixture
+def connection(mocker: MockerFixture) -> CachingHTTPSConnection:
+    mocker.patch.object(CachingHTTPSConnection, "cache", ResponseCache(":memory:", 1024))
+    mocker.patch.object(CachingHTTPSConnection, "shared_session", MagicMock())
+    mocker.patch("backend.github_http_cache.token_scheduler.scheduler", TokenScheduler(["first", "second"]))
+    return CachingHTTPSConnection("api.github.com")
+
+
+def test_rate_limited_request_is_sent_again_with_other_token(connection: CachingHTTPSConnection) -> None:
+    rate_limited_response = MagicMock(status_code=403, headers={**rate_limit_headers(0)}, text="")
+    response = MagicMock(status_code=200, headers=rate_limit_headers(4999), text="{}")
+    connection.session.get.side_effect = [rate_limited_response, response]
+
+    connection.request("GET", "/repos/owner/test-repo", None, {"Authorization": pool_authorization})
+    assert connection.getresponse().read() == "{}"
+    assert [call.kwargs["headers"]["Authorization"] for call in connection.session.get.call_args_list] == [
+        "token first", "token second"]
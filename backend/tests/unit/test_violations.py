@@ -0,0 +1,43 @@
+import pytest
+from pytest_mock import MockerFixture
+from rdflib import Graph, Literal, URIRef
+from rdflib.namespace import RDF
+
+from backend import shacl_validator
+from backend.shacl_validator import get_number_of_violations, get_violations, props, run_validation, types
+from backend.shacl_verbalizer import verbalize
+
+repo = URIRef("https://testing.example.org/test-repo")
+node_shapes = "https://example.org/repo/node-shapes/"
+property_shapes = "https://example.org/repo/property-shapes/"
+
+
+@pytest.fixture(params=["pyshacl", "compiled"])
+def fair_software_results_graph(request: pytest.FixtureRequest, mocker: MockerFixture) -> Graph:
+    mocker.patch.object(shacl_validator, "validation_engine", request.param)
+    data_graph = Graph()
+    data_graph.add((repo, RDF.type, types["FAIRSoftware"]))
+    data_graph.add((repo, props["isPrivate"], Literal(True)))
+    _, results_graph, report = run_validation(data_graph, "FAIRSoftware", include_report_text=False)
+    assert report is None
+    return results_graph
+
+
+def test_violations_are_reported_per_criterion(fair_software_results_graph: Graph) -> None:
+    violations = get_violations(fair_software_results_graph)
+
+    source_shapes = {violation["sourceShape"] for violation in violations}
+    assert f"{node_shapes}DescriptionOrReadme" in source_shapes
+    assert f"{property_shapes}PublicRepository" in source_shapes
+    assert len(violations) == get_number_of_violations(fair_software_results_graph)
+
+
+def test_violation_contains_path_and_message(fair_software_results_graph: Graph) -> None:
+    violation = next(violation for violation in get_violations(fair_software_results_graph)
+                     if violation["sourceShape"] == f"{property_shapes}PublicRepository")
+
+    assert violation["focusNode"] == str(repo)
+    assert violation["resultPath"] == str(props["isPrivate"])
+    assert violation["severity"] == "http://www.w3.org/ns/shacl#Violation"
+    assert violation["message"].startswith("The repository is private.")
+    assert violation["message"] in verbalize(get_violations(fair_software_results_graph))
@@ -0,0 +1,161 @@
+import hashlib
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+# Access tokens (comma-separated) that are used for requests without an access token instead of the anonymous access,
+# which is limited to 60 requests per hour
+pool_tokens = [token.strip() for token in os.environ.get("QUARE_GITHUB_TOKENS", "").split(",") if token.strip()]
+# Maximum number of seconds a request waits for the reset of a rate limit before it is sent anyway (and fails)
+max_wait = float(os.environ.get("QUARE_RATE_LIMIT_MAX_WAIT", 60 * 60))
+# Number of times a request is sent again after it was rejected because of a rate limit
+max_attempts = 5
+
+# Access token of GitHub clients whose requests are routed to the token of the pool with the most headroom
+pool_marker = "quare-token-pool"
+pool_authorization = f"token {pool_marker}"
+
+# GitHub recommends waiting at least one minute after a secondary rate limit without Retry-After header.
+secondary_rate_limit_wait = 60
+
+
+@dataclass
+class RateLimit:
+    remaining: int
+    limit: int
+    reset_at: float
+
+
+@dataclass
+class TokenState:
+    # Rate limits of each resource (e.g., "core", "graphql" and "search") as reported by the last response, and the
+    # time until which no requests may be sent because of a secondary rate limit
+    pooled: bool
+    rate_limits: dict[str, RateLimit] = field(default_factory=dict)
+    blocked_until: float = 0
+
+    def get_headroom(self, resource: str, now: float) -> float:
+        if self.blocked_until > now:
+            return 0
+        rate_limit = self.rate_limits.get(resource)
+        if rate_limit is None or rate_limit.reset_at <= now:
+            return float("inf")
+        return rate_limit.remaining
+
+    def is_expired(self, now: float) -> bool:
+        return self.blocked_until <= now and all(rate_limit.reset_at <= now
+                                                 for rate_limit in self.rate_limits.values())
+
+    def get_available_at(self, resource: str, now: float) -> float:
+        available_at = max(self.blocked_until, now)
+        rate_limit = self.rate_limits.get(resource)
+        if rate_limit and rate_limit.remaining <= 0:
+            available_at = max(available_at, rate_limit.reset_at)
+        return available_at
+
+
+class TokenScheduler:
+    # Tracks the rate limits of each access token from the response headers. Requests of pooled clients are routed to
+    # the token with the most headroom, and requests are held back until the next reset instead of being rejected.
+    def __init__(self, tokens: list[str]) -> None:
+        self.pool = [f"token {token}" for token in tokens]
+        self.states: dict[str, TokenState] = {authorization: TokenState(pooled=True) for authorization in self.pool}
+        self.condition = threading.Condition()
+
+    def acquire(self, authorization: str, resource: str) -> str:
+        # Returns the authorization to send the request with.
+        candidates = self.pool if authorization == pool_authorization and self.pool else [authorization]
+        deadline = time.time() + max_wait
+
+        with self.condition:
+            while True:
+                now = time.time()
+                states = [(candidate, self.get_state(candidate)) for candidate in candidates]
+                candidate, state = max(states, key=lambda item: item[1].get_headroom(resource, now))
+                if state.get_headroom(resource, now) > 0:
+                    # The request is counted right away, so that concurrent requests are spread over the tokens.
+                    if resource in state.rate_limits and state.rate_limits[resource].reset_at > now:
+                        state.rate_limits[resource].remaining -= 1
+                    return candidate
+
+                available_at = min(state.get_available_at(resource, now) for _, state in states)
+                if available_at > deadline:
+                    logger.warning("The rate limit of all access tokens is exhausted until %s.",
+                                   time.strftime("%H:%M:%S", time.localtime(available_at)))
+                    return candidate
+
+                logger.info("Waiting %.0f seconds for the reset of the rate limit.", available_at - now)
+                self.condition.wait(timeout=available_at - now)
+
+    def record(self, authorization: str, resource: str, status: int, headers: dict[str, str]) -> bool:
+        # Updates the rate limit of the token from the response headers and returns whether the request was rejected
+        # because of a rate limit, so that it has to be sent again.
+        now = time.time()
+        resource = headers.get("x-ratelimit-resource", resource)
+
+        with self.condition:
+            state = self.get_state(authorization)
+            if "x-ratelimit-remaining" in headers and "x-ratelimit-reset" in headers:
+                state.rate_limits[resource] = RateLimit(int(headers["x-ratelimit-remaining"]),
+                                                        int(headers.get("x-ratelimit-limit", 0)),
+                                                        float(headers["x-ratelimit-reset"]))
+
+            rate_limited = status == 429 or (status == 403 and (
+                    "retry-after" in headers or headers.get("x-ratelimit-remaining") == "0"))
+            if rate_limited and headers.get("x-ratelimit-remaining") != "0":
+                state.blocked_until = now + float(headers.get("retry-after", secondary_rate_limit_wait))
+            self.condition.notify_all()
+
+        if rate_limited:
+            logger.warning("The access token %s hit a rate limit of the %s resource.", get_token_id(authorization),
+                           resource)
+        return rate_limited
+
+    def get_state(self, authorization: str) -> TokenState:
+        if authorization not in self.states:
+            self.evict_expired_states()
+            self.states[authorization] = TokenState(pooled=False)
+        return self.states[authorization]
+
+    def evict_expired_states(self) -> None:
+        # The states of the tokens of requests are dropped once all of their rate limits have been reset, since a
+        # new state is equivalent. So only the tokens that were used within the last rate limit window are kept.
+        now = time.time()
+        for authorization in [authorization for authorization, state in self.states.items()
+                              if not state.pooled and state.is_expired(now)]:
+            del self.states[authorization]
+
+    def get_quota(self) -> list[dict]:
+        now = time.time()
+        with self.condition:
+            return [{"token": get_token_id(authorization), "pooled": state.pooled,
+                     "blockedFor": max(0.0, state.blocked_until - now),
+                     "resources": {resource: {"remaining": rate_limit.remaining, "limit": rate_limit.limit,
+                                              "reset": rate_limit.reset_at}
+                                   for resource, rate_limit in state.rate_limits.items()}}
+                    for authorization, state in self.states.items()]
+
+
+def get_token_id(authorization: str) -> str:
+    # Tokens are never exposed, only a prefix of their hash.
+    return hashlib.sha256(authorization.encode()).hexdigest()[:12] if authorization else "anonymous"
+
+
+def get_resource(url: str) -> str:
+    # Resource whose rate limit applies to the request, as long as the response has not reported it
+    if url.startswith("/graphql"):
+        return "graphql"
+    if url.startswith("/search/"):
+        return "search"
+    return "core"
+
+
+def get_pool_access_token() -> str:
+    return pool_marker if scheduler.pool else ""
+
+
+scheduler = TokenScheduler(pool_tokens)
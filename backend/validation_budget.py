@@ -0,0 +1,117 @@
+import os
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import TypeVar
+
+# Latency budget (in seconds) of a validation request that does not set its own, 0 for no budget
+default_time_budget = float(os.environ.get("QUARE_VALIDATION_BUDGET", 0))
+# Share of the budget within which the fetchers have to finish. The rest is reserved for building the data graph and
+# validating it.
+fetch_share = 0.8
+
+Item = TypeVar("Item")
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+@dataclass
+class Budget:
+    # Time (of the monotonic clock) after which running fetchers are cancelled, or None without a budget
+    fetch_deadline: float | None = None
+    # Requirements whose fetchers did not finish in time, and the criteria of each project type that depend on them
+    timed_out_fetchers: list[str] = field(default_factory=list)
+    undetermined_criteria: dict[str, list[str]] = field(default_factory=dict)
+
+
+current_budget: ContextVar[Budget | None] = ContextVar("current_budget", default=None)
+# Deadline of the fetcher that runs in the current thread
+current_fetch_deadline: ContextVar[float | None] = ContextVar("current_fetch_deadline", default=None)
+
+
+@contextmanager
+def budget(seconds: float | None = None) -> Iterator[Budget]:
+    # The budget applies to the validations in the current context until the end of the block.
+    seconds = default_time_budget if seconds is None else seconds
+    request_budget = Budget(monotonic() + seconds * fetch_share if seconds > 0 else None)
+    token = current_budget.set(request_budget)
+    try:
+        yield request_budget
+    finally:
+        current_budget.reset(token)
+
+
+def get_fetch_deadline() -> float | None:
+    request_budget = current_budget.get()
+    return request_budget.fetch_deadline if request_budget else None
+
+
+def get_remaining_fetch_time() -> float | None:
+    fetch_deadline = get_fetch_deadline()
+    return max(0.0, fetch_deadline - monotonic()) if fetch_deadline is not None else None
+
+
+def get_fetch_slice(fetchers: int, workers: int) -> float | None:
+    # Time slice of each fetcher. The fetchers run on a pool of workers, so each of them gets the share of the
+    # remaining fetch time that lets all of them run one after another on the workers within the fetch deadline.
+    remaining_fetch_time = get_remaining_fetch_time()
+    if remaining_fetch_time is None or fetchers == 0:
+        return None
+    return remaining_fetch_time * min(1.0, workers / fetchers)
+
+
+def get_fetcher_deadline(fetch_deadline: float | None, fetch_slice: float | None) -> float | None:
+    # Deadline of a fetcher that starts now, which never exceeds the fetch deadline of the request.
+    if fetch_deadline is None or fetch_slice is None:
+        return fetch_deadline
+    return min(fetch_deadline, monotonic() + fetch_slice)
+
+
+def get_timed_out_fetchers() -> list[str]:
+    request_budget = current_budget.get()
+    return request_budget.timed_out_fetchers if request_budget else []
+
+
+def record_timed_out_fetchers(requirements: list[str]) -> None:
+    request_budget = current_budget.get()
+    if request_budget is not None:
+        request_budget.timed_out_fetchers.extend(requirements)
+
+
+def record_undetermined_criteria(expected_type: str, criteria: list[str]) -> None:
+    request_budget = current_budget.get()
+    if request_budget is not None:
+        request_budget.undetermined_criteria[expected_type] = criteria
+
+
+@contextmanager
+def fetching_until(fetch_deadline: float | None) -> Iterator[None]:
+    # Fetchers run in threads of their own, which do not share the context of the request.
+    token = current_fetch_deadline.set(fetch_deadline)
+    try:
+        yield
+    finally:
+        current_fetch_deadline.reset(token)
+
+
+def check_deadline() -> None:
+    fetch_deadline = current_fetch_deadline.get()
+    if fetch_deadline is not None and monotonic() > fetch_deadline:
+        raise DeadlineExceeded("The fetcher did not finish within the time budget of the validation.")
+
+
+def until_deadline(items: Iterable[Item]) -> Iterator[Item]:
+    # Stops the iteration of a paginated list (with a DeadlineExceeded) once the deadline of the fetcher has passed,
+    # so that no further pages are requested.
+    iterator = iter(items)
+    while True:
+        check_deadline()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        yield item
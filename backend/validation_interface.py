@@ -1,32 +1,197 @@
 #!/usr/bin/env python3
 
+import copy
 import logging
+import threading
+from concurrent.futures import Future
 from time import perf_counter
+from typing import TYPE_CHECKING
 
+from rdflib import Graph
+
+import instrumentation
+import metrics
+import repository_snapshot
+import result_cache
 import shacl_validator
+import token_scheduler
+import validation_budget
+
+if TYPE_CHECKING:
+    from github.Repository import Repository
 
 logger = logging.getLogger(__name__)
 
+ValidationKey = tuple[str, str, str, bool]
+# Validations that are currently running, with the result, the cache status, the timed-out fetchers and the
+# undetermined criteria they finish with
+in_flight: dict[ValidationKey, Future] = {}
+in_flight_lock = threading.Lock()
+
+
+def run_validator(github_access_token: str = "", repo_name: str = "", repo_type: str = "",
+                  include_report: bool = False,
+                  cache_status: dict | None = None) -> tuple[int, int | None, list[dict], str | None]:
+    # Concurrent requests for the same validation wait for the first one and share its result.
+    key = (repository_snapshot.get_token_scope(github_access_token), repo_name, repo_type, include_report)
+    while True:
+        with in_flight_lock:
+            pending_validation = in_flight.get(key)
+            if pending_validation is None:
+                pending_validation = in_flight[key] = Future()
+                break
+
+        metrics.increment("quare_coalesced_requests_total", {"layer": "validation"})
+        result, shared_cache_status, timed_out_fetchers, undetermined_criteria = pending_validation.result()
+        # Without a deadline of its own, a request does not accept a result with undetermined criteria, but validates
+        # the repository again (as the first request).
+        if not timed_out_fetchers or validation_budget.get_fetch_deadline() is not None:
+            validation_budget.record_timed_out_fetchers(timed_out_fetchers)
+            validation_budget.record_undetermined_criteria(repo_type, undetermined_criteria)
+            if cache_status is not None:
+                cache_status.update(shared_cache_status)
+            return copy.deepcopy(result)
+
+    try:
+        shared_cache_status: dict = {}
+        timed_out_fetchers = len(validation_budget.get_timed_out_fetchers())
+        result = validate(github_access_token, repo_name, repo_type, include_report, shared_cache_status)
+        request_budget = validation_budget.current_budget.get()
+        undetermined_criteria = request_budget.undetermined_criteria.get(repo_type, []) if request_budget else []
+        shared_result = (copy.deepcopy(result), shared_cache_status,
+                         validation_budget.get_timed_out_fetchers()[timed_out_fetchers:], undetermined_criteria)
+    except BaseException as exception:
+        finish_validation(key, pending_validation, exception=exception)
+        raise
+
+    finish_validation(key, pending_validation, shared_result)
+    if cache_status is not None:
+        cache_status.update(shared_cache_status)
+    return result
+
 
-def run_validator(github_access_token: str = "", repo_name: str = "", repo_type: str = "") \
-        -> tuple[int, int | None, str]:
+def finish_validation(key: ValidationKey, pending_validation: Future, shared_result: tuple | None = None,
+                      exception: BaseException | None = None) -> None:
+    with in_flight_lock:
+        del in_flight[key]
+    if exception is not None:
+        pending_validation.set_exception(exception)
+    else:
+        pending_validation.set_result(shared_result)
+
+
+def validate(github_access_token: str, repo_name: str, repo_type: str, include_report: bool,
+             cache_status: dict | None) -> tuple[int, int | None, list[dict], str | None]:
+    cache_statuses: dict[str, dict] = {}
+    result = run_validator_against_types(github_access_token, repo_name, [repo_type], include_report,
+                                         cache_statuses)[repo_type]
+    if cache_status is not None:
+        cache_status.update(cache_statuses[repo_type])
+    return result
+
+
+def run_validator_against_types(github_access_token: str = "", repo_name: str = "", repo_types: list[str] | None = None,
+                                include_report: bool = False, cache_statuses: dict[str, dict] | None = None,
+                                listed_repo: "Repository | None" = None) \
+        -> dict[str, tuple[int, int | None, list[dict], str | None]]:
+    cache_statuses = cache_statuses if cache_statuses is not None else {}
+    with metrics.track_in_flight():
+        results = validate_against_types(github_access_token, repo_name, repo_types, include_report, cache_statuses,
+                                         listed_repo)
+
+    for repo_type, (return_code, _, violations, _) in results.items():
+        metrics.increment("quare_validations_total", {"repo_type": repo_type,
+                                                      "result": "conforms" if return_code == 0 else "violations",
+                                                      "cache": cache_statuses[repo_type]["status"]})
+        for violation in violations:
+            metrics.increment("quare_violations_total", {"repo_type": repo_type,
+                                                         "shape": violation["sourceShape"].split("/")[-1]})
+    return results
+
+
+def validate_against_types(github_access_token: str, repo_name: str, repo_types: list[str], include_report: bool,
+                           cache_statuses: dict[str, dict], listed_repo: "Repository | None" = None) \
+        -> dict[str, tuple[int, int | None, list[dict], str | None]]:
     time_start = perf_counter()
+    peak_rss_start = metrics.get_peak_rss_bytes()
 
-    return_code, number_of_violations, report = shacl_validator.validate_repo_against_specs(
-        github_access_token, repo_name, repo_type)
+    # Results of project types that were validated for the current state of the repository are taken from the cache.
+    results: dict[str, tuple[int, int | None, list[dict], str | None]] = {}
+    repository_state = None
+    if result_cache.cache_enabled:
+        with instrumentation.span("cache_probe"):
+            repository_state = shacl_validator.get_repository_state(github_access_token, repo_name, listed_repo)
+    for repo_type in repo_types:
+        cached = result_cache.get_cached_result(repository_state, repo_type, shacl_validator.shapes_hash,
+                                                include_report) if repository_state else None
+        if cached:
+            results[repo_type], age = cached
+            cache_statuses[repo_type] = {"status": "hit", "age": age}
+        elif not result_cache.cache_enabled:
+            cache_statuses[repo_type] = {"status": "disabled", "age": 0}
+        else:
+            # Without the state of the repository, it cannot be decided whether a cached result is still valid.
+            cache_statuses[repo_type] = {"status": "miss" if repository_state else "bypass", "age": 0}
 
-    logger.info(return_code)
+    repo_types_to_validate = [repo_type for repo_type in repo_types if repo_type not in results]
+    if repo_types_to_validate:
+        with instrumentation.trace() as validation_trace:
+            validation_results = shacl_validator.validate_repo_against_types(github_access_token, repo_name,
+                                                                             repo_types_to_validate, include_report,
+                                                                             listed_repo)
+        log_fetch_timings(repo_name, validation_trace)
 
-    # interpret boolean as number
-    return_code = 0 if return_code else 1
+        for repo_type, validation_result in validation_results.items():
+            results[repo_type] = process_validation_result(*validation_result)
+            # Results with undetermined criteria (since fetchers did not finish within the time budget) are partial.
+            if repository_state and not validation_budget.get_timed_out_fetchers():
+                result_cache.store_result(repository_state, repo_type, shacl_validator.shapes_hash,
+                                          results[repo_type])
 
     time_elapsed = perf_counter() - time_start
+    for repo_type in repo_types:
+        metrics.observe("quare_validation_duration_seconds", time_elapsed, {"repo_type": repo_type})
+
+    # The peak RSS is shared by all threads of the process, so its growth is an upper bound of the memory needed by
+    # this validation.
+    peak_rss = metrics.get_peak_rss_bytes()
+    logger.info("Validating the %s repository against the %s project type(s) took %s seconds (%d cached)! The peak "
+                "RSS of the process is %.1f MiB (+%.1f MiB).", repo_name, ", ".join(repo_types),
+                '{:f}'.format(time_elapsed), len(repo_types) - len(repo_types_to_validate), peak_rss / 2 ** 20,
+                (peak_rss - peak_rss_start) / 2 ** 20)
+
+    return {repo_type: results[repo_type] for repo_type in repo_types}
 
-    logger.info("Validating the %s repository against the %s project type took %s seconds!",
-                repo_name, repo_type, '{:f}'.format(time_elapsed))
 
-    return return_code, number_of_violations, report
+def log_fetch_timings(repo_name: str, validation_trace: instrumentation.Trace) -> None:
+    # The properties are fetched concurrently, so the slowest one determines the time needed for fetching.
+    fetch_timings = {name.removeprefix("fetch."): duration
+                     for name, duration in validation_trace.get_durations().items() if name.startswith("fetch.")}
+    if not fetch_timings:
+        logger.info("The properties of the %s repository were taken from a snapshot.", repo_name)
+        return
+
+    for requirement, time_elapsed in fetch_timings.items():
+        logger.info("Fetching %s of the %s repository took %s seconds.", requirement, repo_name,
+                    '{:f}'.format(time_elapsed))
+
+
+def process_validation_result(return_code: bool, results_graph: Graph,
+                              report: str | None) -> tuple[int, int | None, list[dict], str | None]:
+    logger.info(return_code)
+
+    number_of_violations = shacl_validator.get_number_of_violations(results_graph)
+    violations = shacl_validator.get_violations(results_graph)
+
+    # interpret boolean as number
+    return_code = 0 if return_code else 1
+
+    return return_code, number_of_violations, violations, report
 
 
 def get_project_type_specifications() -> dict[str, dict[str, list[str]]]:
     return {"projectTypeSpecifications": shacl_validator.get_project_type_specifications()}
+
+
+def get_rate_limits() -> dict[str, list[dict]]:
+    return {"tokens": token_scheduler.scheduler.get_quota()}
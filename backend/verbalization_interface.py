@@ -1,5 +1,5 @@
 import shacl_verbalizer
 
 
-def run_verbalizer(report) -> list[str]:
-    return shacl_verbalizer.verbalize(report)
+def run_verbalizer(violations: list[dict]) -> list[str]:
+    return shacl_verbalizer.verbalize(violations)